@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from base_de_dados import carregar_base_de_dados, versao_base_de_dados
+from estrategias import selecionar_jogos
+from features import adicionar_features
+from indice_limites import IndiceLimites, obter_indice_limites
+from instrumentacao import contar_elementos, medido
+from jogos_do_dia import impressao_jogos
+from tabelas import mostrar_tabela
+
+AMBITOS = ["Jogos do dia", "Histórico"]
+
+# Dias (até ao último da base de dados) propostos para o histórico
+DIAS_HISTORICO = 30
+
+
+def _passo(minimo, maximo):
+    """Passo do slider: uma potência de 10 com cerca de 100 a 1000 posições na amplitude."""
+    amplitude = maximo - minimo
+    return float(10 ** np.floor(np.log10(amplitude / 100))) if amplitude > 0 else 0.01
+
+
+def _rotulo(regra):
+    esquerda = f"{regra.coluna} - {regra.menos}" if regra.menos is not None else regra.coluna
+    return f"{esquerda} {regra.operador}"
+
+
+def _jogos_historico(base_dados, inicio, fim):
+    """Jogos da base de dados entre 'inicio' e 'fim', com as features à data de cada jogo (features.py)."""
+    datas = base_dados["Date"]
+    anteriores = base_dados[datas <= pd.Timestamp(fim)]
+    jogos = anteriores[anteriores["Date"] >= pd.Timestamp(inicio)]
+    return adicionar_features(jogos, anteriores)
+
+
+def _intervalo_historico(base_dados, chave):
+    """Seletor dos dias do histórico (por omissão os últimos DIAS_HISTORICO da base de dados); None se incompleto."""
+    primeiro, ultimo = base_dados["Date"].min().date(), base_dados["Date"].max().date()
+    contar_elementos(2)
+    st.caption("Histórico: jogos da base de dados, com as estatísticas calculadas a partir dos jogos anteriores "
+               "(aproximações das colunas dos ficheiros diários).")
+    intervalo = st.date_input(
+        "Dias do histórico", (max(primeiro, ultimo - timedelta(days=DIAS_HISTORICO - 1)), ultimo),
+        min_value=primeiro, max_value=ultimo, key=f"{chave}_intervalo",
+    )
+    if len(intervalo) != 2:
+        contar_elementos()
+        st.info("Escolha o primeiro e o último dia.")
+        return None
+    return intervalo
+
+
+@medido("indice_limites")
+def _indice(estrategia, dia, jogos_do_dia, fonte, historico=None):
+    """Índice dos jogos do dia ou, com historico=(base de dados, início, fim), dos jogos da base de dados no intervalo."""
+    if historico is not None:
+        base_dados, inicio, fim = historico
+        # A versão da base de dados identifica os jogos e os seus resultados
+        return obter_indice_limites(
+            estrategia, (versao_base_de_dados(), inicio, fim), lambda: _jogos_historico(base_dados, inicio, fim)
+        )
+    impressao = impressao_jogos(jogos_do_dia)
+    if impressao is None:
+        return IndiceLimites(jogos_do_dia, estrategia)
+    return obter_indice_limites(estrategia, (fonte, dia, impressao), lambda: jogos_do_dia)
+
+
+def mostrar_afinacao(estrategia, dia, jogos_do_dia, fonte="df_jogos_do_dia"):
+    """Sliders para os limites da estratégia, com a contagem de jogos atualizada a cada movimento.
+
+    As contagens saem do índice das colunas ordenadas (indice_limites), sem reavaliar a tabela;
+    nos jogos do dia mostra também os jogos selecionados com os limites escolhidos. O histórico
+    são os jogos da base de dados num intervalo de dias, com as features calculadas à data de cada jogo.
+    """
+    chave = f"afinacao_{estrategia.nome}"
+    contar_elementos(2)
+    with st.expander(f"Afinar limites: {estrategia.nome}"):
+        ambito = st.radio("Jogos", AMBITOS, horizontal=True, key=f"{chave}_ambito")
+        historico = None
+        if ambito == "Histórico":
+            try:
+                base_dados = carregar_base_de_dados()
+            except Exception as e:
+                contar_elementos()
+                st.error(f"Erro ao carregar a base de dados: {e}")
+                return
+            intervalo = _intervalo_historico(base_dados, chave)
+            if intervalo is None:
+                return
+            historico = (base_dados, *intervalo)
+        indice = _indice(estrategia, dia, jogos_do_dia, fonte, historico)
+        if indice.n == 0:
+            contar_elementos()
+            st.warning("Sem jogos para afinar.")
+            return
+
+        limites = {}
+        for i in indice.ajustaveis:
+            regra = estrategia.regras[i]
+            amplitude = indice.amplitude(i)
+            if amplitude is None:
+                contar_elementos()
+                st.caption(f"{_rotulo(regra)} {regra.valor}: sem valores")
+                continue
+            minimo, maximo = min(amplitude[0], regra.valor), max(amplitude[1], regra.valor)
+            passo = _passo(minimo, maximo)
+            minimo, maximo = np.floor(minimo / passo) * passo, np.ceil(maximo / passo) * passo
+            if maximo <= minimo:
+                maximo = minimo + passo
+            contar_elementos(2)
+            coluna_slider, coluna_contagem = st.columns([4, 1])
+            limites[i] = coluna_slider.slider(
+                _rotulo(regra), float(minimo), float(maximo), float(regra.valor), passo,
+                key=f"{chave}_{ambito}_{i}",
+            )
+            coluna_contagem.metric("Passam nesta regra", indice.contar_regra(i, limites[i]))
+
+        contar_elementos()
+        st.metric(f"Jogos selecionados ({ambito.lower()})", f"{indice.contar(limites)} de {indice.n}")
+        if ambito == "Jogos do dia":
+            selecionados = selecionar_jogos(jogos_do_dia, estrategia, indice.mascara(limites))
+            mostrar_tabela(selecionados, f"{chave}_jogos", aggrid=False)
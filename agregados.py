@@ -0,0 +1,240 @@
+import bisect
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from indice_equipas import LOCAIS, IndiceEquipas
+from instrumentacao import medido
+from placares import JANELA_TEMPORADA, JANELAS, MAX_GOLOS, codificar_placares, resumir
+
+# Mercados contados para cada equipa/local/janela, a partir dos golos HT/FT
+MERCADOS = ["vitoria_casa", "empate", "vitoria_fora", "over05_ft", "over15_ft", "over25_ft", "btts", "over05_ht"]
+
+CELULAS = MAX_GOLOS * MAX_GOLOS
+LARGURA = CELULAS + len(MERCADOS)
+MAX_RECENTES = max(n for n in JANELAS.values() if n is not None)
+COLUNAS_CHAVE = ["Date", "Home", "Away", "FT_Goals_H", "FT_Goals_A"]
+
+
+def codificar_jogos(base_dados):
+    """Para cada jogo: data (int64), código do placar e acertos em cada mercado (array n x len(MERCADOS))."""
+    ft_h = base_dados["FT_Goals_H"].to_numpy(dtype=np.int64)
+    ft_a = base_dados["FT_Goals_A"].to_numpy(dtype=np.int64)
+    ht = base_dados["HT_Goals_H"].to_numpy(dtype=np.int64) + base_dados["HT_Goals_A"].to_numpy(dtype=np.int64)
+    mercados = np.column_stack([
+        ft_h > ft_a, ft_h == ft_a, ft_h < ft_a,
+        ft_h + ft_a >= 1, ft_h + ft_a >= 2, ft_h + ft_a >= 3,
+        (ft_h > 0) & (ft_a > 0), ht >= 1,
+    ]).astype(np.int32)
+    datas = pd.to_datetime(base_dados["Date"]).to_numpy("datetime64[ns]").astype("int64")
+    return datas, codificar_placares(ft_h, ft_a), mercados
+
+
+def _acumular(equipa, codigos, mercados, n_equipas):
+    """Soma placares e mercados por equipa: array (n_equipas, LARGURA)."""
+    resultado = np.zeros((n_equipas, LARGURA), dtype=np.int32)
+    resultado[:, :CELULAS] = np.bincount(equipa * CELULAS + codigos, minlength=n_equipas * CELULAS).reshape(n_equipas, CELULAS)
+    for i in range(len(MERCADOS)):
+        resultado[:, CELULAS + i] = np.bincount(equipa, weights=mercados[:, i], minlength=n_equipas)
+    return resultado
+
+
+class AgregadosEquipas:
+    """Contagens materializadas de placares e mercados por equipa, local e janela.
+
+    Novos jogos são aplicados como deltas: somam à janela total e à temporada,
+    e nas janelas dos últimos N jogos o jogo que deixa a janela é retirado.
+    """
+
+    def __init__(self, base_dados):
+        self.n_linhas = len(base_dados)
+        self._equipas = {}
+        self._nomes = {}
+        self._totais = {}
+        self._temporadas = {}
+        self._recentes = {}
+
+        datas, codigos, mercados = codificar_jogos(base_dados)
+        codigos_temporada, nomes_temporada = pd.factorize(base_dados["Season"].astype(str))
+        indice = IndiceEquipas(base_dados)
+        for location in LOCAIS:
+            posicoes, equipa, ordem, mapa = indice.segmentos(location)
+            n_equipas = len(mapa)
+            self._equipas[location] = dict(mapa)
+            self._nomes[location] = list(mapa)
+            for janela, n in JANELAS.items():
+                selecionados = slice(None) if n is None else ordem < n
+                self._totais[(location, janela)] = _acumular(
+                    equipa[selecionados], codigos[posicoes[selecionados]], mercados[posicoes[selecionados]], n_equipas
+                )
+            # Todas as temporadas de uma vez: grupo = temporada * n_equipas + equipa
+            por_temporada = _acumular(
+                codigos_temporada[posicoes] * n_equipas + equipa, codigos[posicoes], mercados[posicoes],
+                len(nomes_temporada) * n_equipas,
+            ).reshape(len(nomes_temporada), n_equipas, LARGURA)
+            self._temporadas[location] = dict(zip(nomes_temporada, por_temporada))
+
+            # Últimos MAX_RECENTES jogos de cada equipa, necessários para retirar jogos das janelas
+            selecionados = ordem < MAX_RECENTES
+            recentes = [[] for _ in range(n_equipas)]
+            for e, p in zip(equipa[selecionados].tolist(), posicoes[selecionados].tolist()):
+                recentes[e].append((-int(datas[p]), p, int(codigos[p]), mercados[p]))
+            self._recentes[location] = recentes
+
+    def copia(self):
+        """Cópia independente, onde se podem aplicar deltas sem alterar este objeto."""
+        copia = object.__new__(AgregadosEquipas)
+        copia.n_linhas = self.n_linhas
+        copia._equipas = {location: dict(mapa) for location, mapa in self._equipas.items()}
+        copia._nomes = {location: list(nomes) for location, nomes in self._nomes.items()}
+        copia._totais = {chave: matriz.copy() for chave, matriz in self._totais.items()}
+        copia._temporadas = {
+            location: {temporada: matriz.copy() for temporada, matriz in por_temporada.items()}
+            for location, por_temporada in self._temporadas.items()
+        }
+        # As entradas (tuplos) não são alteradas, só as listas de cada equipa
+        copia._recentes = {location: [list(r) for r in recentes] for location, recentes in self._recentes.items()}
+        return copia
+
+    def _linha_equipa(self, location, team):
+        """Linha da equipa nas matrizes, criando-a se a equipa ainda não existir."""
+        linha = self._equipas[location].get(team)
+        if linha is None:
+            linha = len(self._nomes[location])
+            self._equipas[location][team] = linha
+            self._nomes[location].append(team)
+            self._recentes[location].append([])
+            for chave, matriz in self._totais.items():
+                if chave[0] == location:
+                    self._totais[chave] = np.vstack([matriz, np.zeros((1, LARGURA), dtype=np.int32)])
+            for temporada, matriz in self._temporadas[location].items():
+                self._temporadas[location][temporada] = np.vstack([matriz, np.zeros((1, LARGURA), dtype=np.int32)])
+        return linha
+
+    def _somar(self, matriz, linha, codigo, mercados, sinal):
+        matriz[linha, codigo] += sinal
+        matriz[linha, CELULAS:] += sinal * mercados
+
+    def aplicar(self, novos_jogos):
+        """Aplica novos jogos como deltas. Devolve o número de jogos aplicados."""
+        if novos_jogos.empty:
+            return 0
+        datas, codigos, mercados = codificar_jogos(novos_jogos)
+        temporadas = novos_jogos["Season"].astype(str).to_numpy()
+        janelas_limitadas = [(janela, n) for janela, n in JANELAS.items() if n is not None]
+        for location in LOCAIS:
+            equipas = novos_jogos[location].astype(str).to_numpy()
+            for i in range(len(novos_jogos)):
+                linha = self._linha_equipa(location, equipas[i])
+                entrada = (-int(datas[i]), self.n_linhas + i, int(codigos[i]), mercados[i])
+                self._somar(self._totais[(location, "total")], linha, entrada[2], entrada[3], 1)
+
+                por_temporada = self._temporadas[location]
+                if temporadas[i] not in por_temporada:
+                    por_temporada[temporadas[i]] = np.zeros((len(self._nomes[location]), LARGURA), dtype=np.int32)
+                self._somar(por_temporada[temporadas[i]], linha, entrada[2], entrada[3], 1)
+
+                recentes = self._recentes[location][linha]
+                posicao = bisect.bisect_left(recentes, entrada[:2])
+                recentes.insert(posicao, entrada)
+                for janela, n in janelas_limitadas:
+                    if posicao < n:
+                        matriz = self._totais[(location, janela)]
+                        self._somar(matriz, linha, entrada[2], entrada[3], 1)
+                        if len(recentes) > n:
+                            _, _, codigo_saida, mercados_saida = recentes[n]
+                            self._somar(matriz, linha, codigo_saida, mercados_saida, -1)
+                del recentes[MAX_RECENTES:]
+        self.n_linhas += len(novos_jogos)
+        return len(novos_jogos)
+
+    def vetores(self, location="Home", janela="total", temporadas=()):
+        """Array (n_equipas, LARGURA): placares seguidos dos acertos em cada mercado."""
+        if janela != JANELA_TEMPORADA:
+            return self._totais[(location, janela)]
+        resultado = np.zeros((len(self._nomes[location]), LARGURA), dtype=np.int32)
+        for temporada in temporadas:
+            matriz = self._temporadas[location].get(str(temporada))
+            if matriz is not None:
+                resultado[:len(matriz)] += matriz
+        return resultado
+
+    def matrizes(self, location="Home", janela="total", temporadas=()):
+        """Array (n_equipas, MAX_GOLOS, MAX_GOLOS) com os histogramas de placares de todas as equipas."""
+        vetores = self.vetores(location, janela, temporadas)
+        return vetores[:, :CELULAS].reshape(-1, MAX_GOLOS, MAX_GOLOS)
+
+    def equipas(self, location="Home"):
+        """Mapa nome da equipa -> linha nas matrizes."""
+        return self._equipas[location]
+
+    def _vetor(self, team, location, janela, temporadas):
+        linha = self._equipas[location].get(team)
+        if linha is None:
+            return np.zeros(LARGURA, dtype=np.int32)
+        return self.vetores(location, janela, temporadas)[linha]
+
+    def contagem(self, team, location="Home", janela="total", temporadas=()):
+        """Contagem de placares e goleadas para uma equipa, local e janela."""
+        vetor = self._vetor(team, location, janela, temporadas)
+        return resumir(vetor[:CELULAS].reshape(MAX_GOLOS, MAX_GOLOS))
+
+    def mercados(self, team, location="Home", janela="total", temporadas=()):
+        """Número de jogos e acertos em cada mercado para uma equipa, local e janela."""
+        vetor = self._vetor(team, location, janela, temporadas)
+        resultado = {"num_jogos": int(vetor[:CELULAS].sum())}
+        resultado.update({nome: int(v) for nome, v in zip(MERCADOS, vetor[CELULAS:])})
+        return resultado
+
+
+def _assinatura(base_dados):
+    """Hash por linha das colunas que identificam cada jogo."""
+    return pd.util.hash_pandas_object(base_dados[COLUNAS_CHAVE], index=False).to_numpy()
+
+
+# Número de bases de dados (p.ex. fatias do histórico de dias diferentes) com agregados em memória
+MAX_AGREGADOS = 4
+
+_estados = OrderedDict()
+_lock = threading.Lock()
+
+
+def _anterior(assinatura):
+    """Chave do estado cujos jogos estão todos na nova base de dados (o maior, se houver vários)."""
+    candidatos = [
+        (len(estado["assinatura"]), chave) for chave, estado in _estados.items()
+        if len(estado["assinatura"]) <= len(assinatura)
+        and np.isin(estado["assinatura"], assinatura, assume_unique=False).all()
+    ]
+    return max(candidatos)[1] if candidatos else None
+
+
+@medido("agregados")
+def obter_agregados(base_dados):
+    """Devolve os agregados da base de dados.
+
+    Se a nova base de dados apenas acrescenta jogos a uma das anteriores (em qualquer posição,
+    p.ex. numa fatia do histórico ordenada pela data), só os jogos novos são aplicados, a uma
+    cópia dos agregados anteriores; caso contrário os agregados são recalculados por completo.
+    Os agregados devolvidos são partilhados entre sessões e nunca são alterados depois.
+    """
+    with _lock:
+        for chave, estado in _estados.items():
+            if estado["base_dados"] is base_dados:
+                _estados.move_to_end(chave)
+                return estado["agregados"]
+        assinatura = _assinatura(base_dados)
+        chave = _anterior(assinatura)
+        if chave is not None:
+            # O estado anterior pode estar em uso noutras sessões: o delta é aplicado a uma cópia
+            estado = _estados[chave]
+            agregados = estado["agregados"].copia()
+            agregados.aplicar(base_dados[~np.isin(assinatura, estado["assinatura"])])
+        else:
+            agregados = AgregadosEquipas(base_dados)
+        _estados[id(agregados)] = {"base_dados": base_dados, "assinatura": assinatura, "agregados": agregados}
+        while len(_estados) > MAX_AGREGADOS:
+            _estados.popitem(last=False)
+        return agregados
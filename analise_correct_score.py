@@ -1,65 +1,42 @@
-from st_aggrid import AgGrid, GridOptionsBuilder
 import pandas as pd
 import streamlit as st
 from datetime import date
 
-# Helper functions
-def drop_reset_index(df):
-    """Remove valores nulos e redefine o índice."""
-    df = df.dropna()
-    df = df.reset_index(drop=True)
-    df.index += 1
-    return df
+from tabelas import mostrar_tabela, titulo, subcabecalho, markdown
+from jogos_do_dia import obter_jogos
+from instrumentacao import medido
+from historico import carregar_historico_equipas
+from agregados import obter_agregados
+from risco_placares import NIVEIS_RISCO, nivel_risco, obter_quadro, temporadas_atuais
+from modelo_placares import MAX_GOLOS_MODELO, matrizes_do_dia
 
+# Helper functions
+@medido("read_jogos")
 def read_jogos(dia):
-    """Carrega os jogos do dia a partir de um arquivo remoto."""
-    dia_str = dia.strftime('%Y-%m-%d')
-    base_url = "https://raw.githubusercontent.com/RedLegacy227/df_jogos_do_dia/refs/heads/main/"
-    file_name = f"df_jogos_do_dia_{dia_str}.csv"
-    file_url = base_url + file_name
-
+    """Carrega os jogos do dia a partir do armazém partilhado por todas as páginas."""
     try:
-        jogos_do_dia = pd.read_csv(file_url)
-        jogos_do_dia = drop_reset_index(jogos_do_dia)
+        jogos_do_dia = obter_jogos(dia)
     except Exception as e:
         st.error(f"Erro ao carregar dados dos jogos do dia: {e}")
         jogos_do_dia = pd.DataFrame()  # Retorna DataFrame vazio no caso de erro
     return jogos_do_dia
 
-def read_base_de_dados():
-    """Carrega a base de dados principal com colunas selecionadas."""
-    url = "https://raw.githubusercontent.com/RedLegacy227/base_de_dados_fluffy_chips/refs/heads/main/fluffy_chips_2018_2024.csv"
-    colunas_selecionadas = [
-        "Date", "League", "Season", "Home", "Away", "HT_Goals_H", "HT_Goals_A", "FT_Goals_H", "FT_Goals_A",
-        "FT_Odd_H", "FT_Odd_D", "FT_Odd_A", "HT_Odd_Over05", "HT_Odd_Under05", "FT_Odd_Over05", "FT_Odd_Under05",
-        "FT_Odd_Over15", "FT_Odd_Under15", "FT_Odd_Over25", "FT_Odd_Under25", "Odd_BTTS_Yes", "Odd_BTTS_No",
-        "Goals_Minutes_Home", "Goals_Minutes_Away",
-    ]
+@medido("read_base_de_dados")
+def read_base_de_dados(jogos_do_dia):
+    """Carrega o histórico apenas das equipas que jogam no dia."""
     try:
-        base_dados = pd.read_csv(url)
-        base_dados = base_dados[colunas_selecionadas]
-        base_dados = drop_reset_index(base_dados)
+        base_dados = carregar_historico_equipas(jogos_do_dia)
     except Exception as e:
         st.error(f"Erro ao carregar a base de dados: {e}")
         base_dados = pd.DataFrame()  # Retorna DataFrame vazio no caso de erro
     return base_dados
 
-# Função para contar e exibir a legenda dos resultados com mensagens personalizadas
-def display_result_frequencies_with_message(df, team, location='Home'):
+# Função para exibir a legenda dos resultados com mensagens personalizadas
+@medido("render_markdown")
+def display_result_frequencies_with_message(contagem, team, location='Home'):
     """Exibe frequência de resultados com mensagens personalizadas e separa goleadas detalhadamente no Streamlit."""
-    if location == 'Home':
-        filtered_games = df[df['Home'] == team]
-        result_column = ['FT_Goals_H', 'FT_Goals_A']
-    else:
-        filtered_games = df[df['Away'] == team]
-        result_column = ['FT_Goals_H', 'FT_Goals_A']
-    
-    # Calcula a frequência dos resultados
-    filtered_games['Resultado'] = filtered_games.apply(lambda row: f"{row[result_column[0]]}x{row[result_column[1]]}", axis=1)
-    result_counts = filtered_games['Resultado'].value_counts().to_dict()
-    
     # Contagem de jogos analisados
-    num_games = len(filtered_games)
+    num_games = contagem.num_jogos
     
     # Lista de resultados para verificar
     target_results = [
@@ -69,108 +46,50 @@ def display_result_frequencies_with_message(df, team, location='Home'):
     ]
     
     # Exibição no Streamlit
-    st.markdown(f"<h3 style='text-align: center;'><strong>{team} - {num_games} jogos analisados</strong></h3>", unsafe_allow_html=True)
+    markdown(f"<h3 style='text-align: center;'><strong>{team} - {num_games} jogos analisados</strong></h3>", unsafe_allow_html=True)
     for result in target_results:
-        count = result_counts.get(result, 0)
-        if count == 0:
-            message = f"<span style='background-color: #d4edda; color: #155724; padding: 5px; border-radius: 5px;'>Limpinho ({count})</span>"
-        elif 1 <= count <= 3:
-            message = f"<span style='background-color: #c3e6cb; color: #0b5124; padding: 5px; border-radius: 5px;'>Favorável ({count})</span>"
-        elif 4 <= count <= 7:
-            message = f"<span style='background-color: #fff3cd; color: #856404; padding: 5px; border-radius: 5px;'>Cuidado ({count})</span>"
-        elif 8 <= count <= 10:
-            message = f"<span style='background-color: #f8d7da; color: #721c24; padding: 5px; border-radius: 5px;'>Muito Cuidado ({count})</span>"
-        else:
-            message = f"<span style='background-color: #f5c6cb; color: #491217; padding: 5px; border-radius: 5px;'>Não Entrar ({count})</span>"
-        st.markdown(f"**Resultado {result}:** {message}", unsafe_allow_html=True)
-
-    # Goleadas e empates especiais
-    goleadas_home_win = filtered_games[
-        (filtered_games[result_column[0]] - filtered_games[result_column[1]]) >= 4
-    ]
-    goleadas_home_defeat = filtered_games[
-        (filtered_games[result_column[1]] - filtered_games[result_column[0]]) >= 4
-    ]
-    empate_outro = filtered_games[
-        (filtered_games[result_column[0]] == filtered_games[result_column[1]]) &
-        (filtered_games[result_column[0]] >= 4)
-    ]
-    
-    # Contagens detalhadas
-    goleada_home_win_count = len(goleadas_home_win)
-    goleada_home_defeat_count = len(goleadas_home_defeat)
-    empate_outro_count = len(empate_outro)
+        golos_casa, golos_fora = (int(g) for g in result.split("x"))
+        count = int(contagem.matriz[golos_casa, golos_fora])
+        markdown(f"**Resultado {result}:** {format_goleada_message(count)}", unsafe_allow_html=True)
 
-    # Exibição das contagens no mesmo estilo
+    # Exibição das goleadas e empates especiais no mesmo estilo
     if location == 'Home':
-        st.markdown(f"**Goleada Home (Win):** {format_goleada_message(goleada_home_win_count)}", unsafe_allow_html=True)
-        st.markdown(f"**Goleada Home (Defeat):** {format_goleada_message(goleada_home_defeat_count)}", unsafe_allow_html=True)
+        markdown(f"**Goleada Home (Win):** {format_goleada_message(contagem.goleada_casa)}", unsafe_allow_html=True)
+        markdown(f"**Goleada Home (Defeat):** {format_goleada_message(contagem.goleada_fora)}", unsafe_allow_html=True)
     elif location == 'Away':
-        goleadas_away_win = filtered_games[
-            (filtered_games[result_column[1]] - filtered_games[result_column[0]]) >= 4
-        ]
-        goleadas_away_defeat = filtered_games[
-            (filtered_games[result_column[0]] - filtered_games[result_column[1]]) >= 4
-        ]
-        goleada_away_win_count = len(goleadas_away_win)
-        goleada_away_defeat_count = len(goleadas_away_defeat)
+        markdown(f"**Goleada Away (Win):** {format_goleada_message(contagem.goleada_fora)}", unsafe_allow_html=True)
+        markdown(f"**Goleada Away (Defeat):** {format_goleada_message(contagem.goleada_casa)}", unsafe_allow_html=True)
 
-        st.markdown(f"**Goleada Away (Win):** {format_goleada_message(goleada_away_win_count)}", unsafe_allow_html=True)
-        st.markdown(f"**Goleada Away (Defeat):** {format_goleada_message(goleada_away_defeat_count)}", unsafe_allow_html=True)
+    markdown(f"**Outro Qualquer Empate:** {format_goleada_message(contagem.empate_outro)}", unsafe_allow_html=True)
 
-    st.markdown(f"**Outro Qualquer Empate:** {format_goleada_message(empate_outro_count)}", unsafe_allow_html=True)
+# Cores (fundo, texto) de cada nível de risco, pela ordem de NIVEIS_RISCO
+CORES_RISCO = [("#d4edda", "#155724"), ("#c3e6cb", "#0b5124"), ("#fff3cd", "#856404"), ("#f8d7da", "#721c24"), ("#f5c6cb", "#491217")]
 
 def format_goleada_message(count):
     """Formata mensagens de goleadas no mesmo estilo dos resultados gerais."""
-    if count == 0:
-        return f"<span style='background-color: #d4edda; color: #155724; padding: 5px; border-radius: 5px;'>Limpinho ({count})</span>"
-    elif 1 <= count <= 3:
-        return f"<span style='background-color: #c3e6cb; color: #0b5124; padding: 5px; border-radius: 5px;'>Favorável ({count})</span>"
-    elif 4 <= count <= 7:
-        return f"<span style='background-color: #fff3cd; color: #856404; padding: 5px; border-radius: 5px;'>Cuidado ({count})</span>"
-    elif 8 <= count <= 10:
-        return f"<span style='background-color: #f8d7da; color: #721c24; padding: 5px; border-radius: 5px;'>Muito Cuidado ({count})</span>"
-    else:
-        return f"<span style='background-color: #f5c6cb; color: #491217; padding: 5px; border-radius: 5px;'>Não Entrar ({count})</span>"
+    nivel = nivel_risco(count)
+    fundo, cor = CORES_RISCO[nivel]
+    return f"<span style='background-color: {fundo}; color: {cor}; padding: 5px; border-radius: 5px;'>{NIVEIS_RISCO[nivel]} ({count})</span>"
 
 # Função para exibir resultados com título formatado
-def display_result_section(title, df, team, location='Home'):
-    display_result_frequencies_with_message(df, team, location)
+def display_result_section(title, contagem, team, location='Home'):
+    display_result_frequencies_with_message(contagem, team, location)
 
 # Funções de exibição para diferentes filtros
 def display_result_frequencies_3_seasons(df, team, location='Home'):
     """Exibe os resultados nas últimas 3 temporadas."""
-    if location == 'Home':
-        filtered_games = df[df['Home'] == team].sort_values(by='Date', ascending=False).head(114)
-    else:
-        filtered_games = df[df['Away'] == team].sort_values(by='Date', ascending=False).head(114)
-    display_result_section("3 Temporadas", filtered_games, team, location)
+    contagem = obter_agregados(df).contagem(team, location, '3_temporadas')
+    display_result_section("3 Temporadas", contagem, team, location)
 
 def display_result_frequencies_2_seasons(df, team, location='Home'):
     """Exibe os resultados nas últimas 2 temporadas."""
-    if location == 'Home':
-        filtered_games = df[df['Home'] == team].sort_values(by='Date', ascending=False).head(76)
-    else:
-        filtered_games = df[df['Away'] == team].sort_values(by='Date', ascending=False).head(76)
-    display_result_section("2 Temporadas", filtered_games, team, location)
+    contagem = obter_agregados(df).contagem(team, location, '2_temporadas')
+    display_result_section("2 Temporadas", contagem, team, location)
 
 def display_result_frequencies_current_season(df, team, location='Home', dia=None):
     """Exibe os jogos da temporada atual."""
-    current_year = pd.to_datetime(dia).year
-    current_season = f"{current_year}/{current_year + 1}"
-    alternate_season = str(current_year)
-    
-    if location == 'Home':
-        filtered_games = df[
-            (df['Home'] == team) & 
-            ((df['Season'] == current_season) | (df['Season'] == alternate_season))
-        ].sort_values(by='Date', ascending=False)
-    else:
-        filtered_games = df[
-            (df['Away'] == team) & 
-            ((df['Season'] == current_season) | (df['Season'] == alternate_season))
-        ].sort_values(by='Date', ascending=False)
-    display_result_section("Temporada Atual", filtered_games, team, location)
+    contagem = obter_agregados(df).contagem(team, location, 'temporada_atual', temporadas_atuais(dia))
+    display_result_section("Temporada Atual", contagem, team, location)
     
 # Exibir a legenda dos resultados para jogos em casa das equipes selecionadas
 def display_home_and_away_results(df_liga1, team, team_games_today):
@@ -178,14 +97,16 @@ def display_home_and_away_results(df_liga1, team, team_games_today):
     # Criar duas colunas para a exibição lado a lado
     col1, col2 = st.columns(2)
 
+    agregados = obter_agregados(df_liga1)
+
     # Exibir os últimos 20 jogos em casa
     with col1:
-        display_result_section(f"{team}", df_liga1, team, location='Home')
+        display_result_section(f"{team}", agregados.contagem(team, 'Home'), team, location='Home')
 
     # Exibir os últimos 20 jogos fora para cada adversário
     with col2:
         for opponent in team_games_today['Away'].unique():
-            display_result_section(f"{opponent}", df_liga1, opponent, location='Away')
+            display_result_section(f"{opponent}", agregados.contagem(opponent, 'Away'), opponent, location='Away')
 
 def display_last_3_seasons_side_by_side(df_liga1, team, team_games_today):
     """Exibe os últimos 20 jogos de casa e fora lado a lado no Streamlit."""
@@ -232,71 +153,102 @@ def display_current_season_side_by_side(df_liga1, team, team_games_today, dia):
         for opponent in team_games_today['Away'].unique():
             display_result_frequencies_current_season(df_liga1, opponent, location='Away', dia=dia)
             
-def display_table_with_aggrid(dataframe):
-    """Exibe o DataFrame com ajuste automático de colunas, altura e alinhamento central."""
-    gb = GridOptionsBuilder.from_dataframe(dataframe)
-    
-    # Configurar alinhamento central
-    gb.configure_default_column(
-        resizable=True, autoSizeColumns=True, wrapText=True, 
-        cellStyle={'textAlign': 'center'}  # Alinhamento central
-    )
-    
-    # Ajustar altura automaticamente
-    gb.configure_grid_options(domLayout='autoHeight')  # Altura dinâmica
+def display_table_with_aggrid(dataframe, chave):
+    """Exibe o DataFrame paginado, com as colunas principais e as restantes a pedido."""
+    mostrar_tabela(dataframe, chave)
 
-    grid_options = gb.build()
+def display_risk_board(base_dados, jogos_do_dia, dia):
+    """Exibe o risco de todos os resultados, jogos e janelas do dia numa só tabela ordenável."""
+    quadro = obter_quadro(base_dados, jogos_do_dia, dia)
 
-    AgGrid(dataframe, gridOptions=grid_options, enable_enterprise_modules=False)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        janelas = st.multiselect("Janelas", list(quadro["Janela"].cat.categories), default=["total"], key="quadro_janelas")
+    with col2:
+        riscos = st.multiselect("Risco", NIVEIS_RISCO, default=NIVEIS_RISCO[:2], key="quadro_riscos")
+    with col3:
+        ordenar_por = st.selectbox("Ordenar por", ["Nivel_Risco", "Ocorrencias_Home", "Ocorrencias_Away", "Home", "Resultado"],
+                                   key="quadro_ordem")
+    visivel = quadro[quadro["Janela"].isin(janelas or quadro["Janela"].cat.categories) & quadro["Risco"].isin(riscos or NIVEIS_RISCO)]
+    # Ordenação no servidor, para valer em todas as páginas da tabela
+    visivel = visivel.sort_values([ordenar_por, "Home", "Resultado"], kind="stable")
+    mostrar_tabela(visivel, "quadro_risco", colunas=list(quadro.columns), aggrid=False)
     
 
+def display_model_probabilities(jogos_do_dia, jogos_equipe_casa):
+    """Exibe a matriz de probabilidades (%) dos placares 0–6 x 0–6 do modelo de Dixon-Coles, por jogo."""
+    try:
+        matrizes = matrizes_do_dia(jogos_do_dia)
+    except Exception as e:
+        st.error(f"Erro ao ajustar o modelo de placares: {e}")
+        return
+    golos = [str(g) for g in range(MAX_GOLOS_MODELO)]
+    for posicao in jogos_do_dia.index.get_indexer(jogos_equipe_casa.index):
+        jogo = jogos_do_dia.iloc[posicao]
+        markdown(f"**{jogo['Home']} x {jogo['Away']}** (linhas: golos da casa, colunas: golos do visitante)")
+        if pd.isna(matrizes[posicao]).all():
+            st.info("Sem histórico suficiente desta liga para o modelo.")
+            continue
+        matriz = pd.DataFrame(matrizes[posicao] * 100, index=golos, columns=golos).round(1)
+        st.dataframe(matriz)
+
 # Main dashboard
 def show_analise_correct_score():
     """Exibe o painel principal para análise jogo a jogo."""
-    st.title("Fluffy Chips Dashboard")
+    titulo("Fluffy Chips Dashboard")
 
     # Seção: Seleção de Data
     dia = st.date_input("Selecione a data para análise", date.today())
 
     # Carregar dados
-    st.subheader("Jogos do Dia")
+    subcabecalho("Jogos do Dia")
     jogos_do_dia = read_jogos(dia)
 
     if not jogos_do_dia.empty:
         # Exibir jogos do dia com cabeçalhos corrigidos e ajuste automático
-        display_table_with_aggrid(jogos_do_dia)
+        display_table_with_aggrid(jogos_do_dia, "jogos_do_dia")
+
+        # Carregar a base de dados principal
+        base_dados = read_base_de_dados(jogos_do_dia)
+
+        # Quadro de risco de todos os jogos do dia
+        if not base_dados.empty:
+            subcabecalho("Quadro de Risco dos Resultados (Todos os Jogos do Dia)")
+            display_risk_board(base_dados, jogos_do_dia, dia)
 
         # Seleção da equipe para análise
-        st.subheader("Selecione a Equipe para Análise Detalhada")
+        subcabecalho("Selecione a Equipe para Análise Detalhada")
         equipes_casa = sorted(jogos_do_dia['Home'].unique())
         equipe_selecionada = st.selectbox("Equipe da Casa:", equipes_casa)
 
-        # Carregar a base de dados principal
-        base_dados = read_base_de_dados()
-
         if not base_dados.empty and equipe_selecionada:            
             # Filtrar jogos do dia para a equipe selecionada
             jogos_equipe_casa = jogos_do_dia[jogos_do_dia['Home'] == equipe_selecionada]
 
             # Resultados gerais: Home e Away
-            st.markdown("<h2 style='text-align: center;'>Resultados Verificados no Total da Base de Dados</h2>", unsafe_allow_html=True)
-            st.markdown("")
+            markdown("<h2 style='text-align: center;'>Resultados Verificados no Total da Base de Dados</h2>", unsafe_allow_html=True)
+            markdown("")
             display_home_and_away_results(base_dados, equipe_selecionada, jogos_equipe_casa)
 
             # 3 Temporadas: Home e Away
-            st.markdown("<h2 style='text-align: center;'>Resultados Verificados nas Últimas 3 Temporadas</h2>", unsafe_allow_html=True)
-            st.markdown("")
+            markdown("<h2 style='text-align: center;'>Resultados Verificados nas Últimas 3 Temporadas</h2>", unsafe_allow_html=True)
+            markdown("")
             display_last_3_seasons_side_by_side(base_dados, equipe_selecionada, jogos_equipe_casa)
 
             # 2 Temporadas: Home e Away
-            st.markdown("<h2 style='text-align: center;'>Resultados Verificados nas Últimas 2 Temporadas</h2>", unsafe_allow_html=True)
-            st.markdown("")
+            markdown("<h2 style='text-align: center;'>Resultados Verificados nas Últimas 2 Temporadas</h2>", unsafe_allow_html=True)
+            markdown("")
             display_last_2_seasons_side_by_side(base_dados, equipe_selecionada, jogos_equipe_casa)
 
             # Temporada atual: Home e Away
-            st.markdown("<h2 style='text-align: center;'>Resultados Verificados na Temporada Atual</h2>", unsafe_allow_html=True)
-            st.markdown("")
+            markdown("<h2 style='text-align: center;'>Resultados Verificados na Temporada Atual</h2>", unsafe_allow_html=True)
+            markdown("")
             display_current_season_side_by_side(base_dados, equipe_selecionada, jogos_equipe_casa, dia)
 
+            # Probabilidades do modelo de Dixon-Coles (ajustado às ligas do dia)
+            markdown("<h2 style='text-align: center;'>Probabilidades dos Placares (Modelo Dixon-Coles)</h2>", unsafe_allow_html=True)
+            markdown("")
+            display_model_probabilities(jogos_do_dia, jogos_equipe_casa)
+
     else:
         st.warning("Nenhum jogo encontrado para o dia selecionado. Por favor, escolha outra data.")
@@ -0,0 +1,206 @@
+import itertools
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from estrategias import LAY_0X1, LAY_1X0, LAY_AWAY, LAY_HOME, OVER_15_FT, avaliar_regra, colunas_referenciadas, ler_colunas
+from pool_processos import dados_locais, dados_processo, executor_com_dados
+
+# A base de dados não tem odds de resultado correto: usa-se esta odd de lay, salvo indicação em contrário
+ODD_LAY_CORRECT_SCORE = 10.0
+
+# tipo: 'back' ou 'lay'; odd: nome da coluna ou valor fixo; evento: nome do evento que dá vitória ao back
+Mercado = namedtuple("Mercado", ["tipo", "odd", "evento"])
+
+EVENTOS = {
+    "vitoria_casa": lambda h, a: h > a,
+    "vitoria_fora": lambda h, a: h < a,
+    "placar_0x1": lambda h, a: (h == 0) & (a == 1),
+    "placar_1x0": lambda h, a: (h == 1) & (a == 0),
+    "over15_ft": lambda h, a: h + a >= 2,
+}
+
+MERCADOS = {
+    LAY_HOME.nome: Mercado("lay", "FT_Odd_H", "vitoria_casa"),
+    LAY_AWAY.nome: Mercado("lay", "FT_Odd_A", "vitoria_fora"),
+    LAY_0X1.nome: Mercado("lay", ODD_LAY_CORRECT_SCORE, "placar_0x1"),
+    LAY_1X0.nome: Mercado("lay", ODD_LAY_CORRECT_SCORE, "placar_1x0"),
+    OVER_15_FT.nome: Mercado("back", "FT_Odd_Over15", "over15_ft"),
+}
+
+def juntar_resultados(jogos, base_dados):
+    """Junta aos jogos (com as colunas usadas pelas estratégias) os resultados e odds da base de dados.
+
+    A junção é feita por (Date, Home, Away); as colunas já existentes nos jogos são mantidas.
+    """
+    chaves = ["Date", "Home", "Away"]
+    resultados = base_dados[chaves + [c for c in base_dados.columns if c not in jogos.columns]].copy()
+    jogos = jogos.copy()
+    for df in (jogos, resultados):
+        df["Date"] = pd.to_datetime(df["Date"])
+        df["Home"] = df["Home"].astype(str)
+        df["Away"] = df["Away"].astype(str)
+    return jogos.merge(resultados, on=chaves, how="inner")
+
+
+def _odds(jogos, mercado):
+    if isinstance(mercado.odd, str):
+        return jogos[mercado.odd].to_numpy(dtype=float)
+    return np.full(len(jogos), float(mercado.odd))
+
+
+def lucro_por_jogo(jogos, mercado, comissao=0.0):
+    """Lucro, risco e vitória de uma aposta de 1 unidade em cada jogo.
+
+    Back: arrisca 1 e ganha (odd - 1). Lay: arrisca a responsabilidade (odd - 1) e ganha 1.
+    """
+    golos_h = jogos["FT_Goals_H"].to_numpy(dtype=float)
+    golos_a = jogos["FT_Goals_A"].to_numpy(dtype=float)
+    evento = EVENTOS[mercado.evento](golos_h, golos_a)
+    odd = _odds(jogos, mercado)
+    if mercado.tipo == "back":
+        ganhou = evento
+        risco = np.ones(len(jogos))
+        lucro = np.where(ganhou, (odd - 1) * (1 - comissao), -1.0)
+    else:
+        ganhou = ~evento
+        risco = odd - 1
+        lucro = np.where(ganhou, 1 - comissao, -risco)
+    return lucro, risco, ganhou
+
+
+def metricas(lucro, risco, ganhou):
+    """Métricas de uma sequência de apostas ordenada no tempo."""
+    apostas = len(lucro)
+    if apostas == 0:
+        return {"apostas": 0, "lucro": 0.0, "roi": np.nan, "strike_rate": np.nan, "max_drawdown": 0.0}
+    acumulado = np.concatenate(([0.0], np.cumsum(lucro)))
+    return {
+        "apostas": apostas,
+        "lucro": float(acumulado[-1]),
+        "roi": float(acumulado[-1] / risco.sum()),
+        "strike_rate": float(ganhou.mean()),
+        "max_drawdown": float((np.maximum.accumulate(acumulado) - acumulado).max()),
+    }
+
+
+def _ordenar(jogos, estrategia, mercado):
+    """Só as colunas necessárias, por ordem temporal e sem jogos sem resultado. Devolve (jogos, mercado)."""
+    mercado = mercado or MERCADOS[estrategia.nome]
+    ordenacao = ["Date", "Time"] if "Time" in jogos.columns else ["Date"]
+    # Só as colunas necessárias são copiadas e ordenadas
+    necessarias = list(dict.fromkeys(
+        colunas_referenciadas([estrategia]) + ordenacao + ["FT_Goals_H", "FT_Goals_A"]
+        + ([mercado.odd] if isinstance(mercado.odd, str) else [])
+    ))
+    jogos = jogos[necessarias].sort_values(by=ordenacao, kind="stable")
+    return jogos[jogos["FT_Goals_H"].notna() & jogos["FT_Goals_A"].notna()], mercado
+
+
+def _preparar(jogos, estrategia, mercado, comissao):
+    """Ordena os jogos no tempo e devolve (valores das colunas, lucro, risco, ganhou)."""
+    jogos, mercado = _ordenar(jogos, estrategia, mercado)
+    valores = ler_colunas(jogos, colunas_referenciadas([estrategia]))
+    return (valores,) + lucro_por_jogo(jogos, mercado, comissao)
+
+
+def backtest(jogos, estrategia, mercado=None, comissao=0.0):
+    """Reproduz uma estratégia sobre jogos históricos (ver juntar_resultados) e devolve as métricas."""
+    valores, lucro, risco, ganhou = _preparar(jogos, estrategia, mercado, comissao)
+    mascara = np.ones(len(lucro), dtype=bool)
+    for regra in estrategia.regras:
+        mascara &= avaliar_regra(regra, valores)
+    return metricas(lucro[mascara], risco[mascara], ganhou[mascara])
+
+
+def apostas(jogos, estrategia, mercado=None, comissao=0.0):
+    """Apostas da estratégia sobre jogos históricos, por ordem temporal: (ganho, ganhou).
+
+    'ganho' é o lucro por unidade arriscada se a aposta ganhar (no lay, (1 - comissão) / (odd - 1);
+    no back, (odd - 1) * (1 - comissão)); uma aposta perdida perde a unidade arriscada.
+    """
+    jogos, mercado = _ordenar(jogos, estrategia, mercado)
+    valores = ler_colunas(jogos, colunas_referenciadas([estrategia]))
+    mascara = np.ones(len(jogos), dtype=bool)
+    for regra in estrategia.regras:
+        mascara &= avaliar_regra(regra, valores)
+    jogos = jogos[mascara]
+    _, _, ganhou = lucro_por_jogo(jogos, mercado, comissao)
+    odd = _odds(jogos, mercado)
+    ganho = (odd - 1) * (1 - comissao) if mercado.tipo == "back" else (1 - comissao) / (odd - 1)
+    return ganho, ganhou
+
+
+def _resolver_regra(estrategia, chave):
+    """Índice da regra identificada por índice, nome de coluna ou (coluna, operador)."""
+    if isinstance(chave, int):
+        return chave
+    candidatos = [
+        i for i, regra in enumerate(estrategia.regras)
+        if (regra.coluna, regra.operador) == chave or regra.coluna == chave
+    ]
+    if len(candidatos) != 1:
+        raise ValueError(f"Regra ambígua ou inexistente em {estrategia.nome}: {chave!r}")
+    return candidatos[0]
+
+
+def _avaliar_lote(combinacoes):
+    """Avalia um lote de combinações de limites (corre em cada processo do pool)."""
+    dados = dados_processo()
+    avaliadas = {}
+    linhas = []
+    for valores_grade in combinacoes:
+        mascara = dados["mascara_fixa"].copy()
+        for indice, valor in zip(dados["indices"], valores_grade):
+            regra = dados["regras"][indice]._replace(valor=valor)
+            if regra not in avaliadas:
+                avaliadas[regra] = avaliar_regra(regra, dados["valores"])
+            mascara &= avaliadas[regra]
+        linha = metricas(dados["lucro"][mascara], dados["risco"][mascara], dados["ganhou"][mascara])
+        linha.update(zip(dados["nomes"], valores_grade))
+        linhas.append(linha)
+    return linhas
+
+
+def varrer_grade(jogos, estrategia, grade, mercado=None, comissao=0.0, processos=None,
+                 tamanho_lote=250, ordenar_por="lucro", min_apostas=1):
+    """Avalia todas as combinações de limites da grade e devolve uma tabela ordenada.
+
+    'grade' associa a cada regra (índice, nome da coluna ou (coluna, operador))
+    a lista de valores a testar. As regras fora da grade ficam fixas e são avaliadas
+    uma única vez; só os jogos que as satisfazem entram na varredura.
+    """
+    valores, lucro, risco, ganhou = _preparar(jogos, estrategia, mercado, comissao)
+    indices = [_resolver_regra(estrategia, chave) for chave in grade]
+    mascara_fixa = np.ones(len(lucro), dtype=bool)
+    for i, regra in enumerate(estrategia.regras):
+        if i not in indices:
+            mascara_fixa &= avaliar_regra(regra, valores)
+
+    # Reduz todos os arrays aos jogos que passam nas regras fixas
+    dados = {
+        "valores": {c: v[mascara_fixa] for c, v in valores.items()},
+        "lucro": lucro[mascara_fixa], "risco": risco[mascara_fixa], "ganhou": ganhou[mascara_fixa],
+        "mascara_fixa": np.ones(int(mascara_fixa.sum()), dtype=bool),
+        "regras": list(estrategia.regras), "indices": indices,
+        "nomes": [f"{estrategia.regras[i].coluna} {estrategia.regras[i].operador}" for i in indices],
+    }
+    combinacoes = list(itertools.product(*grade.values()))
+    lotes = [combinacoes[i:i + tamanho_lote] for i in range(0, len(combinacoes), tamanho_lote)]
+
+    processos = processos or os.cpu_count() or 1
+    if processos == 1:
+        with dados_locais(dados):
+            resultados = [linha for lote in lotes for linha in _avaliar_lote(lote)]
+    else:
+        with executor_com_dados(processos, dados) as executor:
+            resultados = [linha for linhas in executor.map(_avaliar_lote, lotes) for linha in linhas]
+
+    tabela = pd.DataFrame(resultados, columns=dados["nomes"] + ["apostas", "lucro", "roi", "strike_rate", "max_drawdown"])
+    tabela = tabela[tabela["apostas"] >= min_apostas]
+    tabela = tabela.sort_values(by=ordenar_por, ascending=False).reset_index(drop=True)
+    tabela.index += 1
+    return tabela
+
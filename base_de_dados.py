@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pyarrow as pa
+
+from esquemas import (
+    COLUNAS_CATEGORICAS, COLUNAS_GOLOS, COLUNAS_ODDS, COLUNAS_SELECIONADAS, TIPOS_LEITURA, ler_csv,
+)
+from instrumentacao import medido
+
+# URL da base de dados (pode ser alterado por variável de ambiente, p.ex. para um servidor local)
+URL_BASE_DE_DADOS = os.environ.get(
+    "FLUFFY_URL_BASE_DE_DADOS",
+    "https://raw.githubusercontent.com/RedLegacy227/base_de_dados_fluffy_chips/refs/heads/main/fluffy_chips_2018_2024.csv",
+)
+
+# Pasta local onde fica o snapshot da base de dados (pode ser alterada por variável de ambiente)
+CACHE_DIR = os.environ.get(
+    "FLUFFY_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+# Intervalo (segundos) durante o qual a cópia em memória é usada sem revalidar no servidor
+INTERVALO_REVALIDACAO = 300
+
+# Contadores de uso da cache
+cache_stats = {
+    "hits": 0,           # servido da memória sem pedido ao servidor
+    "revalidacoes": 0,   # servidor respondeu 304 (ou conteúdo idêntico)
+    "misses": 0,         # download e parse completos
+    "disco": 0,          # snapshot carregado do disco
+    "obsoletos": 0,      # servidor indisponível, servida a última cópia conhecida
+    "concorrentes": 0,   # outra chamada já estava a revalidar, servida a cópia em memória
+}
+
+_memo = {}
+_lock = threading.Lock()
+# Um lock por URL para o pedido ao servidor (só uma revalidação de cada vez)
+_pedidos = {}
+
+
+def _caminhos_snapshot(url, cache_dir):
+    """Devolve os caminhos do snapshot, dos metadados e do ficheiro partilhado associados ao URL."""
+    chave = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    base = os.path.join(cache_dir, f"base_de_dados_{chave}")
+    return base + ".parquet", base + ".json", base + ".arrow"
+
+
+def _ler_snapshot(url, cache_dir):
+    """Lê o snapshot do disco, se existir. Devolve None caso contrário."""
+    caminho_dados, caminho_meta, caminho_partilhado = _caminhos_snapshot(url, cache_dir)
+    if not (os.path.exists(caminho_dados) and os.path.exists(caminho_meta)):
+        return None
+    try:
+        with open(caminho_meta, encoding="utf-8") as f:
+            meta = json.load(f)
+        if not os.path.exists(caminho_partilhado):
+            gravar_partilhado(ler_snapshot(caminho_dados), caminho_partilhado)
+        df = mapear_partilhado(caminho_partilhado)
+    except Exception:
+        return None
+    return dict(meta, df=df, verificado_em=0.0)
+
+
+def _gravar_snapshot(url, cache_dir, entrada):
+    """Grava o snapshot, o ficheiro partilhado e os metadados de forma atómica."""
+    os.makedirs(cache_dir, exist_ok=True)
+    caminho_dados, caminho_meta, caminho_partilhado = _caminhos_snapshot(url, cache_dir)
+    meta = {k: entrada[k] for k in ("etag", "last_modified", "versao")}
+    gravar_snapshot(entrada["df"], caminho_dados + ".tmp")
+    os.replace(caminho_dados + ".tmp", caminho_dados)
+    gravar_partilhado(entrada["df"], caminho_partilhado)
+    with open(caminho_meta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(caminho_meta + ".tmp", caminho_meta)
+
+
+@medido("http")
+def _pedido_condicional(url, entrada, timeout):
+    """Faz um GET condicional. Devolve (status, corpo, etag, last_modified)."""
+    pedido = urllib.request.Request(url)
+    if entrada is not None:
+        if entrada.get("etag"):
+            pedido.add_header("If-None-Match", entrada["etag"])
+        if entrada.get("last_modified"):
+            pedido.add_header("If-Modified-Since", entrada["last_modified"])
+    try:
+        with urllib.request.urlopen(pedido, timeout=timeout) as resposta:
+            corpo = resposta.read()
+            return resposta.status, corpo, resposta.headers.get("ETag"), resposta.headers.get("Last-Modified")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 304, None, None, None
+        raise
+
+
+def tipar_base_de_dados(base_dados):
+    """Remove linhas incompletas, converte para os tipos compactos e redefine o índice."""
+    base_dados = base_dados.dropna()
+    tipos = {c: "int8" for c in COLUNAS_GOLOS if c in base_dados.columns}
+    tipos.update({c: "float32" for c in COLUNAS_ODDS if c in base_dados.columns})
+    tipos.update({c: "category" for c in COLUNAS_CATEGORICAS if c in base_dados.columns})
+    base_dados = base_dados.astype(tipos)
+    if "Date" in base_dados.columns:
+        base_dados["Date"] = pd.to_datetime(base_dados["Date"])
+    base_dados = base_dados.reset_index(drop=True)
+    base_dados.index += 1
+    return base_dados
+
+
+@medido("parse_csv")
+def _parse_base_de_dados(corpo):
+    """Converte o CSV descarregado no DataFrame tipado com as colunas selecionadas."""
+    return tipar_base_de_dados(ler_csv(corpo, "historico"))
+
+
+def gravar_snapshot(base_dados, caminho, tamanho_row_group=100_000):
+    """Grava a base de dados tipada num ficheiro Parquet."""
+    base_dados.to_parquet(caminho, engine="pyarrow", index=False, row_group_size=tamanho_row_group)
+
+
+def ler_snapshot(caminho, colunas=None):
+    """Lê o snapshot Parquet, lendo do disco apenas as colunas pedidas."""
+    base_dados = pd.read_parquet(caminho, engine="pyarrow", columns=colunas)
+    base_dados.index += 1
+    return base_dados
+
+
+def gravar_partilhado(base_dados, caminho):
+    """Grava a base de dados tipada num ficheiro Arrow IPC sem compressão, pronto a ser mapeado em memória.
+
+    Cada coluna fica num só bloco contíguo, para que mapear_partilhado não tenha de juntar pedaços.
+    O ficheiro é substituído de forma atómica: quem já o tinha mapeado continua a ver a versão anterior.
+    """
+    tabela = pa.Table.from_pandas(base_dados, preserve_index=False).combine_chunks()
+    with pa.OSFile(caminho + ".tmp", "wb") as f, pa.ipc.new_file(f, tabela.schema) as escritor:
+        escritor.write_table(tabela, max_chunksize=max(len(tabela), 1))
+    os.replace(caminho + ".tmp", caminho)
+
+
+def mapear_partilhado(caminho):
+    """Mapeia em memória o ficheiro de gravar_partilhado e devolve um DataFrame sem copiar os dados.
+
+    As colunas são vistas só de leitura sobre o ficheiro: todas as sessões e processos que o
+    mapeiam partilham as mesmas páginas (da cache do sistema operativo) em vez de terem cada
+    um a sua cópia. Filtros e seleções devolvem cópias só das linhas escolhidas.
+
+    Nenhuma coluna é copiada: as de texto ficam em arrays Arrow (large_string) sobre o ficheiro
+    e as categóricas usam os índices do dicionário como códigos (só as categorias são lidas).
+    Para ler os textos sem cópia usa-se serie.array.__arrow_array__(); pa.array(serie.array)
+    converte-os para string e copia-os.
+    """
+    tabela = pa.ipc.open_file(pa.memory_map(caminho)).read_all()
+    base_dados = tabela.to_pandas(split_blocks=True)
+    base_dados.index += 1
+    return base_dados
+
+
+def converter_csv_para_snapshot(origem, destino, tamanho_row_group=100_000):
+    """Converte o CSV da base de dados (caminho ou URL) num snapshot Parquet tipado."""
+    if "://" in origem:
+        with urllib.request.urlopen(origem) as resposta:
+            origem = resposta.read()
+    base_dados = tipar_base_de_dados(ler_csv(origem, "historico"))
+    gravar_snapshot(base_dados, destino, tamanho_row_group)
+    return base_dados
+
+
+def carregar_base_de_dados(url=URL_BASE_DE_DADOS, cache_dir=CACHE_DIR, intervalo=INTERVALO_REVALIDACAO, timeout=30):
+    """Carrega a base de dados usando a cache em memória, o snapshot em disco e pedidos condicionais.
+
+    O ficheiro só volta a ser interpretado quando o conteúdo no servidor muda.
+    O DataFrame devolvido é partilhado entre chamadas e não deve ser alterado; sempre que
+    há disco, as suas colunas são vistas sobre o ficheiro Arrow mapeado em memória.
+
+    O pedido ao servidor e o parse são feitos fora do lock global: só uma chamada por URL
+    revalida de cada vez e, enquanto isso, as outras recebem a cópia que já está em memória.
+    """
+    with _lock:
+        entrada = _memo.get(url)
+        if entrada is not None and time.time() - entrada["verificado_em"] < intervalo:
+            cache_stats["hits"] += 1
+            return entrada["df"]
+        pedido = _pedidos.setdefault(url, threading.Lock())
+
+    # Sem cópia em memória é preciso esperar pelo pedido em curso; com cópia, serve-se essa
+    if not pedido.acquire(blocking=entrada is None):
+        with _lock:
+            cache_stats["concorrentes"] += 1
+        return entrada["df"]
+    try:
+        with _lock:
+            entrada = _memo.get(url)
+            if entrada is not None and time.time() - entrada["verificado_em"] < intervalo:
+                cache_stats["hits"] += 1
+                return entrada["df"]
+        return _revalidar(url, cache_dir, entrada, timeout)
+    finally:
+        pedido.release()
+
+
+def _revalidar(url, cache_dir, entrada, timeout):
+    """Pedido condicional e, se o conteúdo mudou, parse e snapshot; o lock global só protege a troca da entrada."""
+    if entrada is None:
+        entrada = _ler_snapshot(url, cache_dir)
+        if entrada is not None:
+            with _lock:
+                cache_stats["disco"] += 1
+                _memo[url] = entrada
+
+    agora = time.time()
+    try:
+        status, corpo, etag, last_modified = _pedido_condicional(url, entrada, timeout)
+    except (urllib.error.URLError, OSError):
+        if entrada is None:
+            raise
+        with _lock:
+            cache_stats["obsoletos"] += 1
+            _memo[url] = dict(entrada, verificado_em=agora)
+        return entrada["df"]
+
+    if status == 304:
+        with _lock:
+            cache_stats["revalidacoes"] += 1
+            _memo[url] = dict(entrada, verificado_em=agora)
+        return entrada["df"]
+
+    versao = hashlib.sha1(corpo).hexdigest()[:16]
+    if entrada is not None and entrada["versao"] == versao:
+        # Servidor sem validadores (ou que os ignora), mas o conteúdo não mudou
+        with _lock:
+            cache_stats["revalidacoes"] += 1
+            _memo[url] = dict(entrada, etag=etag, last_modified=last_modified, verificado_em=agora)
+        return entrada["df"]
+
+    entrada = {
+        "df": _parse_base_de_dados(corpo),
+        "etag": etag,
+        "last_modified": last_modified,
+        "versao": versao,
+        "verificado_em": agora,
+    }
+    try:
+        _gravar_snapshot(url, cache_dir, entrada)
+        # A cópia interpretada dá lugar às vistas sobre o ficheiro partilhado com os outros processos
+        entrada["df"] = mapear_partilhado(_caminhos_snapshot(url, cache_dir)[2])
+    except OSError:
+        pass  # Sem disco disponível a cache em memória continua a funcionar
+    with _lock:
+        cache_stats["misses"] += 1
+        _memo[url] = entrada
+    return entrada["df"]
+
+
+def versao_base_de_dados(url=URL_BASE_DE_DADOS):
+    """Devolve o identificador da versão da base de dados atualmente em memória (ou None)."""
+    entrada = _memo.get(url)
+    return entrada["versao"] if entrada is not None else None
+
+
+def base_de_dados_em_memoria(url=URL_BASE_DE_DADOS):
+    """Devolve (base de dados, versão) atualmente em memória, ou (None, None), sem pedidos nem leituras do disco."""
+    entrada = _memo.get(url)
+    return (entrada["df"], entrada["versao"]) if entrada is not None else (None, None)
+
+
+def limpar_cache():
+    """Esvazia a cache em memória e repõe os contadores (o snapshot em disco é mantido)."""
+    with _lock:
+        _memo.clear()
+        for chave in cache_stats:
+            cache_stats[chave] = 0
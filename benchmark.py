@@ -0,0 +1,1026 @@
+"""Benchmarks do Fluffy Chips Dashboard.
+
+Uso:
+    python benchmark.py snapshot --linhas 500000
+    python benchmark.py indice --linhas 3000000
+    python benchmark.py incremental --linhas 1000000 --novos 300
+    python benchmark.py backtest --linhas 200000 --processos 4
+    python benchmark.py multidia --dias 30 --latencia 0.2
+    python benchmark.py tabelas --jogos 500
+    python benchmark.py semelhantes --linhas 1000000 --jogos 300
+    python benchmark.py golos --linhas 1000000 --jogos 300
+    python benchmark.py features --linhas 60000 --dias 7
+    python benchmark.py historico --linhas 1000000
+    python benchmark.py pushdown --linhas 1000000 --jogos 100
+    python benchmark.py csv --linhas 1000000 --jogos 5000
+    python benchmark.py partilhado --linhas 1000000 --sessoes 1 4 12
+    python benchmark.py resultados --jogos 1000 --reruns 200
+    python benchmark.py limites --jogos 300000
+    python benchmark.py modelo --linhas 300000 --jogos 300
+    python benchmark.py banca --caminhos 1000000 --apostas 500 --processos 1 4
+    python benchmark.py suite --linhas 200000 --limites limites.json --guardar resultados.json
+    python benchmark.py suite --referencia resultados.json --tolerancia 0.25
+
+A suite corre sem rede: os ficheiros sintéticos são servidos por um servidor HTTP local.
+O ficheiro de limites associa a cada etapa {"tempo_s": ..., "memoria_mb": ...}.
+"""
+import argparse
+import contextlib
+import http.server
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from base_de_dados import (
+    COLUNAS_SELECIONADAS, converter_csv_para_snapshot, gravar_partilhado, gravar_snapshot, ler_snapshot,
+    mapear_partilhado, tipar_base_de_dados,
+)
+from agregados import AgregadosEquipas
+from backtest import backtest, varrer_grade
+from esquemas import TIPOS_LEITURA, ler_csv
+from estrategias import LAY_0X1
+from indice_equipas import LOCAIS, IndiceEquipas
+from odds_semelhantes import OddsSemelhantes
+from golos_minutos import MinutosGolos
+from features import FeaturesEquipas, construir_features
+from historico import HistoricoParticionado
+from jogos_do_dia import COLUNAS_FLASHSCORE, carregar_intervalo, nome_ficheiro
+from placares import JANELAS
+from dados_sinteticos import gerar_base_sintetica, gerar_jogos_sinteticos, verificar_agregados
+
+
+@contextlib.contextmanager
+def servidor_local(ficheiros, latencia=0.0):
+    """Servidor HTTP local que serve {nome: bytes} com uma latência artificial. Produz o URL base."""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latencia)
+            corpo = ficheiros.get(self.path.lstrip("/"))
+            if corpo is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+    servidor = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{servidor.server_port}/"
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+@contextlib.contextmanager
+def variaveis_ambiente(ambiente):
+    """Define as variáveis de ambiente {nome: valor} e repõe os valores anteriores no fim."""
+    anterior = {chave: os.environ.get(chave) for chave in ambiente}
+    os.environ.update(ambiente)
+    try:
+        yield
+    finally:
+        for chave, valor in anterior.items():
+            if valor is None:
+                os.environ.pop(chave, None)
+            else:
+                os.environ[chave] = valor
+
+
+def _processo_novo(funcao, *args):
+    """Resultado de funcao(*args) corrida num processo novo (spawn), que importa os módulos de novo."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(funcao, *args).result()
+
+
+def _rss_mb():
+    """Pico de memória residente do processo atual, em MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rss_atual_mb():
+    """Memória residente atual do processo, em MB (pico do processo se /proc não existir)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return _rss_mb()
+
+
+@contextlib.contextmanager
+def pico_memoria(intervalo=0.002):
+    """Amostra o RSS numa thread; no fim, estado["mb"] tem o pico acima do valor inicial."""
+    inicial = _rss_atual_mb()
+    estado = {"max": inicial, "mb": 0.0}
+    parar = threading.Event()
+
+    def amostrar():
+        while not parar.wait(intervalo):
+            estado["max"] = max(estado["max"], _rss_atual_mb())
+
+    thread = threading.Thread(target=amostrar, daemon=True)
+    thread.start()
+    try:
+        yield estado
+    finally:
+        parar.set()
+        thread.join()
+        estado["mb"] = max(estado["max"], _rss_atual_mb()) - inicial
+
+
+def _medir_leitura_csv(caminho):
+    """Caminho atual: pd.read_csv de todas as colunas e seleção posterior."""
+    rss_antes, inicio = _rss_mb(), time.perf_counter()
+    base_dados = pd.read_csv(caminho)
+    base_dados = base_dados[COLUNAS_SELECIONADAS].dropna()
+    return time.perf_counter() - inicio, _rss_mb() - rss_antes, base_dados.memory_usage(deep=True).sum() / 2**20
+
+
+def _medir_leitura_snapshot(caminho, colunas=None):
+    """Snapshot Parquet tipado, com projeção de colunas."""
+    rss_antes, inicio = _rss_mb(), time.perf_counter()
+    base_dados = ler_snapshot(caminho, colunas)
+    return time.perf_counter() - inicio, _rss_mb() - rss_antes, base_dados.memory_usage(deep=True).sum() / 2**20
+
+
+def bench_snapshot(n_linhas):
+    """Compara tempo de leitura e memória do CSV contra o snapshot Parquet."""
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_csv = os.path.join(pasta, "base.csv")
+        caminho_snapshot = os.path.join(pasta, "base.parquet")
+        gerar_base_sintetica(n_linhas).to_csv(caminho_csv, index=False)
+
+        inicio = time.perf_counter()
+        converter_csv_para_snapshot(caminho_csv, caminho_snapshot)
+        tempo_conversao = time.perf_counter() - inicio
+
+        casos = [
+            ("read_csv (atual)", _medir_leitura_csv, (caminho_csv,)),
+            ("parquet (24 colunas)", _medir_leitura_snapshot, (caminho_snapshot,)),
+            ("parquet (Date/Home/Away/FT)", _medir_leitura_snapshot,
+             (caminho_snapshot, ["Date", "Home", "Away", "FT_Goals_H", "FT_Goals_A"])),
+        ]
+        print(f"Linhas: {n_linhas}  CSV: {os.path.getsize(caminho_csv) / 2**20:.1f} MB  "
+              f"Parquet: {os.path.getsize(caminho_snapshot) / 2**20:.1f} MB  Conversão: {tempo_conversao:.2f}s")
+        print(f"{'Caminho':<30}{'Tempo (s)':>12}{'RSS (MB)':>12}{'DataFrame (MB)':>16}")
+        for nome, funcao, argumentos in casos:
+            # Cada medição corre num processo novo para que o pico de RSS seja comparável
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                tempo, rss, memoria = executor.submit(funcao, *argumentos).result()
+            print(f"{nome:<30}{tempo:>12.3f}{rss:>12.1f}{memoria:>16.1f}")
+
+
+def bench_indice(n_linhas, n_consultas=200):
+    """Compara varrimento + ordenação por equipa contra o índice (equipa, local)."""
+    base_dados = tipar_base_de_dados(gerar_base_sintetica(n_linhas, n_colunas_extra=0))
+    rng = np.random.default_rng(1)
+    equipas = rng.choice(base_dados["Home"].cat.categories, n_consultas)
+
+    inicio = time.perf_counter()
+    indice = IndiceEquipas(base_dados)
+    tempo_construcao = time.perf_counter() - inicio
+
+    def varrimento(team, n):
+        return base_dados[base_dados["Home"] == team].sort_values(by="Date", ascending=False).head(n)
+
+    print(f"Linhas: {n_linhas}  Consultas: {n_consultas}  Construção do índice: {tempo_construcao:.3f}s")
+    print(f"{'Janela':<12}{'Varrimento (ms)':>18}{'Índice (ms)':>14}{'Speedup':>10}")
+    for n in (114, 76):
+        inicio = time.perf_counter()
+        esperados = [varrimento(team, n) for team in equipas]
+        tempo_varrimento = (time.perf_counter() - inicio) / n_consultas
+        inicio = time.perf_counter()
+        obtidos = [indice.jogos(team, "Home", n) for team in equipas]
+        tempo_indice = (time.perf_counter() - inicio) / n_consultas
+        for esperado, obtido in zip(esperados, obtidos):
+            assert esperado["Date"].tolist() == obtido["Date"].tolist()
+        print(f"{'last ' + str(n):<12}{tempo_varrimento * 1e3:>18.2f}{tempo_indice * 1e3:>14.3f}"
+              f"{tempo_varrimento / tempo_indice:>10.0f}x")
+
+
+def bench_incremental(n_linhas, n_novos):
+    """Mede a aplicação de um dia de resultados como delta contra o recálculo completo."""
+    base_dados = tipar_base_de_dados(gerar_base_sintetica(n_linhas, n_colunas_extra=0))
+    # Os jogos novos são sorteados ao longo de toda a história para exercitar as retiradas fora de ordem
+    rng = np.random.default_rng(2)
+    novos = np.zeros(len(base_dados), dtype=bool)
+    novos[rng.choice(len(base_dados), n_novos, replace=False)] = True
+    antiga, delta = base_dados[~novos], base_dados[novos]
+    completa = pd.concat([antiga, delta], ignore_index=True)
+
+    agregados = AgregadosEquipas(antiga)
+    inicio = time.perf_counter()
+    agregados.aplicar(delta)
+    tempo_delta = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    recalculo = AgregadosEquipas(completa)
+    tempo_completo = time.perf_counter() - inicio
+
+    temporadas = sorted(completa["Season"].astype(str).unique())[-2:]
+    verificar_agregados(agregados, recalculo, temporadas)
+    print(f"Linhas: {n_linhas}  Jogos novos: {n_novos}")
+    print(f"Delta: {tempo_delta * 1e3:.1f} ms  Recálculo completo: {tempo_completo * 1e3:.1f} ms  Consistência: OK")
+
+
+def bench_backtest(n_linhas, processos):
+    """Mede a varredura de limites do Lay 0 x 1 em combinações por segundo."""
+    jogos = gerar_jogos_sinteticos(n_linhas)
+    grade = {
+        "Porc_Score_Min_1G_Home": list(range(60, 100, 5)),
+        "Porc_Took_Min_1G_Away": list(range(50, 100, 5)),
+        "Media_CGM_Home_01": [1, 1.5, 2, 2.5, 3],
+        "Media_CGM_Home_02": [0.5, 0.6, 0.7, 0.8, 0.9],
+        ("FT_Odd_H", "<="): [1.8, 2.0, 2.2, 2.5, 3.0],
+    }
+    inicio = time.perf_counter()
+    metricas_base = backtest(jogos, LAY_0X1)
+    tempo_backtest = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    tabela = varrer_grade(jogos, LAY_0X1, grade, processos=processos, min_apostas=0)
+    tempo = time.perf_counter() - inicio
+    print(f"Jogos: {n_linhas}  Backtest único: {tempo_backtest * 1e3:.1f} ms  {metricas_base}")
+    print(f"Combinações: {len(tabela)}  Processos: {processos}  Tempo: {tempo:.2f}s  "
+          f"Throughput: {len(tabela) / tempo:.0f} combinações/s")
+    print(tabela.head(5).to_string())
+
+
+def bench_multidia(n_dias, latencia, max_paralelo=8, jogos_por_dia=300):
+    """Carregamento de vários dias: sequencial vs paralelo vs cache local, contra um servidor com latência."""
+    fim = date.today() - timedelta(days=1)
+    inicio = fim - timedelta(days=n_dias - 1)
+    jogos = gerar_jogos_sinteticos(jogos_por_dia)
+    ficheiros = {
+        nome_ficheiro(inicio + timedelta(days=i)): jogos.to_csv(index=False).encode()
+        for i in range(n_dias) if i % 7 != 3  # um dia por semana sem ficheiro
+    }
+    with servidor_local(ficheiros, latencia) as url, tempfile.TemporaryDirectory() as pasta:
+        print(f"Dias: {n_dias}  Latência: {latencia * 1e3:.0f} ms  Ficheiros: {len(ficheiros)}")
+        casos = [
+            ("sequencial", 1, os.path.join(pasta, "a")),
+            (f"paralelo ({max_paralelo})", max_paralelo, os.path.join(pasta, "b")),
+            ("cache local", max_paralelo, os.path.join(pasta, "b")),
+        ]
+        for nome, paralelo, cache_dir in casos:
+            inicio_medicao = time.perf_counter()
+            resultado = carregar_intervalo(inicio, fim, base_url=url, cache_dir=cache_dir, max_paralelo=paralelo)
+            tempo = time.perf_counter() - inicio_medicao
+            print(f"{nome:<16}{tempo:>8.2f}s  linhas: {len(resultado)}  "
+                  f"dias em falta: {len(resultado.attrs['dias_em_falta'])}")
+
+
+def _medir_tabela(df, repeticoes=5):
+    """Tempo de preparação (opções da grelha e serialização) e bytes enviados de uma tabela."""
+    from tabelas import opcoes_grelha, tamanho_payload
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        tamanho = tamanho_payload(df, opcoes_grelha(df))
+    return (time.perf_counter() - inicio) / repeticoes, tamanho
+
+
+def bench_tabelas(n_jogos):
+    """Tabela completa (antes) vs página com as colunas por omissão (depois)."""
+    from tabelas import TAMANHO_PAGINA, colunas_padrao, paginar
+
+    base = gerar_base_sintetica(20_000)
+    casa = base["Home"].iloc[0]
+    tabelas = {
+        "jogos do dia": gerar_jogos_sinteticos(n_jogos),
+        "h2h / histórico": base[base["Home"] == casa],
+    }
+    print(f"Página: {TAMANHO_PAGINA} linhas (o tempo não inclui o layout no browser)")
+    for nome, df in tabelas.items():
+        tempo_antes, bytes_antes = _medir_tabela(df)
+        tempo_depois, bytes_depois = _medir_tabela(paginar(df, 1, TAMANHO_PAGINA, colunas_padrao(df)))
+        print(f"{nome:<18}{len(df):>5} x {df.shape[1]:<4}antes: {bytes_antes / 1024:>8.1f} KB {tempo_antes * 1e3:>7.1f} ms  "
+              f"depois: {bytes_depois / 1024:>7.1f} KB {tempo_depois * 1e3:>6.1f} ms  "
+              f"({bytes_antes / bytes_depois:.0f}x menos bytes)")
+
+
+def bench_semelhantes(n_linhas, n_jogos, k=50):
+    """Caixa de ±0.10 em FT_Odd_H/FT_Odd_A jogo a jogo (atual) vs consulta k-NN em lote sobre todas as odds."""
+    base_dados = tipar_base_de_dados(gerar_base_sintetica(n_linhas)[COLUNAS_SELECIONADAS])
+    jogos = gerar_jogos_sinteticos(n_jogos, seed=1)
+
+    inicio = time.perf_counter()
+    encontrados = []
+    for _, row in jogos.iterrows():
+        encontrados.append(len(base_dados[
+            (base_dados["Home"] == row["Home"]) & (base_dados["Away"] == row["Away"])
+            & base_dados["FT_Odd_H"].between(row["FT_Odd_H"] - 0.10, row["FT_Odd_H"] + 0.10)
+            & base_dados["FT_Odd_A"].between(row["FT_Odd_A"] - 0.10, row["FT_Odd_A"] + 0.10)
+        ]))
+    tempo_caixa = time.perf_counter() - inicio
+
+    # A árvore é construída na primeira consulta; a segunda mede só a consulta
+    inicio = time.perf_counter()
+    indice = OddsSemelhantes(base_dados)
+    indice.consultar(jogos, k=k)
+    tempo_construcao = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    vizinhos = indice.consultar(jogos, k=k)
+    tempo_knn = time.perf_counter() - inicio
+
+    print(f"Linhas: {n_linhas}  Jogos do dia: {n_jogos}")
+    print(f"Caixa ±0.10 (atual):  {tempo_caixa:.2f}s  jogos sem resultado: "
+          f"{encontrados.count(0)}/{n_jogos}  média encontrada: {np.mean(encontrados):.2f}")
+    print(f"k-NN (k={k}):          construção e 1.ª consulta {tempo_construcao:.2f}s (uma vez por versão)  consulta {tempo_knn * 1e3:.1f} ms  "
+          f"jogos sem resultado: {int((vizinhos.resumo['Vizinhos'] == 0).sum())}/{n_jogos}")
+
+
+def bench_golos(n_linhas, n_jogos, minuto=45):
+    """Análise dos textos Goals_Minutes e estatísticas de tempo dos golos para todas as equipas do dia."""
+    base_dados = tipar_base_de_dados(gerar_base_sintetica(n_linhas)[COLUNAS_SELECIONADAS])
+    jogos = gerar_jogos_sinteticos(n_jogos, seed=1)
+
+    inicio = time.perf_counter()
+    minutos_golos = MinutosGolos(base_dados)
+    tempo_parse = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    tabelas = {
+        local: pd.concat([minutos_golos.primeiro_golo(local), minutos_golos.golos_por_intervalo(local),
+                          minutos_golos.prob_golo(minuto, local)], axis=1).reindex(jogos[local].unique())
+        for local in LOCAIS
+    }
+    tempo_estatisticas = time.perf_counter() - inicio
+
+    golos = sum(len(r.minutos) for r in minutos_golos.golos.values())
+    memoria = sum(r.offsets.nbytes + r.minutos.nbytes for r in minutos_golos.golos.values()) / 2**20
+    print(f"Linhas: {n_linhas}  Golos: {golos}  Estrutura: {memoria:.1f} MB  "
+          f"Texto original: {base_dados[['Goals_Minutes_Home', 'Goals_Minutes_Away']].memory_usage(deep=True).sum() / 2**20:.1f} MB")
+    print(f"Análise dos textos (uma vez por versão): {tempo_parse:.2f}s")
+    print(f"Estatísticas para as {sum(len(t) for t in tabelas.values())} equipas/locais do dia: {tempo_estatisticas * 1e3:.0f} ms")
+
+
+def bench_features(n_linhas, n_dias):
+    """Features do histórico completo vs janelas incrementais nos últimos dias, com verificação de igualdade."""
+    base_dados = tipar_base_de_dados(gerar_base_sintetica(n_linhas)[COLUNAS_SELECIONADAS])
+    datas = base_dados["Date"]
+    dias = np.sort(datas.unique())[-n_dias:]
+
+    inicio = time.perf_counter()
+    completo = construir_features(base_dados)
+    tempo_completo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    incremental = FeaturesEquipas(base_dados[datas < dias[0]])
+    tempo_inicial = time.perf_counter() - inicio
+    tempos, diferentes, total = [], 0, 0
+    for dia in dias:
+        jogos = base_dados[datas == dia]
+        inicio = time.perf_counter()
+        features = incremental.features(jogos)
+        incremental.aplicar(jogos)
+        tempos.append(time.perf_counter() - inicio)
+        iguais = np.isclose(features.to_numpy(), completo.loc[jogos.index].to_numpy(), rtol=1e-6, equal_nan=True)
+        diferentes += int((~iguais).sum())
+        total += iguais.size
+
+    print(f"Linhas: {n_linhas}  Colunas de features: {completo.shape[1]}")
+    print(f"Histórico completo: {tempo_completo:.2f}s  ({n_linhas / tempo_completo:,.0f} jogos/s)")
+    print(f"Janelas incrementais: {tempo_inicial:.2f}s a construir, "
+          f"{np.mean(tempos) * 1e3:.1f} ms por dia (features + aplicar, {n_dias} dias)")
+    print(f"Valores diferentes entre incremental e completo: {diferentes} de {total}")
+
+
+def _ficheiros_parquet(pasta):
+    """{caminho: mtime} de todos os ficheiros Parquet da pasta."""
+    return {
+        os.path.join(raiz, f): os.stat(os.path.join(raiz, f)).st_mtime_ns
+        for raiz, _, ficheiros in os.walk(pasta) for f in ficheiros if f.endswith(".parquet")
+    }
+
+
+def bench_historico(n_linhas):
+    """Importação do histórico particionado e ingestão de um dia de resultados."""
+    base_dados = gerar_base_sintetica(n_linhas)
+    datas = pd.to_datetime(base_dados["Date"])
+    ultimo_dia = datas.max()
+    with tempfile.TemporaryDirectory() as pasta:
+        historico = HistoricoParticionado(pasta)
+        inicio = time.perf_counter()
+        historico.ingerir(base_dados[datas < ultimo_dia])
+        tempo_importacao = time.perf_counter() - inicio
+        antes = _ficheiros_parquet(pasta)
+
+        inicio = time.perf_counter()
+        novos = historico.ingerir(base_dados[datas == ultimo_dia])
+        tempo_dia = time.perf_counter() - inicio
+        depois = _ficheiros_parquet(pasta)
+        repetidos = historico.ingerir(base_dados[datas == ultimo_dia])
+
+        inicio = time.perf_counter()
+        lido = historico.ler()
+        tempo_leitura = time.perf_counter() - inicio
+        particoes = len(historico.particoes())
+
+    alterados = sum(depois[c] != m for c, m in antes.items())
+    print(f"Linhas: {n_linhas}  Partições: {particoes}  Ficheiros antes do dia: {len(antes)}")
+    print(f"Importação inicial: {tempo_importacao:.2f}s  Leitura completa: {tempo_leitura:.2f}s ({len(lido)} jogos)")
+    print(f"Ingestão de um dia: {tempo_dia * 1e3:.0f} ms, {sum(novos.values())} jogos em {len(novos)} partições")
+    print(f"Ficheiros novos: {len(depois) - len(antes)}  Ficheiros existentes alterados: {alterados}  "
+          f"Jogos repetidos aceites na 2.ª ingestão: {sum(repetidos.values())}")
+
+
+def bench_pushdown(n_linhas, n_jogos, n_ligas=150):
+    """Histórico completo vs só as equipas dos jogos do dia: tempo, pico de RSS e agregados iguais.
+
+    Mede também, em processos novos, o histórico das equipas do dia como a página o obtém:
+    a base completa filtrada em memória vs carregar_historico_equipas.
+    """
+    base_dados = gerar_base_sintetica(n_linhas, n_ligas=n_ligas, n_colunas_extra=0)
+    datas = pd.to_datetime(base_dados["Date"])
+    jogos = base_dados[datas == datas.max()].head(n_jogos)
+    base_csv = base_dados.to_csv(index=False).encode()
+    with tempfile.TemporaryDirectory() as pasta:
+        historico = HistoricoParticionado(pasta)
+        historico.ingerir(base_dados)
+        del base_dados
+
+        with pico_memoria() as memoria_fatia:
+            inicio = time.perf_counter()
+            fatia = historico.ler(equipas=set(jogos["Home"]) | set(jogos["Away"]))
+            agregados_fatia = AgregadosEquipas(fatia)
+            tempo_fatia = time.perf_counter() - inicio
+        ficheiros_fatia = len(historico.ficheiros(equipas=set(jogos["Home"]) | set(jogos["Away"])))
+
+        with pico_memoria() as memoria_completo:
+            inicio = time.perf_counter()
+            completo = historico.ler()
+            agregados_completo = AgregadosEquipas(completo)
+            tempo_completo = time.perf_counter() - inicio
+        ficheiros_completo = len(historico.ficheiros())
+
+    iguais = all(
+        agregados_fatia.mercados(equipa, local, janela) == agregados_completo.mercados(equipa, local, janela)
+        for local in LOCAIS for equipa in jogos[local].astype(str) for janela in JANELAS
+    )
+    print(f"Histórico: {len(completo)} jogos em {ficheiros_completo} ficheiros  Jogos do dia: {len(jogos)}")
+    print(f"Completo: {tempo_completo:.2f}s  pico {memoria_completo['mb']:.0f} MB  ({ficheiros_completo} ficheiros)")
+    print(f"Equipas do dia: {tempo_fatia:.2f}s  pico {memoria_fatia['mb']:.0f} MB  "
+          f"({ficheiros_fatia} ficheiros, {len(fatia)} jogos)")
+    print(f"Agregados das equipas do dia iguais: {iguais}")
+
+    # Ponta a ponta, cada uma num processo novo: a página antes (base completa) e agora (fatia)
+    with servidor_local({"base_de_dados.csv": base_csv}) as url, tempfile.TemporaryDirectory() as pasta:
+        with variaveis_ambiente({"FLUFFY_URL_BASE_DE_DADOS": url + "base_de_dados.csv", "FLUFFY_CACHE_DIR": pasta}):
+            _processo_novo(_preparar_historico)
+            for modo, nome in [("completo", "carregar_base_de_dados + filtro"), ("equipas", "carregar_historico_equipas")]:
+                tempo, memoria, linhas = _processo_novo(_historico_da_pagina, modo, jogos)
+                print(f"Processo novo, {nome}: {tempo:.2f}s  pico {memoria:.0f} MB  ({linhas} jogos)")
+
+
+def _historico_da_pagina(modo, jogos):
+    """Num processo novo: o histórico das equipas de 'jogos' como a página o obtém. Devolve (tempo, pico MB, linhas).
+
+    "completo" carrega a base de dados inteira (snapshot + pedido ao servidor) e filtra as
+    equipas em memória; "equipas" usa carregar_historico_equipas com o histórico já criado.
+    """
+    import base_de_dados
+    import historico
+
+    equipas = set(jogos["Home"]) | set(jogos["Away"])
+    with pico_memoria() as memoria:
+        inicio = time.perf_counter()
+        if modo == "completo":
+            base_dados = base_de_dados.carregar_base_de_dados()
+            base_dados = base_dados[base_dados["Home"].isin(equipas) | base_dados["Away"].isin(equipas)]
+        else:
+            base_dados = historico.carregar_historico_equipas(jogos)
+        tempo = time.perf_counter() - inicio
+    return tempo, memoria["mb"], len(base_dados)
+
+
+def _preparar_historico():
+    """Num processo novo: snapshot da base de dados e histórico particionado, como depois de um 'python historico.py'."""
+    import historico
+
+    return sum(historico.atualizar_historico().values())
+
+
+def _medir_parse(funcao, repeticoes=3):
+    """Melhor tempo de várias leituras e o DataFrame resultante."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def bench_csv(n_linhas, n_jogos):
+    """pd.read_csv com inferência de tipos vs pyarrow com os tipos do esquema, no histórico e nos ficheiros diários."""
+    historico = gerar_base_sintetica(n_linhas).to_csv(index=False).encode()
+    diario = gerar_jogos_sinteticos(n_jogos).to_csv(index=False).encode()
+    casos = [
+        ("historico (colunas selecionadas)", historico,
+         lambda: pd.read_csv(io.BytesIO(historico), usecols=COLUNAS_SELECIONADAS, dtype=TIPOS_LEITURA),
+         lambda: ler_csv(historico, "historico")),
+        ("historico (inferência de todas)", historico,
+         lambda: pd.read_csv(io.BytesIO(historico)), lambda: ler_csv(historico, "historico")),
+        ("df_jogos_do_dia", diario, lambda: pd.read_csv(io.BytesIO(diario)), lambda: ler_csv(diario, "df_jogos_do_dia")),
+        ("jogos_flashscore", diario,
+         lambda: pd.read_csv(io.BytesIO(diario))[COLUNAS_FLASHSCORE], lambda: ler_csv(diario, "jogos_flashscore")),
+    ]
+    print(f"{'ficheiro':<36}{'MB':>8}{'pandas':>10}{'esquema':>10}{'ganho':>8}")
+    for nome, corpo, atual, esquema in casos:
+        tempo_atual, _ = _medir_parse(atual)
+        tempo_esquema, _ = _medir_parse(esquema)
+        print(f"{nome:<36}{len(corpo) / 2**20:>8.1f}{tempo_atual:>9.3f}s{tempo_esquema:>9.3f}s"
+              f"{tempo_atual / tempo_esquema:>7.1f}x")
+
+
+def _pss_mb(pid="self"):
+    """Memória proporcional (PSS) de um processo, em MB: as páginas partilhadas são divididas por quem as usa."""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        return next(int(linha.split()[1]) for linha in f if linha.startswith("Pss:")) / 1024
+
+
+def _tocar(base_dados):
+    """Lê todos os bytes de todas as colunas, sem criar cópias, para que os dados fiquem residentes."""
+    total = 0
+    for coluna in base_dados.columns:
+        serie = base_dados[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            valores = [serie.cat.codes.to_numpy()]
+        elif pd.api.types.is_string_dtype(serie.dtype):
+            # __arrow_array__ devolve o large_string mapeado; pa.array(...) convertê-lo-ia para string (cópia)
+            dados = serie.array.__arrow_array__()
+            pedacos = dados.chunks if isinstance(dados, pa.ChunkedArray) else [dados]
+            valores = [np.frombuffer(buffer, dtype=np.uint8) for pedaco in pedacos for buffer in pedaco.buffers() if buffer]
+        else:
+            valores = [serie.to_numpy().view(np.uint8)]
+        total += sum(int(v.sum()) for v in valores)
+    return total
+
+
+def _sessao(caminhos, modo, fila, carregar, sair):
+    """Uma sessão simulada: carrega a base de dados (mapeada ou lida para memória própria) e espera."""
+    # Aquecimento com poucas linhas: os módulos carregados na primeira utilização não contam como dados
+    _tocar(mapear_partilhado(caminhos["partilhado"]).head(1000))
+    fila.put(os.getpid())
+    carregar.wait()
+    base_dados = mapear_partilhado(caminhos[modo]) if modo == "partilhado" else ler_snapshot(caminhos[modo])
+    _tocar(base_dados)
+    fila.put(os.getpid())
+    sair.wait()
+
+
+def _memoria_sessoes(caminhos, modo, n_sessoes):
+    """PSS acrescentado pela base de dados em n_sessoes processos vivos ao mesmo tempo, em MB."""
+    contexto = multiprocessing.get_context("spawn")
+    fila, carregar, sair = contexto.Queue(), contexto.Event(), contexto.Event()
+    processos = [
+        contexto.Process(target=_sessao, args=(caminhos, modo, fila, carregar, sair)) for _ in range(n_sessoes)
+    ]
+    for processo in processos:
+        processo.start()
+    try:
+        # As duas medições são feitas com todas as sessões vivas, para que as bibliotecas
+        # partilhadas contem o mesmo antes e depois e só fique a memória dos dados
+        pids = [fila.get(timeout=120) for _ in processos]
+        antes = sum(_pss_mb(pid) for pid in pids)
+        carregar.set()
+        for _ in processos:
+            fila.get(timeout=600)
+        return sum(_pss_mb(pid) for pid in pids) - antes
+    finally:
+        sair.set()
+        for processo in processos:
+            processo.join()
+
+
+def bench_partilhado(n_linhas, sessoes, tolerancia=0.05):
+    """Memória de N sessões com a base de dados lida por cada uma vs mapeada do ficheiro Arrow partilhado.
+
+    Cada sessão é um processo que lê todas as colunas. Devolve False se, de menos para mais
+    sessões, a memória com o ficheiro partilhado crescer mais do que 'tolerancia' do
+    crescimento com uma cópia por sessão.
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        caminhos = {"parquet": os.path.join(pasta, "base.parquet"), "partilhado": os.path.join(pasta, "base.arrow")}
+        base_dados = tipar_base_de_dados(gerar_base_sintetica(n_linhas, n_colunas_extra=0)[COLUNAS_SELECIONADAS])
+        gravar_snapshot(base_dados, caminhos["parquet"])
+        gravar_partilhado(base_dados, caminhos["partilhado"])
+        del base_dados
+
+        print(f"Linhas: {n_linhas}  Ficheiro partilhado: {os.path.getsize(caminhos['partilhado']) / 2**20:.1f} MB")
+        print(f"{'Sessões':>8}{'cópia própria (MB)':>22}{'partilhado (MB)':>18}")
+        copia, partilhado = {}, {}
+        for n_sessoes in sessoes:
+            copia[n_sessoes] = _memoria_sessoes(caminhos, "parquet", n_sessoes)
+            partilhado[n_sessoes] = _memoria_sessoes(caminhos, "partilhado", n_sessoes)
+            print(f"{n_sessoes:>8}{copia[n_sessoes]:>22.1f}{partilhado[n_sessoes]:>18.1f}")
+
+    menos, mais = min(sessoes), max(sessoes)
+    crescimento_copia = copia[mais] - copia[menos]
+    crescimento = partilhado[mais] - partilhado[menos]
+    ok = crescimento <= tolerancia * crescimento_copia
+    print(f"De {menos} para {mais} sessões: cópia própria +{crescimento_copia:.1f} MB, partilhado +{crescimento:.1f} MB "
+          f"({'OK' if ok else 'FALHOU'}, limite {tolerancia * crescimento_copia:.1f} MB)")
+    return ok
+
+
+def bench_resultados(n_jogos, n_reruns):
+    """Reruns das páginas Lay: estratégias recalculadas em cada rerun vs cache de resultados."""
+    from cache_estrategias import CacheEstrategias
+    from estrategias import LAY_1X0, LAY_AWAY, LAY_HOME, Regra, aplicar_estrategias
+
+    dia = date(2024, 10, 1)
+    jogos = gerar_jogos_sinteticos(n_jogos)
+    jogos.attrs["impressao"] = "v1"
+    paginas = [[LAY_HOME, LAY_AWAY], [LAY_0X1, LAY_1X0]]
+    cache = CacheEstrategias()
+
+    inicio = time.perf_counter()
+    for _ in range(n_reruns):
+        sem_cache = [aplicar_estrategias(jogos, estrategias) for estrategias in paginas]
+    tempo_sem = (time.perf_counter() - inicio) / n_reruns
+    inicio = time.perf_counter()
+    for _ in range(n_reruns):
+        com_cache = [cache.obter(dia, jogos, estrategias) for estrategias in paginas]
+    tempo_com = (time.perf_counter() - inicio) / n_reruns
+    iguais = all(a[nome].equals(b[nome]) for a, b in zip(sem_cache, com_cache) for nome in a)
+    print(f"Jogos: {n_jogos}  Reruns: {n_reruns}")
+    print(f"Sem cache: {tempo_sem * 1e3:.2f} ms/rerun  Com cache: {tempo_com * 1e3:.3f} ms/rerun  "
+          f"({tempo_sem / tempo_com:.0f}x)  Tabelas iguais: {iguais}")
+
+    # Um limite editado e uma nova versão do ficheiro dão chaves novas
+    editada = LAY_HOME._replace(regras=LAY_HOME.regras[:-1] + [Regra('CV_CGM_Away_02', '<', 0.5)])
+    misses = cache.estatisticas()["misses"]
+    cache.obter(dia, jogos, [editada, LAY_AWAY])
+    limite_editado = cache.estatisticas()["misses"] - misses
+    novo_ficheiro = jogos.copy()
+    novo_ficheiro.attrs["impressao"] = "v2"
+    misses = cache.estatisticas()["misses"]
+    cache.obter(dia, novo_ficheiro, [LAY_HOME, LAY_AWAY])
+    print(f"Recalculadas após editar um limite do Lay Home: {limite_editado}  "
+          f"após uma nova versão do ficheiro: {cache.estatisticas()['misses'] - misses}")
+    estatisticas = cache.estatisticas()
+    print(f"Acertos: {estatisticas['taxa_acertos']:.1%} ({estatisticas['hits']}/{estatisticas['hits'] + estatisticas['misses']})"
+          f"  Entradas: {estatisticas['entradas']}")
+
+
+def bench_limites(n_jogos, n_movimentos=300, seed=0):
+    """Recontagem dos jogos a cada movimento de um slider: máscara completa vs índice de colunas ordenadas."""
+    from estrategias import LAY_HOME, OVER_15_FT, avaliar_estrategias
+    from indice_limites import IndiceLimites
+
+    rng = np.random.default_rng(seed)
+    jogos = gerar_jogos_sinteticos(n_jogos)
+    print(f"Jogos: {n_jogos}  Movimentos: {n_movimentos} (um slider de cada vez)")
+    print(f"{'estratégia':<14}{'índice (s)':>12}{'máscara (ms)':>14}{'índice (ms)':>13}{'p95 (ms)':>10}  iguais")
+    for estrategia in (LAY_0X1, LAY_HOME, OVER_15_FT):
+        inicio = time.perf_counter()
+        indice = IndiceLimites(jogos, estrategia)
+        tempo_construcao = time.perf_counter() - inicio
+        limites = indice.limites()
+        tempos_mascara, tempos_indice, iguais = [], [], True
+        for movimento in range(n_movimentos):
+            i = indice.ajustaveis[(movimento // 50) % len(indice.ajustaveis)]
+            limites = dict(limites)
+            minimo, maximo = indice.amplitude(i)
+            limites[i] = float(np.round(rng.uniform(minimo, maximo), 2))
+            regras = [r._replace(valor=limites[j]) if j in limites else r for j, r in enumerate(estrategia.regras)]
+
+            inicio = time.perf_counter()
+            esperado = int(avaliar_estrategias(jogos, [estrategia._replace(regras=regras)])[estrategia.nome].sum())
+            tempos_mascara.append(time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            contagem = indice.contar(limites)
+            tempos_indice.append(time.perf_counter() - inicio)
+            iguais &= contagem == esperado
+        print(f"{estrategia.nome:<14}{tempo_construcao:>12.3f}{np.median(tempos_mascara) * 1e3:>14.2f}"
+              f"{np.median(tempos_indice) * 1e3:>13.3f}{np.percentile(tempos_indice, 95) * 1e3:>10.3f}  {iguais}")
+
+
+def bench_modelo(n_linhas, n_jogos, n_ligas_novas=10, seed=0):
+    """Modelo de Dixon-Coles: ajuste a frio vs reajuste a quente após um dia novo, e matrizes do dia."""
+    from scipy.optimize import check_grad
+    from modelo_placares import COLUNAS_MODELO, ModeloPlacares, _objetivo
+
+    # Golos gerados a partir de forças conhecidas, para verificar que o ajuste as recupera
+    rng = np.random.default_rng(seed)
+    base = gerar_base_sintetica(n_linhas, n_colunas_extra=0, seed=seed)
+    equipas = pd.unique(pd.concat([base["Home"], base["Away"]]))
+    ataque = pd.Series(rng.normal(0, 0.3, len(equipas)), index=equipas)
+    defesa = pd.Series(rng.normal(0, 0.2, len(equipas)), index=equipas)
+    lam = np.exp(0.25 + 0.25 + ataque[base["Home"]].to_numpy() + defesa[base["Away"]].to_numpy())
+    mu = np.exp(0.25 + ataque[base["Away"]].to_numpy() + defesa[base["Home"]].to_numpy())
+    base["FT_Goals_H"], base["FT_Goals_A"] = rng.poisson(lam), rng.poisson(mu)
+
+    # Dia novo: jogos de algumas ligas, no dia seguinte ao último da base
+    ligas_novas = pd.unique(base["League"])[:n_ligas_novas]
+    novos = base[base["League"].isin(ligas_novas)].tail(n_jogos).copy()
+    novos["Date"] = (pd.to_datetime(base["Date"]).max() + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    atualizada = pd.concat([base, novos], ignore_index=True)
+    print(f"Linhas: {n_linhas}  Ligas: {base['League'].nunique()}  Dia novo: {len(novos)} jogos em {n_ligas_novas} ligas")
+
+    frio = ModeloPlacares()
+    inicio = time.perf_counter()
+    frio.ajustar(base)
+    print(f"Ajuste a frio: {time.perf_counter() - inicio:.2f} s  {frio.stats['iteracoes']} iterações  "
+          f"{frio.stats['ligas_ajustadas']} ligas")
+
+    quente = ModeloPlacares(frio.ligas)
+    inicio = time.perf_counter()
+    quente.ajustar(atualizada)
+    print(f"Reajuste a quente: {time.perf_counter() - inicio:.2f} s  {quente.stats['iteracoes']} iterações  "
+          f"{quente.stats['ligas_ajustadas']} ligas ajustadas, {quente.stats['ligas_reutilizadas']} reutilizadas")
+    completo = ModeloPlacares()
+    inicio = time.perf_counter()
+    completo.ajustar(atualizada)
+    print(f"Reajuste a frio da base atualizada: {time.perf_counter() - inicio:.2f} s  "
+          f"{completo.stats['iteracoes']} iterações")
+
+    jogos = atualizada.tail(n_jogos)
+    inicio = time.perf_counter()
+    matrizes = quente.matrizes(jogos)
+    tempo = time.perf_counter() - inicio
+    diferenca = np.nanmax(np.abs(matrizes - completo.matrizes(jogos)))
+    print(f"Matrizes de {len(jogos)} jogos: {tempo * 1e3:.2f} ms  soma média {np.nanmean(matrizes.sum(axis=(1, 2))):.4f}  "
+          f"diferença máx. quente vs frio {diferenca:.1e}")
+
+    estimados = pd.Series(np.concatenate([p.ataque for p in completo.ligas.values()]),
+                          index=np.concatenate([p.equipas for p in completo.ligas.values()]))
+    print(f"Correlação ataque estimado vs real: {np.corrcoef(estimados, ataque[estimados.index])[0, 1]:.3f}")
+
+    # Gradiente analítico vs diferenças finitas, numa amostra pequena
+    amostra = base.head(3000)[COLUNAS_MODELO]
+    codigos, nomes = pd.factorize(amostra["League"].astype(str))
+    dados, x0, _, _ = ModeloPlacares()._dados(amostra, codigos, list(nomes))
+    x = x0 + rng.normal(0, 0.1, len(x0))
+    x[2 * dados.n_ligas:3 * dados.n_ligas] = 0.1
+    erro = check_grad(lambda v: _objetivo(v, dados)[0], lambda v: _objetivo(v, dados)[1], x)
+    print(f"Erro relativo do gradiente: {erro / np.linalg.norm(_objetivo(x, dados)[1]):.1e}")
+
+
+def bench_banca(n_caminhos, n_apostas, processos, n_linhas=200_000):
+    """Simulação de Monte Carlo da banca do Lay Home: caminhos/s e pico de memória por modo de stake e processos."""
+    from backtest import apostas
+    from estrategias import LAY_HOME
+    from simulador_banca import ResumoSimulacao, simular_blocos
+
+    ganho, ganhou = apostas(gerar_jogos_sinteticos(n_linhas), LAY_HOME)
+    print(f"Apostas históricas: {len(ganho)}  Taxa de acerto: {ganhou.mean():.1%}  "
+          f"Caminhos: {n_caminhos} x {n_apostas} apostas")
+    print(f"{'stake':<14}{'processos':>10}{'tempo (s)':>11}{'caminhos/s':>12}{'pico mem.':>11}{'ruína':>9}{'DD p95':>8}")
+    for modo, fracao in (("fixa", 0.02), ("proporcional", 0.02), ("kelly", 0.25)):
+        resultados = []
+        for n_processos in processos:
+            resumo = ResumoSimulacao(roi_maximo=float(ganho.max()))
+            with pico_memoria() as memoria:
+                inicio = time.perf_counter()
+                for bloco in simular_blocos(ganho, ganhou, n_caminhos, n_apostas, modo, fracao, processos=n_processos):
+                    resumo.acrescentar(bloco)
+                tempo = time.perf_counter() - inicio
+            resultado = resumo.resultado()
+            resultados.append(resultado)
+            print(f"{modo:<14}{n_processos:>10}{tempo:>11.2f}{n_caminhos / tempo:>12.0f}{memoria['mb']:>8.1f} MB"
+                  f"{resultado['prob_ruina']:>9.2%}{resultado['drawdown'][0.95]:>8.1%}")
+        # A mesma seed dá o mesmo resumo com qualquer número de processos
+        if any(r != resultados[0] for r in resultados[1:]):
+            print(f"{modo}: resumos diferentes entre números de processos")
+
+
+# Páginas conduzidas pela suite com o AppTest do Streamlit: (módulo, função)
+PAGINAS = [
+    ("back", "show_back"), ("lay", "show_lay"), ("overs_unders_ht", "show_overs_unders_ht"),
+    ("overs_unders_ft", "show_overs_unders_ft"), ("btts", "show_btts"), ("lay_correct_score", "show_lay_correct_score"),
+    ("analise_jogo_a_jogo", "show_analise_jogo_a_jogo"), ("analise_correct_score", "show_analise_correct_score"),
+]
+
+
+def _executar_etapas(dia, timeout):
+    """Corre cada etapa (funções e páginas) num processo novo e mede o tempo e o pico de RSS acima do início."""
+    from streamlit.testing.v1 import AppTest
+
+    import analise_correct_score
+    import back
+    import lay
+    import lay_correct_score
+    import overs_unders_ft
+    import streamlit.logger
+
+    # As funções chamadas fora do AppTest avisam que não há ScriptRunContext
+    streamlit.logger.set_log_level("error")
+    resultados = []
+
+    def medir(etapa, funcao):
+        with pico_memoria() as memoria:
+            inicio = time.perf_counter()
+            resultado = funcao()
+            tempo = time.perf_counter() - inicio
+        resultados.append({"etapa": etapa, "tempo_s": tempo, "memoria_mb": memoria["mb"]})
+        return resultado
+
+    jogos = medir("read_jogos", lambda: lay.read_jogos(dia))
+    medir("read_jogos (flashscore)", lambda: back.read_jogos(dia))
+    # 1.ª leitura: base completa e criação do histórico particionado; depois só as equipas do dia
+    medir("read_base_de_dados", lambda: analise_correct_score.read_base_de_dados(jogos))
+    base_dados = medir("read_base_de_dados (equipas do dia)", lambda: analise_correct_score.read_base_de_dados(jogos))
+    medir("read_base_de_dados (memória)", lambda: analise_correct_score.read_base_de_dados(jogos))
+    if base_dados.empty or jogos.empty:
+        raise RuntimeError("Os dados sintéticos não foram carregados a partir do servidor local")
+    for modulo, funcao in [(lay, "filter_lay_home"), (lay, "filter_lay_away"), (lay_correct_score, "filter_lay_0x1"),
+                           (lay_correct_score, "filter_lay_1x0"), (overs_unders_ft, "filter_over_15_ft")]:
+        medir(funcao, lambda: getattr(modulo, funcao)(jogos))
+
+    equipa = jogos["Home"].iloc[0]
+    medir("obter_agregados", lambda: analise_correct_score.obter_agregados(base_dados))
+    medir("display_result_frequencies_3_seasons", lambda: analise_correct_score.display_result_frequencies_3_seasons(base_dados, equipa))
+    medir("display_result_frequencies_2_seasons", lambda: analise_correct_score.display_result_frequencies_2_seasons(base_dados, equipa))
+    medir("display_result_frequencies_current_season",
+          lambda: analise_correct_score.display_result_frequencies_current_season(base_dados, equipa, dia=dia))
+    medir("obter_quadro", lambda: analise_correct_score.obter_quadro(base_dados, jogos, dia))
+
+    # Custo fixo do AppTest, para comparar com o tempo de cada página
+    medir("AppTest (script vazio)", AppTest.from_string("pass\n", default_timeout=timeout).run)
+    for modulo, funcao in PAGINAS:
+        app = AppTest.from_string(f"from {modulo} import {funcao}\n{funcao}()\n", default_timeout=timeout)
+        medir(funcao, app.run)
+        if app.exception:
+            raise RuntimeError(f"{funcao}: {app.exception[0].message}")
+    return resultados
+
+
+# Margem absoluta somada à referência, para que etapas de poucos ms/MB não falhem por ruído
+FOLGA_REFERENCIA = {"tempo_s": 0.01, "memoria_mb": 5.0}
+
+
+def verificar_limites(resultados, limites=None, referencia=None, tolerancia=0.25):
+    """Lista de etapas que ultrapassam os limites absolutos ou a referência (+ tolerância)."""
+    falhas = []
+    anteriores = {a["etapa"]: a for a in referencia or []}
+    for r in resultados:
+        maximos = dict((limites or {}).get(r["etapa"], {}))
+        anterior = anteriores.get(r["etapa"])
+        for metrica in ("tempo_s", "memoria_mb"):
+            if anterior is not None:
+                relativo = anterior[metrica] * (1 + tolerancia) + FOLGA_REFERENCIA[metrica]
+                maximos[metrica] = min(maximos.get(metrica, relativo), relativo)
+            if metrica in maximos and r[metrica] > maximos[metrica]:
+                falhas.append(f"{r['etapa']}: {metrica} {r[metrica]:.3f} > {maximos[metrica]:.3f}")
+    return falhas
+
+
+def bench_suite(n_linhas, n_jogos, limites=None, referencia=None, tolerancia=0.25, guardar=None, timeout=600):
+    """Mede todas as etapas das páginas com dados sintéticos servidos localmente e aplica os limites."""
+    dia = date.today()
+    base = gerar_base_sintetica(n_linhas)
+    jogos = gerar_jogos_sinteticos(n_jogos)
+    ficheiros = {
+        "base_de_dados.csv": base.to_csv(index=False).encode(),
+        nome_ficheiro(dia): jogos.to_csv(index=False).encode(),
+        nome_ficheiro(dia, "jogos_flashscore"): jogos[COLUNAS_FLASHSCORE].to_csv(index=False).encode(),
+    }
+    with servidor_local(ficheiros) as url, tempfile.TemporaryDirectory() as pasta:
+        # O processo das etapas importa os módulos de novo, já apontados para o servidor local
+        ambiente = {
+            "FLUFFY_URL_BASE_DE_DADOS": url + "base_de_dados.csv", "FLUFFY_URL_JOGOS_DO_DIA": url,
+            "FLUFFY_URL_JOGOS_FLASHSCORE": url, "FLUFFY_CACHE_DIR": pasta,
+        }
+        with variaveis_ambiente(ambiente):
+            resultados = _processo_novo(_executar_etapas, dia, timeout)
+
+    print(f"Base: {n_linhas} linhas  Jogos do dia: {n_jogos} x {jogos.shape[1]}")
+    print(f"{'etapa':<44}{'tempo':>10}{'pico mem.':>12}")
+    for r in resultados:
+        print(f"{r['etapa']:<44}{r['tempo_s'] * 1e3:>8.1f}ms{r['memoria_mb']:>9.1f} MB")
+    if guardar:
+        with open(guardar, "w") as f:
+            json.dump(resultados, f, indent=2)
+
+    falhas = verificar_limites(resultados, limites, referencia, tolerancia)
+    for falha in falhas:
+        print(f"REGRESSÃO {falha}")
+    return not falhas
+
+
+def _ler_json(caminho):
+    if caminho is None:
+        return None
+    with open(caminho) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+    p = sub.add_parser("snapshot", help="CSV vs snapshot Parquet tipado")
+    p.add_argument("--linhas", type=int, default=500_000)
+    p = sub.add_parser("indice", help="varrimento por equipa vs índice (equipa, local)")
+    p.add_argument("--linhas", type=int, default=3_000_000)
+    p = sub.add_parser("incremental", help="delta diário vs recálculo completo dos agregados")
+    p.add_argument("--linhas", type=int, default=1_000_000)
+    p.add_argument("--novos", type=int, default=300)
+    p = sub.add_parser("backtest", help="varredura de limites do Lay 0 x 1 (combinações/s)")
+    p.add_argument("--linhas", type=int, default=200_000)
+    p.add_argument("--processos", type=int, default=os.cpu_count())
+    p = sub.add_parser("multidia", help="carregamento de vários dias com latência simulada")
+    p.add_argument("--dias", type=int, default=30)
+    p.add_argument("--latencia", type=float, default=0.2)
+    p = sub.add_parser("tabelas", help="bytes e tempo de preparação das tabelas AgGrid")
+    p.add_argument("--jogos", type=int, default=500)
+    p = sub.add_parser("semelhantes", help="odds semelhantes: caixa por jogo vs k-NN em lote")
+    p.add_argument("--linhas", type=int, default=1_000_000)
+    p.add_argument("--jogos", type=int, default=300)
+    p = sub.add_parser("golos", help="minutos dos golos: análise dos textos e estatísticas por equipa")
+    p.add_argument("--linhas", type=int, default=1_000_000)
+    p.add_argument("--jogos", type=int, default=300)
+    p = sub.add_parser("features", help="features as-of: histórico completo vs janelas incrementais")
+    p.add_argument("--linhas", type=int, default=60_000)
+    p.add_argument("--dias", type=int, default=7)
+    p = sub.add_parser("historico", help="histórico particionado: importação e ingestão de um dia")
+    p.add_argument("--linhas", type=int, default=1_000_000)
+    p = sub.add_parser("pushdown", help="leitura só das equipas do dia vs histórico completo")
+    p.add_argument("--linhas", type=int, default=1_000_000)
+    p.add_argument("--jogos", type=int, default=100)
+    p = sub.add_parser("csv", help="leitura dos CSV: inferência do pandas vs esquema com pyarrow")
+    p.add_argument("--linhas", type=int, default=1_000_000)
+    p.add_argument("--jogos", type=int, default=5000)
+    p = sub.add_parser("partilhado", help="memória de várias sessões: cópia própria vs ficheiro Arrow mapeado")
+    p.add_argument("--linhas", type=int, default=1_000_000)
+    p.add_argument("--sessoes", type=int, nargs="+", default=[1, 4, 12])
+    p = sub.add_parser("resultados", help="reruns das páginas Lay: sem vs com cache de resultados das estratégias")
+    p.add_argument("--jogos", type=int, default=1000)
+    p.add_argument("--reruns", type=int, default=200)
+    p = sub.add_parser("limites", help="contagem ao vivo dos sliders: máscara completa vs índice ordenado")
+    p.add_argument("--jogos", type=int, default=300_000)
+    p = sub.add_parser("modelo", help="modelo de Dixon-Coles: ajuste a frio vs reajuste a quente e matrizes do dia")
+    p.add_argument("--linhas", type=int, default=300_000)
+    p.add_argument("--jogos", type=int, default=300)
+    p = sub.add_parser("banca", help="simulação de Monte Carlo da banca: caminhos/s e memória por stake e processos")
+    p.add_argument("--caminhos", type=int, default=1_000_000)
+    p.add_argument("--apostas", type=int, default=500)
+    p.add_argument("--processos", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    p = sub.add_parser("suite", help="todas as páginas e funções principais, sem rede, com limites de regressão")
+    p.add_argument("--linhas", type=int, default=200_000)
+    p.add_argument("--jogos", type=int, default=300)
+    p.add_argument("--limites", help="JSON {etapa: {tempo_s, memoria_mb}} com os máximos absolutos")
+    p.add_argument("--referencia", help="resultados guardados de uma execução anterior")
+    p.add_argument("--tolerancia", type=float, default=0.25, help="aumento máximo face à referência")
+    p.add_argument("--guardar", help="ficheiro onde guardar os resultados")
+    args = parser.parse_args()
+
+    if args.bench == "snapshot":
+        bench_snapshot(args.linhas)
+    elif args.bench == "indice":
+        bench_indice(args.linhas)
+    elif args.bench == "incremental":
+        bench_incremental(args.linhas, args.novos)
+    elif args.bench == "backtest":
+        bench_backtest(args.linhas, args.processos)
+    elif args.bench == "multidia":
+        bench_multidia(args.dias, args.latencia)
+    elif args.bench == "tabelas":
+        bench_tabelas(args.jogos)
+    elif args.bench == "semelhantes":
+        bench_semelhantes(args.linhas, args.jogos)
+    elif args.bench == "golos":
+        bench_golos(args.linhas, args.jogos)
+    elif args.bench == "features":
+        bench_features(args.linhas, args.dias)
+    elif args.bench == "historico":
+        bench_historico(args.linhas)
+    elif args.bench == "pushdown":
+        bench_pushdown(args.linhas, args.jogos)
+    elif args.bench == "csv":
+        bench_csv(args.linhas, args.jogos)
+    elif args.bench == "partilhado":
+        sys.exit(0 if bench_partilhado(args.linhas, args.sessoes) else 1)
+    elif args.bench == "resultados":
+        bench_resultados(args.jogos, args.reruns)
+    elif args.bench == "limites":
+        bench_limites(args.jogos)
+    elif args.bench == "modelo":
+        bench_modelo(args.linhas, args.jogos)
+    elif args.bench == "banca":
+        bench_banca(args.caminhos, args.apostas, args.processos)
+    elif args.bench == "suite":
+        ok = bench_suite(args.linhas, args.jogos, _ler_json(args.limites), _ler_json(args.referencia),
+                         args.tolerancia, args.guardar)
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from estrategias import aplicar_estrategias, impressao_estrategia
+from instrumentacao import medido, registar_estatisticas
+from jogos_do_dia import impressao_jogos
+
+# Tempo (segundos) que um resultado fica guardado e número máximo de resultados em memória
+TTL_RESULTADOS = int(os.environ.get("FLUFFY_TTL_RESULTADOS", "3600"))
+MAX_RESULTADOS = int(os.environ.get("FLUFFY_MAX_RESULTADOS", "64"))
+
+
+class CacheEstrategias:
+    """Tabelas dos jogos selecionados por cada estratégia, partilhadas entre páginas e sessões.
+
+    A chave é (fonte, dia, definição da estratégia, impressão digital dos jogos do dia, ver
+    jogos_do_dia.impressao_jogos): editar uma regra ou um limite, uma nova versão do ficheiro
+    ou só uma parte dos seus jogos dá uma chave nova e o resultado é recalculado. As entradas expiram ao fim de 'ttl' segundos e, acima de
+    'max_entradas', saem as menos usadas.
+    """
+
+    def __init__(self, max_entradas=MAX_RESULTADOS, ttl=TTL_RESULTADOS):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirados": 0, "sem_impressao": 0}
+
+    def _procurar(self, chave, agora):
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return None
+        if agora - entrada["calculado_em"] >= self.ttl:
+            del self._entradas[chave]
+            self.stats["expirados"] += 1
+            return None
+        self._entradas.move_to_end(chave)
+        return entrada["df"]
+
+    @medido("cache_estrategias")
+    def obter(self, dia, jogos_do_dia, estrategias, fonte="df_jogos_do_dia"):
+        """{nome: tabela dos jogos selecionados} (tabelas partilhadas, não devem ser alteradas).
+
+        Só as estratégias que não estão guardadas são avaliadas, todas numa só passagem.
+        Sem impressão digital nos jogos (jogos.attrs["impressao"]) nada é guardado.
+        """
+        impressao = impressao_jogos(jogos_do_dia)
+        if impressao is None:
+            with self._lock:
+                self.stats["sem_impressao"] += 1
+            return aplicar_estrategias(jogos_do_dia, estrategias)
+
+        chaves = {e.nome: (fonte, dia, impressao_estrategia(e), impressao) for e in estrategias}
+        resultados = {}
+        with self._lock:
+            agora = time.time()
+            for estrategia in estrategias:
+                df = self._procurar(chaves[estrategia.nome], agora)
+                if df is not None:
+                    resultados[estrategia.nome] = df
+            self.stats["hits"] += len(resultados)
+            self.stats["misses"] += len(estrategias) - len(resultados)
+
+        em_falta = [e for e in estrategias if e.nome not in resultados]
+        if em_falta:
+            calculados = aplicar_estrategias(jogos_do_dia, em_falta)
+            with self._lock:
+                agora = time.time()
+                for nome, df in calculados.items():
+                    self._entradas[chaves[nome]] = {"df": df, "calculado_em": agora}
+                    self._entradas.move_to_end(chaves[nome])
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+                    self.stats["evictions"] += 1
+            resultados.update(calculados)
+        return {e.nome: resultados[e.nome] for e in estrategias}
+
+    def estatisticas(self):
+        """Contadores, número de entradas e taxa de acertos (hits / pedidos)."""
+        with self._lock:
+            pedidos = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, entradas=len(self._entradas),
+                        taxa_acertos=self.stats["hits"] / pedidos if pedidos else 0.0)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            for chave in self.stats:
+                self.stats[chave] = 0
+
+    def resumo(self):
+        """Linha do painel de desempenho."""
+        estatisticas = self.estatisticas()
+        return (f"{estatisticas['taxa_acertos']:.0%} acertos ({estatisticas['hits']}/"
+                f"{estatisticas['hits'] + estatisticas['misses']}), {estatisticas['entradas']} entradas")
+
+
+cache_estrategias = CacheEstrategias()
+registar_estatisticas("Cache das estratégias", cache_estrategias.resumo)
+
+
+def obter_resultados(dia, jogos_do_dia, estrategias, fonte="df_jogos_do_dia"):
+    """Tabelas das estratégias para os jogos do dia, a partir da cache partilhada por todas as páginas."""
+    return cache_estrategias.obter(dia, jogos_do_dia, estrategias, fonte)
@@ -0,0 +1,97 @@
+"""Dados sintéticos com os esquemas da base de dados e dos ficheiros diários, para testes e benchmarks."""
+import numpy as np
+import pandas as pd
+
+from estrategias import COLUNAS_GOLOS, COLUNAS_LAY
+from indice_equipas import LOCAIS
+from jogos_do_dia import COLUNAS_FLASHSCORE
+from placares import JANELA_TEMPORADA, JANELAS
+
+
+def gerar_minutos_golos(golos_ht, golos_ft, rng):
+    """Texto Goals_Minutes ("['12', '45+1', '78']") coerente com os golos HT e FT de cada jogo."""
+    n_primeira, n_segunda = golos_ht, golos_ft - golos_ht
+    jogo = np.concatenate([np.repeat(np.arange(len(golos_ht)), n_primeira), np.repeat(np.arange(len(golos_ht)), n_segunda)])
+    minutos = np.concatenate([rng.integers(1, 46, n_primeira.sum()), rng.integers(46, 91, n_segunda.sum())])
+    ordem = np.lexsort((minutos, jogo))
+    jogo, minutos = jogo[ordem], minutos[ordem]
+    texto = minutos.astype(str).astype(object)
+    descontos = (minutos == 45) | (minutos == 90)
+    texto[descontos] = [f"{m}+{d}" for m, d in zip(minutos[descontos], rng.integers(1, 6, descontos.sum()))]
+    texto = ("'" + texto + "'").tolist()
+    fins = np.cumsum(np.bincount(jogo, minlength=len(golos_ht))).tolist()
+    resultado = np.empty(len(golos_ht), dtype=object)
+    inicio = 0
+    for i, fim in enumerate(fins):
+        resultado[i] = "[" + ", ".join(texto[inicio:fim]) + "]"
+        inicio = fim
+    return resultado
+
+
+def gerar_base_sintetica(n_linhas, n_ligas=40, equipas_por_liga=20, n_colunas_extra=40, n_temporadas=6, seed=0):
+    """Gera uma base de dados sintética com o esquema de fluffy_chips_2018_2024.csv."""
+    rng = np.random.default_rng(seed)
+    liga = rng.integers(0, n_ligas, n_linhas)
+    home = liga * equipas_por_liga + rng.integers(0, equipas_por_liga, n_linhas)
+    away = liga * equipas_por_liga + (home % equipas_por_liga + rng.integers(1, equipas_por_liga, n_linhas)) % equipas_por_liga
+    datas = pd.Timestamp("2018-07-01") + pd.to_timedelta(np.sort(rng.integers(0, n_temporadas * 365, n_linhas)), unit="D")
+    ht_h, ht_a = rng.poisson(0.6, n_linhas), rng.poisson(0.5, n_linhas)
+    ft_h, ft_a = ht_h + rng.poisson(0.8, n_linhas), ht_a + rng.poisson(0.6, n_linhas)
+
+    def odds(media):
+        return np.round(rng.uniform(1.01, 2 * media, n_linhas), 2)
+
+    base = pd.DataFrame({
+        "Date": datas.strftime("%Y-%m-%d"),
+        "League": np.char.add("Liga ", liga.astype(str)),
+        "Season": np.char.add(np.char.add(datas.year.astype(str), "/"), (datas.year + 1).astype(str)),
+        "Home": np.char.add("Equipa ", home.astype(str)),
+        "Away": np.char.add("Equipa ", away.astype(str)),
+        "HT_Goals_H": ht_h, "HT_Goals_A": ht_a, "FT_Goals_H": ft_h, "FT_Goals_A": ft_a,
+        "FT_Odd_H": odds(2.5), "FT_Odd_D": odds(3.5), "FT_Odd_A": odds(3.0),
+        "HT_Odd_Over05": odds(1.5), "HT_Odd_Under05": odds(2.5), "FT_Odd_Over05": odds(1.1), "FT_Odd_Under05": odds(8),
+        "FT_Odd_Over15": odds(1.3), "FT_Odd_Under15": odds(3.5), "FT_Odd_Over25": odds(1.9), "FT_Odd_Under25": odds(1.9),
+        "Odd_BTTS_Yes": odds(1.8), "Odd_BTTS_No": odds(1.9),
+        "Goals_Minutes_Home": gerar_minutos_golos(ht_h, ft_h, rng), "Goals_Minutes_Away": gerar_minutos_golos(ht_a, ft_a, rng),
+    })
+    # Colunas que existem no CSV original mas não são usadas pelo dashboard
+    for i in range(n_colunas_extra):
+        base[f"Extra_{i:02d}"] = rng.random(n_linhas).round(3)
+    return base
+
+
+def gerar_jogos_sinteticos(n_linhas, seed=0):
+    """Gera jogos sintéticos com as colunas de df_jogos_do_dia usadas pelas estratégias e o resultado final."""
+    rng = np.random.default_rng(seed)
+    base = gerar_base_sintetica(n_linhas, n_colunas_extra=0, seed=seed)
+    jogos = base[["League", "Date", "Home", "Away", "FT_Goals_H", "FT_Goals_A", "HT_Goals_H", "HT_Goals_A"]
+                 + [c for c in COLUNAS_FLASHSCORE if c in base.columns and c not in ("League", "Date", "Home", "Away")]].copy()
+    jogos["Time"] = [f"{h:02d}:{m:02d}" for h, m in zip(rng.integers(10, 23, n_linhas), rng.integers(0, 4, n_linhas) * 15)]
+    estatisticas = {}
+    for coluna in dict.fromkeys(COLUNAS_LAY + COLUNAS_GOLOS):
+        if coluna in jogos.columns:
+            continue
+        if coluna.startswith("Porc_") or coluna.startswith("Med_Power_Ranking"):
+            estatisticas[coluna] = rng.uniform(0, 100, n_linhas).round(1)
+        elif coluna.startswith("CV_"):
+            estatisticas[coluna] = rng.uniform(0, 1.5, n_linhas).round(2)
+        elif coluna.startswith("FT_Odd_"):
+            estatisticas[coluna] = rng.uniform(1.05, 8, n_linhas).round(2)
+        else:
+            estatisticas[coluna] = rng.uniform(0, 4, n_linhas).round(2)
+    jogos = pd.concat([jogos, pd.DataFrame(estatisticas, index=jogos.index)], axis=1)
+    return jogos
+
+
+def verificar_agregados(incremental, completo, temporadas):
+    """Confirma que os agregados incrementais coincidem com um recálculo completo."""
+    for location in LOCAIS:
+        for janela in list(JANELAS) + [JANELA_TEMPORADA]:
+            vetores_inc = incremental.vetores(location, janela, temporadas)
+            vetores_comp = completo.vetores(location, janela, temporadas)
+            for team, linha in completo.equipas(location).items():
+                linha_inc = incremental.equipas(location).get(team)
+                esperado = vetores_comp[linha]
+                obtido = vetores_inc[linha_inc] if linha_inc is not None else np.zeros_like(esperado)
+                if not np.array_equal(esperado, obtido):
+                    raise AssertionError(f"Agregados divergentes: {team} / {location} / {janela}")
@@ -0,0 +1,139 @@
+import csv
+import io
+import re
+from collections import namedtuple
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# Base de dados histórica (fluffy_chips_2018_2024.csv): só estas colunas são lidas
+COLUNAS_SELECIONADAS = [
+    "Date", "League", "Season", "Home", "Away", "HT_Goals_H", "HT_Goals_A", "FT_Goals_H", "FT_Goals_A",
+    "FT_Odd_H", "FT_Odd_D", "FT_Odd_A", "HT_Odd_Over05", "HT_Odd_Under05", "FT_Odd_Over05", "FT_Odd_Under05",
+    "FT_Odd_Over15", "FT_Odd_Under15", "FT_Odd_Over25", "FT_Odd_Under25", "Odd_BTTS_Yes", "Odd_BTTS_No",
+    "Goals_Minutes_Home", "Goals_Minutes_Away",
+]
+
+# Tipos compactos usados na leitura e no snapshot colunar
+COLUNAS_CATEGORICAS = ["League", "Season", "Home", "Away"]
+COLUNAS_GOLOS = ["HT_Goals_H", "HT_Goals_A", "FT_Goals_H", "FT_Goals_A"]
+COLUNAS_ODDS = [
+    "FT_Odd_H", "FT_Odd_D", "FT_Odd_A", "HT_Odd_Over05", "HT_Odd_Under05", "FT_Odd_Over05", "FT_Odd_Under05",
+    "FT_Odd_Over15", "FT_Odd_Under15", "FT_Odd_Over25", "FT_Odd_Under25", "Odd_BTTS_Yes", "Odd_BTTS_No",
+]
+TIPOS_LEITURA = dict(
+    {c: "category" for c in COLUNAS_CATEGORICAS},
+    **{c: "float32" for c in COLUNAS_GOLOS + COLUNAS_ODDS},
+)
+
+# Ficheiros diários do Flashscore (só odds): só estas colunas são lidas
+COLUNAS_FLASHSCORE = [
+    'League', 'Date', 'Time', 'Home', 'Away', 'FT_Odd_H', 'FT_Odd_D', 'FT_Odd_A','HT_Odd_Over05', 'HT_Odd_Under05',
+    'FT_Odd_Over15','FT_Odd_Under15','FT_Odd_Over25','FT_Odd_Under25', 'Odd_BTTS_Yes', 'Odd_BTTS_No',
+]
+
+# Ficheiros diários df_jogos_do_dia: colunas obrigatórias (as usadas nas regras e nas tabelas
+# das estratégias); as restantes colunas do ficheiro também são lidas
+COLUNAS_JOGOS_DO_DIA = [
+    'League', 'Date', 'Time', 'Home', 'Away', 'FT_Odd_H', 'FT_Odd_D', 'FT_Odd_A', 'Med_Power_Ranking_Home',
+    'CV_pwr_Home', 'Med_Power_Ranking_Away', 'CV_pwr_Away', 'Media_RPS_MO_Home', 'CV_RPS_MO_Home',
+    'Media_RPS_MO_Away', 'CV_RPS_MO_Away', 'Media_Ptos_Home', 'CV_Ptos_Home', 'Media_Ptos_Away', 'CV_Ptos_Away',
+    'Media_CGM_Home_01', 'CV_CGM_Home_01', 'Media_CGM_Away_01', 'CV_CGM_Away_01', 'Media_CGS_Home_01',
+    'CV_CGS_Home_01', 'Media_CGS_Away_01', 'CV_CGS_Away_01', 'Media_CGM_Home_02', 'CV_CGM_Home_02',
+    'Media_CGM_Away_02', 'CV_CGM_Away_02', 'Media_CGS_Home_02', 'CV_CGS_Home_02', 'Media_CGS_Away_02',
+    'CV_CGS_Away_02', 'Media_Prob_Home', 'CV_Med_Prob_Home', 'Media_Prob_Away', 'CV_Med_Prob_Away',
+    'Med_Prim_Golo_Marcado_Home', 'Med_Prim_Golo_Sofrido_Home', 'Med_Prim_Golo_Marcado_Away',
+    'Med_Prim_Golo_Sofrido_Away', 'Porc_Marcou_Primeiro_Golo_Home', 'Porc_Marcou_Primeiro_Golo_Away',
+    'Porc_Sofreu_Primeiro_Golo_Home', 'Porc_Sofreu_Primeiro_Golo_Away', 'Porc_Marcou_Primeiro_Golo_Home_1P',
+    'Porc_Marcou_Primeiro_Golo_Away_1P', 'Porc_Sofreu_Primeiro_Golo_Home_1P', 'Porc_Sofreu_Primeiro_Golo_Away_1P',
+    'Porc_BTTS_Y_Home', 'Porc_BTTS_Y_Away', 'Porc_Home_Win_HT', 'Porc_Away_Win_HT', 'Porc_Home_Win_FT',
+    'Porc_Away_Win_FT', 'Porc_Score_Min_1G_Home', 'Porc_Score_Min_1G_Away', 'Porc_Took_Min_1G_Home',
+    'Porc_Took_Min_1G_Away', 'Media_SG_Home', 'Media_SG_Away', 'CV_SG_Home', 'CV_SG_Away', 'FT_Odd_Ov25',
+    'Prob_Ov15_FT', 'Prob_Un15_FT', 'Prob_BTTS_Y_FT', 'Prob_BTTS_N_FT', 'Media_RPS_OvUn_Home', 'CV_RPS_OvUn_Home',
+    'Media_RPS_OvUn_Away', 'CV_RPS_OvUn_Away', 'Media_RPS_BTTS_Home', 'CV_RPS_BTTS_Home', 'Media_RPS_BTTS_Away',
+    'CV_RPS_BTTS_Away', 'Media_GM_Home_1P', 'CV_GM_Home_1P', 'Media_GM_Away_1P', 'CV_GM_Away_1P', 'Media_GS_Home_1P',
+    'CV_GS_Home_1P', 'Media_GS_Away_1P', 'CV_GS_Away_1P', 'Media_GM_Home', 'CV_GM_Home', 'Media_GM_Away',
+    'CV_GM_Away', 'Media_GS_Home', 'CV_GS_Home', 'Media_GS_Away', 'CV_GS_Away', 'Porc_Over05HT_Home',
+    'Porc_Over05HT_Away', 'Porc_Under05HT_Home', 'Porc_Under05HT_Away', 'Porc_Over15HT_Home', 'Porc_Over15HT_Away',
+    'Porc_Under15HT_Home', 'Porc_Under15HT_Away', 'Porc_Over05FT_Home', 'Porc_Over05FT_Away', 'Porc_Under05FT_Home',
+    'Porc_Under05FT_Away', 'Porc_Over15FT_Home', 'Porc_Over15FT_Away', 'Porc_Under15FT_Home', 'Porc_Under15FT_Away',
+    'Porc_Over25FT_Home', 'Porc_Over25FT_Away', 'Porc_Under25FT_Home', 'Porc_Under25FT_Away',
+]
+
+# Colunas de texto que identificam os jogos
+COLUNAS_TEXTO = ["League", "Season", "Date", "Time", "Home", "Away", "Goals_Minutes_Home", "Goals_Minutes_Away"]
+
+_TIPOS_ARROW = {
+    "string": pa.string(),
+    "float32": pa.float32(),
+    "float64": pa.float64(),
+    "category": pa.dictionary(pa.int32(), pa.string()),
+}
+
+# obrigatorias/opcionais: coluna -> tipo (chave de _TIPOS_ARROW). Com 'selecionar', as
+# restantes colunas do ficheiro não são lidas; sem ele são lidas com o tipo inferido.
+Esquema = namedtuple("Esquema", ["nome", "obrigatorias", "opcionais", "selecionar"])
+
+
+class ErroEsquema(ValueError):
+    """O ficheiro não corresponde ao esquema esperado (colunas em falta ou valores com o tipo errado)."""
+
+
+def _tipo(coluna, tipos):
+    return tipos.get(coluna, "string" if coluna in COLUNAS_TEXTO else "float64")
+
+
+ESQUEMAS = {
+    "historico": Esquema(
+        "historico", {c: _tipo(c, TIPOS_LEITURA) for c in COLUNAS_SELECIONADAS}, {}, True,
+    ),
+    "df_jogos_do_dia": Esquema(
+        "df_jogos_do_dia", {c: _tipo(c, {}) for c in COLUNAS_JOGOS_DO_DIA},
+        {c: _tipo(c, {}) for c in COLUNAS_FLASHSCORE}, False,
+    ),
+    "jogos_flashscore": Esquema(
+        "jogos_flashscore", {c: _tipo(c, {}) for c in COLUNAS_FLASHSCORE}, {}, True,
+    ),
+}
+
+
+def _cabecalho(fonte):
+    """Nomes das colunas na primeira linha do CSV (bytes ou caminho)."""
+    if isinstance(fonte, (bytes, bytearray)):
+        primeira = bytes(fonte[:fonte.find(b"\n") if b"\n" in fonte else len(fonte)])
+    else:
+        with open(fonte, "rb") as f:
+            primeira = f.readline()
+    return next(csv.reader([primeira.decode("utf-8-sig").rstrip("\r\n")]), [])
+
+
+def ler_csv(fonte, esquema):
+    """Lê um CSV (bytes ou caminho) com o pyarrow, em várias threads e com os tipos do esquema.
+
+    Falha logo com ErroEsquema se faltar uma coluna obrigatória ou se um valor não
+    puder ser convertido para o tipo da sua coluna.
+    """
+    esquema = ESQUEMAS[esquema] if isinstance(esquema, str) else esquema
+    cabecalho = _cabecalho(fonte)
+    em_falta = [c for c in esquema.obrigatorias if c not in cabecalho]
+    if em_falta:
+        raise ErroEsquema(f"{esquema.nome}: colunas obrigatórias em falta: {em_falta}")
+
+    tipos = {c: t for c, t in {**esquema.opcionais, **esquema.obrigatorias}.items() if c in cabecalho}
+    colunas = [c for c in list(esquema.obrigatorias) + list(esquema.opcionais) if c in cabecalho]
+    opcoes = pacsv.ConvertOptions(
+        column_types={c: _TIPOS_ARROW[t] for c, t in tipos.items()},
+        include_columns=colunas if esquema.selecionar else None,
+        strings_can_be_null=True,
+    )
+    origem = io.BytesIO(fonte) if isinstance(fonte, (bytes, bytearray)) else fonte
+    try:
+        tabela = pacsv.read_csv(origem, read_options=pacsv.ReadOptions(use_threads=True), convert_options=opcoes)
+    except pa.ArrowInvalid as e:
+        mensagem = str(e)
+        # O pyarrow indica a coluna pelo número; junta-se o nome para a mensagem ser clara
+        numero = re.search(r"column #(\d+)", mensagem)
+        if numero is not None and int(numero.group(1)) < len(cabecalho):
+            mensagem = f"coluna '{cabecalho[int(numero.group(1))]}': {mensagem}"
+        raise ErroEsquema(f"{esquema.nome}: {mensagem}") from e
+    return tabela.to_pandas()
@@ -0,0 +1,197 @@
+import hashlib
+import operator
+from collections import namedtuple
+
+import numpy as np
+
+from instrumentacao import medido
+from jogos_do_dia import drop_reset_index
+
+# Colunas exibidas nas tabelas de resultados de cada estratégia
+COLUNAS_LAY = [
+    'League', 'Date', 'Time', 'Home', 'Away', 'FT_Odd_H','FT_Odd_D','FT_Odd_A','Med_Power_Ranking_Home','CV_pwr_Home',
+    'Med_Power_Ranking_Away', 'CV_pwr_Away','Media_RPS_MO_Home','CV_RPS_MO_Home','Media_RPS_MO_Away',
+    'CV_RPS_MO_Away','Media_Ptos_Home','CV_Ptos_Home','Media_Ptos_Away', 'CV_Ptos_Away','Media_CGM_Home_01',
+    'CV_CGM_Home_01', 'Media_CGM_Away_01','CV_CGM_Away_01', 'Media_CGS_Home_01','CV_CGS_Home_01', 'Media_CGS_Away_01',
+    'CV_CGS_Away_01', 'Media_CGM_Home_02','CV_CGM_Home_02','Media_CGM_Away_02', 'CV_CGM_Away_02', 'Media_CGS_Home_02',
+    'CV_CGS_Home_02', 'Media_CGS_Away_02','CV_CGS_Away_02','Media_Prob_Home','CV_Med_Prob_Home', 'Media_Prob_Away',
+    'CV_Med_Prob_Away', 'Med_Prim_Golo_Marcado_Home','Med_Prim_Golo_Sofrido_Home', 'Med_Prim_Golo_Marcado_Away',
+    'Med_Prim_Golo_Sofrido_Away','Porc_Marcou_Primeiro_Golo_Home','Porc_Marcou_Primeiro_Golo_Away', 'Porc_Sofreu_Primeiro_Golo_Home',
+    'Porc_Sofreu_Primeiro_Golo_Away', 'Porc_Marcou_Primeiro_Golo_Home_1P','Porc_Marcou_Primeiro_Golo_Away_1P',
+    'Porc_Sofreu_Primeiro_Golo_Home_1P', 'Porc_Sofreu_Primeiro_Golo_Away_1P', 'Porc_BTTS_Y_Home','Porc_BTTS_Y_Away',
+    'Porc_Home_Win_HT', 'Porc_Away_Win_HT', 'Porc_Home_Win_FT', 'Porc_Away_Win_FT','Porc_Score_Min_1G_Home',
+    'Porc_Score_Min_1G_Away', 'Porc_Took_Min_1G_Home', 'Porc_Took_Min_1G_Away','Media_SG_Home', 'Media_SG_Away', 'CV_SG_Home', 'CV_SG_Away',
+]
+
+COLUNAS_GOLOS = [
+    'League', 'Date', 'Time', 'Home', 'Away', 'FT_Odd_H', 'FT_Odd_D', 'FT_Odd_A', 'FT_Odd_Ov25',
+    'Prob_Ov15_FT', 'Prob_Un15_FT', 'Prob_BTTS_Y_FT', 'Prob_BTTS_N_FT', 'Media_RPS_OvUn_Home',
+    'CV_RPS_OvUn_Home', 'Media_RPS_OvUn_Away', 'CV_RPS_OvUn_Away', 'Media_RPS_BTTS_Home',
+    'CV_RPS_BTTS_Home', 'Media_RPS_BTTS_Away', 'CV_RPS_BTTS_Away', 'Media_SG_Home', 'CV_SG_Home',
+    'Media_SG_Away', 'CV_SG_Away', 'Media_GM_Home_1P', 'CV_GM_Home_1P', 'Media_GM_Away_1P',
+    'CV_GM_Away_1P', 'Media_GS_Home_1P', 'CV_GS_Home_1P', 'Media_GS_Away_1P', 'CV_GS_Away_1P',
+    'Media_GM_Home', 'CV_GM_Home', 'Media_GM_Away', 'CV_GM_Away', 'Media_GS_Home', 'CV_GS_Home',
+    'Media_GS_Away', 'CV_GS_Away', 'Media_CGM_Home_01', 'CV_CGM_Home_01', 'Media_CGM_Away_01',
+    'CV_CGM_Away_01', 'Media_CGS_Home_01', 'CV_CGS_Home_01', 'Media_CGS_Away_01', 'CV_CGS_Away_01',
+    'Media_CGM_Home_02', 'CV_CGM_Home_02', 'Media_CGM_Away_02', 'CV_CGM_Away_02', 'Media_CGS_Home_02',
+    'CV_CGS_Home_02', 'Media_CGS_Away_02', 'CV_CGS_Away_02', 'Med_Prim_Golo_Marcado_Home',
+    'Med_Prim_Golo_Sofrido_Home', 'Med_Prim_Golo_Marcado_Away', 'Med_Prim_Golo_Sofrido_Away',
+    'Porc_Marcou_Primeiro_Golo_Home', 'Porc_Marcou_Primeiro_Golo_Away', 'Porc_Sofreu_Primeiro_Golo_Home',
+    'Porc_Sofreu_Primeiro_Golo_Away', 'Porc_Marcou_Primeiro_Golo_Home_1P',
+    'Porc_Marcou_Primeiro_Golo_Away_1P', 'Porc_Sofreu_Primeiro_Golo_Home_1P',
+    'Porc_Sofreu_Primeiro_Golo_Away_1P', 'Porc_BTTS_Y_Home', 'Porc_BTTS_Y_Away', 'Porc_Over05HT_Home',
+    'Porc_Over05HT_Away', 'Porc_Under05HT_Home', 'Porc_Under05HT_Away', 'Porc_Over15HT_Home',
+    'Porc_Over15HT_Away', 'Porc_Under15HT_Home', 'Porc_Under15HT_Away', 'Porc_Over05FT_Home',
+    'Porc_Over05FT_Away', 'Porc_Under05FT_Home', 'Porc_Under05FT_Away', 'Porc_Over15FT_Home',
+    'Porc_Over15FT_Away', 'Porc_Under15FT_Home', 'Porc_Under15FT_Away', 'Porc_Over25FT_Home',
+    'Porc_Over25FT_Away', 'Porc_Under25FT_Home', 'Porc_Under25FT_Away', 'Porc_Score_Min_1G_Home',
+    'Porc_Score_Min_1G_Away', 'Porc_Took_Min_1G_Home', 'Porc_Took_Min_1G_Away',
+]
+
+OPERADORES = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq}
+
+# coluna OPERADOR valor. 'valor' é um número ou o nome de outra coluna;
+# se 'menos' for indicado, a comparação é feita sobre (coluna - menos).
+Regra = namedtuple("Regra", ["coluna", "operador", "valor", "menos"], defaults=[None])
+
+Estrategia = namedtuple("Estrategia", ["nome", "regras", "colunas"])
+
+LAY_HOME = Estrategia("Lay Home", [
+    #Regra('FT_Odd_A', '<=', 2.5),
+    #Regra('FT_Odd_H', '>=', 3), Regra('FT_Odd_H', '<=', 10),
+    Regra('Med_Power_Ranking_Away', '>', 'Med_Power_Ranking_Home'),
+    Regra('Med_Power_Ranking_Away', '>', 20, menos='Med_Power_Ranking_Home'),
+    Regra('Media_SG_Away', '>', 'Media_SG_Home'),
+    Regra('CV_SG_Away', '<=', 0.7),
+    Regra('Media_CGM_Away_02', '>=', 0.9),
+    Regra('CV_CGM_Away_02', '<', 0.7),
+], COLUNAS_LAY)
+
+LAY_AWAY = Estrategia("Lay Away", [
+    #Regra('FT_Odd_H', '<=', 2.5),
+    #Regra('FT_Odd_A', '>=', 3), Regra('FT_Odd_A', '<=', 10),
+    Regra('Med_Power_Ranking_Home', '>', 'Med_Power_Ranking_Away'),
+    Regra('Med_Power_Ranking_Home', '>', 15, menos='Med_Power_Ranking_Away'),
+    Regra('Media_SG_Home', '>', 'Media_SG_Away'),
+    Regra('CV_SG_Home', '<=', 0.7),
+    Regra('Media_CGM_Home_02', '>=', 0.9),
+    Regra('CV_CGM_Home_02', '<', 0.7),
+], COLUNAS_LAY)
+
+LAY_0X1 = Estrategia("Lay 0 x 1", [
+    Regra('Porc_Score_Min_1G_Home', '>=', 85),
+    Regra('Porc_Took_Min_1G_Away', '>=', 75),
+    Regra('Media_CGM_Home_01', '>=', 3),
+    Regra('Media_CGM_Home_02', '>=', 0.8),
+    Regra('CV_CGS_Home_02', '<=', 0.8),
+    Regra('FT_Odd_H', '>=', 1.25),
+    Regra('FT_Odd_H', '<=', 2.2),
+    Regra('FT_Odd_Ov25', '<=', 2.3),
+    Regra('FT_Odd_A', '>=', 'FT_Odd_D'),
+], COLUNAS_GOLOS)
+
+LAY_1X0 = Estrategia("Lay 1 x 0", [
+    Regra('Porc_Score_Min_1G_Away', '>=', 85),
+    Regra('Porc_Took_Min_1G_Home', '>=', 75),
+    Regra('Media_CGM_Away_01', '>=', 3),
+    Regra('Media_CGM_Away_02', '>=', 0.8),
+    Regra('CV_CGS_Away_02', '<=', 0.8),
+    Regra('FT_Odd_A', '>=', 1.25),
+    Regra('FT_Odd_A', '<=', 2.2),
+    Regra('FT_Odd_Ov25', '<=', 2.3),
+    Regra('FT_Odd_H', '>=', 'FT_Odd_D'),
+], COLUNAS_GOLOS)
+
+OVER_15_FT = Estrategia("Over 1,5 FT", [
+    Regra('Porc_Over15FT_Home', '>', 55),
+    Regra('Porc_Over15FT_Away', '>', 55),
+    Regra('Porc_BTTS_Y_Home', '>', 55),
+    Regra('Porc_BTTS_Y_Away', '>', 55),
+    Regra('Media_GM_Home', '>', 1),
+    Regra('CV_GM_Home', '<', 1),
+    Regra('Media_GM_Away', '>', 1),
+    Regra('CV_GM_Away', '<', 1),
+    Regra('Media_GS_Home', '>', 1),
+    Regra('CV_GS_Home', '<', 1),
+    Regra('Media_GS_Away', '>', 1),
+    Regra('CV_GS_Away', '<', 1),
+], COLUNAS_GOLOS)
+
+ESTRATEGIAS = [LAY_HOME, LAY_AWAY, LAY_0X1, LAY_1X0, OVER_15_FT]
+
+
+def por_nome(nomes=None):
+    """Estratégias de ESTRATEGIAS com os nomes indicados (todas, se nenhum for indicado)."""
+    if not nomes:
+        return ESTRATEGIAS
+    estrategias = {e.nome: e for e in ESTRATEGIAS}
+    desconhecidas = [n for n in nomes if n not in estrategias]
+    if desconhecidas:
+        raise ValueError(f"Estratégias desconhecidas: {desconhecidas}. Disponíveis: {list(estrategias)}")
+    return [estrategias[n] for n in nomes]
+
+
+def impressao_estrategia(estrategia):
+    """Identificador da definição da estratégia: muda sempre que uma regra, um limite ou as colunas mudam."""
+    return hashlib.sha1(repr(tuple(estrategia)).encode("utf-8")).hexdigest()[:16]
+
+
+def colunas_referenciadas(estrategias):
+    """Colunas usadas nas regras das estratégias (sem repetições, pela ordem em que aparecem)."""
+    colunas = {}
+    for estrategia in estrategias:
+        for regra in estrategia.regras:
+            colunas[regra.coluna] = None
+            if regra.menos is not None:
+                colunas[regra.menos] = None
+            if isinstance(regra.valor, str):
+                colunas[regra.valor] = None
+    return list(colunas)
+
+
+def ler_colunas(df, colunas):
+    """Lê as colunas indicadas como arrays float (valores em falta passam a NaN)."""
+    return {coluna: df[coluna].to_numpy(dtype=float, na_value=np.nan) for coluna in colunas}
+
+
+def avaliar_regra(regra, valores):
+    """Máscara booleana de uma regra sobre os arrays de valores. NaN nunca satisfaz a regra."""
+    esquerda = valores[regra.coluna]
+    if regra.menos is not None:
+        esquerda = esquerda - valores[regra.menos]
+    direita = valores[regra.valor] if isinstance(regra.valor, str) else regra.valor
+    with np.errstate(invalid="ignore"):
+        return OPERADORES[regra.operador](esquerda, direita)
+
+
+@medido("filtros")
+def avaliar_estrategias(df_jogos_do_dia, estrategias=ESTRATEGIAS):
+    """Avalia todas as estratégias numa só passagem. Devolve {nome: máscara booleana por jogo}.
+
+    Cada coluna referenciada é lida uma única vez e cada regra repetida entre
+    estratégias é avaliada uma única vez. Valores em falta nunca satisfazem uma regra.
+    """
+    valores = ler_colunas(df_jogos_do_dia, colunas_referenciadas(estrategias))
+    avaliadas = {}
+    mascaras = {}
+    for estrategia in estrategias:
+        mascara = np.ones(len(df_jogos_do_dia), dtype=bool)
+        for regra in estrategia.regras:
+            if regra not in avaliadas:
+                avaliadas[regra] = avaliar_regra(regra, valores)
+            mascara &= avaliadas[regra]
+        mascaras[estrategia.nome] = mascara
+    return mascaras
+
+
+def selecionar_jogos(df_jogos_do_dia, estrategia, mascara):
+    """Tabela dos jogos selecionados por uma estratégia, ordenada pela hora."""
+    selecionados = df_jogos_do_dia.loc[mascara, estrategia.colunas]
+    selecionados = selecionados.sort_values(by='Time', ascending=True)
+    return drop_reset_index(selecionados)
+
+
+def aplicar_estrategias(df_jogos_do_dia, estrategias=ESTRATEGIAS):
+    """Avalia as estratégias numa só passagem e devolve {nome: tabela dos jogos selecionados}."""
+    mascaras = avaliar_estrategias(df_jogos_do_dia, estrategias)
+    return {e.nome: selecionar_jogos(df_jogos_do_dia, e, mascaras[e.nome]) for e in estrategias}
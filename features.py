@@ -0,0 +1,329 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from esquemas import COLUNAS_GOLOS
+from golos_minutos import SEM_GOLOS, parse_minutos, primeiro_minuto
+from indice_equipas import LOCAIS, codificar_coluna
+
+# Número de jogos anteriores da equipa no mesmo local usados em cada estatística
+JANELA_FEATURES = 10
+# Com menos jogos anteriores do que isto as estatísticas ficam em falta (NaN)
+MIN_JOGOS = 3
+
+# Métricas por jogo, do ponto de vista da equipa no local (Home: equipa da casa, Away: visitante)
+METRICAS = [
+    "GM", "GS", "GM_1P", "GS_1P", "SG", "CGM_01", "CGS_01", "CGM_02", "CGS_02", "Ptos", "pwr",
+    "RPS_MO", "RPS_OvUn", "RPS_BTTS", "Prob", "Prim_Golo_Marcado", "Prim_Golo_Sofrido",
+    "Marcou_Primeiro", "Sofreu_Primeiro", "Marcou_Primeiro_1P", "Sofreu_Primeiro_1P",
+    "BTTS_Y", "Win_HT", "Win_FT", "Over05HT", "Under05HT", "Over15HT", "Under15HT",
+    "Over05FT", "Under05FT", "Over15FT", "Under15FT", "Over25FT", "Under25FT", "Score_Min_1G", "Took_Min_1G",
+]
+_M = {nome: i for i, nome in enumerate(METRICAS)}
+
+# (coluna de saída, métrica, agregação): media, cv (desvio padrão / |média|) ou porc (média x 100)
+FEATURES = [
+    ("Media_GM_{local}", "GM", "media"), ("CV_GM_{local}", "GM", "cv"),
+    ("Media_GS_{local}", "GS", "media"), ("CV_GS_{local}", "GS", "cv"),
+    ("Media_GM_{local}_1P", "GM_1P", "media"), ("CV_GM_{local}_1P", "GM_1P", "cv"),
+    ("Media_GS_{local}_1P", "GS_1P", "media"), ("CV_GS_{local}_1P", "GS_1P", "cv"),
+    ("Media_SG_{local}", "SG", "media"), ("CV_SG_{local}", "SG", "cv"),
+    ("Media_CGM_{local}_01", "CGM_01", "media"), ("CV_CGM_{local}_01", "CGM_01", "cv"),
+    ("Media_CGS_{local}_01", "CGS_01", "media"), ("CV_CGS_{local}_01", "CGS_01", "cv"),
+    ("Media_CGM_{local}_02", "CGM_02", "media"), ("CV_CGM_{local}_02", "CGM_02", "cv"),
+    ("Media_CGS_{local}_02", "CGS_02", "media"), ("CV_CGS_{local}_02", "CGS_02", "cv"),
+    ("Media_Ptos_{local}", "Ptos", "media"), ("CV_Ptos_{local}", "Ptos", "cv"),
+    ("Med_Power_Ranking_{local}", "pwr", "media"), ("CV_pwr_{local}", "pwr", "cv"),
+    ("Media_RPS_MO_{local}", "RPS_MO", "media"), ("CV_RPS_MO_{local}", "RPS_MO", "cv"),
+    ("Media_RPS_OvUn_{local}", "RPS_OvUn", "media"), ("CV_RPS_OvUn_{local}", "RPS_OvUn", "cv"),
+    ("Media_RPS_BTTS_{local}", "RPS_BTTS", "media"), ("CV_RPS_BTTS_{local}", "RPS_BTTS", "cv"),
+    ("Media_Prob_{local}", "Prob", "media"), ("CV_Med_Prob_{local}", "Prob", "cv"),
+    ("Med_Prim_Golo_Marcado_{local}", "Prim_Golo_Marcado", "media"),
+    ("Med_Prim_Golo_Sofrido_{local}", "Prim_Golo_Sofrido", "media"),
+    ("Porc_Marcou_Primeiro_Golo_{local}", "Marcou_Primeiro", "porc"),
+    ("Porc_Sofreu_Primeiro_Golo_{local}", "Sofreu_Primeiro", "porc"),
+    ("Porc_Marcou_Primeiro_Golo_{local}_1P", "Marcou_Primeiro_1P", "porc"),
+    ("Porc_Sofreu_Primeiro_Golo_{local}_1P", "Sofreu_Primeiro_1P", "porc"),
+    ("Porc_BTTS_Y_{local}", "BTTS_Y", "porc"),
+    ("Porc_{local}_Win_HT", "Win_HT", "porc"), ("Porc_{local}_Win_FT", "Win_FT", "porc"),
+    ("Porc_Over05HT_{local}", "Over05HT", "porc"), ("Porc_Under05HT_{local}", "Under05HT", "porc"),
+    ("Porc_Over15HT_{local}", "Over15HT", "porc"), ("Porc_Under15HT_{local}", "Under15HT", "porc"),
+    ("Porc_Over05FT_{local}", "Over05FT", "porc"), ("Porc_Under05FT_{local}", "Under05FT", "porc"),
+    ("Porc_Over15FT_{local}", "Over15FT", "porc"), ("Porc_Under15FT_{local}", "Under15FT", "porc"),
+    ("Porc_Over25FT_{local}", "Over25FT", "porc"), ("Porc_Under25FT_{local}", "Under25FT", "porc"),
+    ("Porc_Score_Min_1G_{local}", "Score_Min_1G", "porc"), ("Porc_Took_Min_1G_{local}", "Took_Min_1G", "porc"),
+]
+
+
+def _coluna(df, nome):
+    if nome not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[nome], errors="coerce").to_numpy(dtype=float)
+
+
+def _normalizar(*odds):
+    """Probabilidades implícitas (1 / odd) normalizadas para somarem 1."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inversos = [1.0 / o for o in odds]
+        soma = sum(inversos)
+        return [i / soma for i in inversos]
+
+
+def _primeiro_golo(jogos, local):
+    """Minuto do primeiro golo da equipa em cada jogo (NaN se não marcou ou sem a coluna Goals_Minutes)."""
+    coluna = f"Goals_Minutes_{local}"
+    if coluna not in jogos.columns:
+        return np.full(len(jogos), np.nan)
+    primeiro = primeiro_minuto(parse_minutos(jogos[coluna])).astype(float)
+    primeiro[primeiro == SEM_GOLOS] = np.nan
+    return primeiro
+
+
+def probabilidades_jogo(jogos):
+    """Colunas do próprio jogo (não dependem do histórico): probabilidades das odds de Over 1,5 e BTTS."""
+    over15, under15 = _normalizar(_coluna(jogos, "FT_Odd_Over15"), _coluna(jogos, "FT_Odd_Under15"))
+    btts_y, btts_n = _normalizar(_coluna(jogos, "Odd_BTTS_Yes"), _coluna(jogos, "Odd_BTTS_No"))
+    return pd.DataFrame({
+        "FT_Odd_Ov25": _coluna(jogos, "FT_Odd_Over25"),
+        "Prob_Ov15_FT": over15, "Prob_Un15_FT": under15, "Prob_BTTS_Y_FT": btts_y, "Prob_BTTS_N_FT": btts_n,
+    }, index=jogos.index)
+
+
+def metricas_por_jogo(jogos):
+    """Métricas de cada jogo para cada local: {local: array (len(METRICAS), n_jogos)}.
+
+    Jogos sem resultado (p.ex. os jogos do dia) ficam com NaN nas métricas de resultado.
+    CG_01 são os golos divididos pela probabilidade de vitória da equipa e CG_02 os golos
+    multiplicados por ela; pwr é 50 + 50 x (pontos - pontos esperados pelas odds) / 3.
+    """
+    ft = {"Home": _coluna(jogos, "FT_Goals_H"), "Away": _coluna(jogos, "FT_Goals_A")}
+    ht = {"Home": _coluna(jogos, "HT_Goals_H"), "Away": _coluna(jogos, "HT_Goals_A")}
+    p_h, p_d, p_a = _normalizar(_coluna(jogos, "FT_Odd_H"), _coluna(jogos, "FT_Odd_D"), _coluna(jogos, "FT_Odd_A"))
+    p_over25, _ = _normalizar(_coluna(jogos, "FT_Odd_Over25"), _coluna(jogos, "FT_Odd_Under25"))
+    p_btts, _ = _normalizar(_coluna(jogos, "Odd_BTTS_Yes"), _coluna(jogos, "Odd_BTTS_No"))
+    prob_vitoria = {"Home": p_h, "Away": p_a}
+    primeiro = {local: _primeiro_golo(jogos, local) for local in LOCAIS}
+    tem_minutos = all(f"Goals_Minutes_{local}" in jogos.columns for local in LOCAIS)
+
+    total_ft = ft["Home"] + ft["Away"]
+    total_ht = ht["Home"] + ht["Away"]
+    resultado = np.isfinite(total_ft)
+    o_h, o_d = ft["Home"] > ft["Away"], ft["Home"] == ft["Away"]
+    rps_mo = 0.5 * ((p_h - o_h) ** 2 + (p_h + p_d - o_h - o_d) ** 2)
+    rps_ovun = (p_over25 - (total_ft > 2.5)) ** 2
+    btts = (ft["Home"] > 0) & (ft["Away"] > 0)
+    rps_btts = (p_btts - btts) ** 2
+
+    metricas = {}
+    for local, contrario in (("Home", "Away"), ("Away", "Home")):
+        gm, gs = ft[local], ft[contrario]
+        prob = prob_vitoria[local]
+        pontos = np.where(gm > gs, 3.0, np.where(gm == gs, 1.0, 0.0))
+        pontos_esperados = 3 * prob + p_d
+        marcado, sofrido = primeiro[local], primeiro[contrario]
+        marcou_primeiro = np.isfinite(marcado) & ~(sofrido <= marcado)
+        sofreu_primeiro = np.isfinite(sofrido) & ~(marcado <= sofrido)
+        m = np.empty((len(METRICAS), len(jogos)))
+        colunas = {
+            "GM": gm, "GS": gs, "GM_1P": ht[local], "GS_1P": ht[contrario], "SG": gm - gs,
+            "CGM_01": gm / prob, "CGS_01": gs / prob, "CGM_02": gm * prob, "CGS_02": gs * prob,
+            "Ptos": pontos, "pwr": 50 + 50 * (pontos - pontos_esperados) / 3,
+            "RPS_MO": rps_mo, "RPS_OvUn": rps_ovun, "RPS_BTTS": rps_btts, "Prob": prob,
+            "Prim_Golo_Marcado": marcado, "Prim_Golo_Sofrido": sofrido,
+            "Marcou_Primeiro": marcou_primeiro, "Sofreu_Primeiro": sofreu_primeiro,
+            "Marcou_Primeiro_1P": marcou_primeiro & (marcado <= 45), "Sofreu_Primeiro_1P": sofreu_primeiro & (sofrido <= 45),
+            "BTTS_Y": btts, "Win_HT": ht[local] > ht[contrario], "Win_FT": gm > gs,
+            "Over05HT": total_ht > 0.5, "Under05HT": total_ht < 0.5, "Over15HT": total_ht > 1.5, "Under15HT": total_ht < 1.5,
+            "Over05FT": total_ft > 0.5, "Under05FT": total_ft < 0.5, "Over15FT": total_ft > 1.5, "Under15FT": total_ft < 1.5,
+            "Over25FT": total_ft > 2.5, "Under25FT": total_ft < 2.5, "Score_Min_1G": gm >= 1, "Took_Min_1G": gs >= 1,
+        }
+        for nome, valores in colunas.items():
+            m[_M[nome]] = valores
+        # Sem resultado não há métricas; o minuto do primeiro golo só existe quando houve golo
+        m[:, ~resultado] = np.nan
+        m[_M["Prim_Golo_Marcado"], ~np.isfinite(marcado)] = np.nan
+        m[_M["Prim_Golo_Sofrido"], ~np.isfinite(sofrido)] = np.nan
+        if not tem_minutos:
+            for nome in ("Marcou_Primeiro", "Sofreu_Primeiro", "Marcou_Primeiro_1P", "Sofreu_Primeiro_1P"):
+                m[_M[nome]] = np.nan
+        metricas[local] = m
+    return metricas
+
+
+def _estatisticas(soma, soma_q, n, jogos, min_jogos):
+    """Colunas de FEATURES de um local a partir das somas da janela (arrays len(METRICAS) x n_linhas)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media = soma / n
+        desvio = np.sqrt(np.maximum(soma_q - soma * media, 0) / (n - 1))
+        cv = desvio / np.abs(media)
+    agregacoes = {"media": media, "cv": cv, "porc": media * 100}
+    resultado = np.stack([agregacoes[agregacao][_M[metrica]] for _, metrica, agregacao in FEATURES])
+    resultado[:, jogos < min_jogos] = np.nan
+    return resultado
+
+
+def _montar(jogos, estatisticas):
+    """DataFrame final: features Home e Away e as colunas do próprio jogo."""
+    colunas = {}
+    for local in LOCAIS:
+        for j, (nome, _, _) in enumerate(FEATURES):
+            colunas[nome.format(local=local)] = estatisticas[local][j]
+    features = pd.DataFrame(colunas, index=jogos.index)
+    return pd.concat([features, probabilidades_jogo(jogos)], axis=1)
+
+
+def _datas(jogos):
+    return pd.to_datetime(jogos["Date"]).to_numpy("datetime64[ns]").astype("int64")
+
+
+def _ordenar(codigos, datas):
+    """Ordem por (equipa, data), estável, e o início do grupo da equipa de cada linha ordenada."""
+    ordem = np.lexsort((datas, codigos))
+    codigos_o = codigos[ordem]
+    novo_grupo = np.concatenate(([True], codigos_o[1:] != codigos_o[:-1]))
+    posicoes = np.arange(len(ordem))
+    return ordem, novo_grupo, np.maximum.accumulate(np.where(novo_grupo, posicoes, 0))
+
+
+def construir_features(base_dados, jogos=None, janela=JANELA_FEATURES, min_jogos=MIN_JOGOS):
+    """Features de cada jogo calculadas só com os jogos anteriores à sua data (sem fuga de informação).
+
+    Se 'jogos' for indicado (p.ex. os jogos do dia), as features são as desses jogos;
+    caso contrário são as de todos os jogos da base de dados. As janelas móveis por
+    (equipa, local) são calculadas por diferenças de somas acumuladas, sem ciclos por equipa.
+    """
+    alvo = base_dados if jogos is None else jogos
+    todos = base_dados if jogos is None else pd.concat([base_dados, jogos], ignore_index=True)
+    inicio_alvo = 0 if jogos is None else len(base_dados)
+    metricas = metricas_por_jogo(todos)
+    datas = _datas(todos)
+
+    estatisticas = {}
+    for local in LOCAIS:
+        codigos, _ = codificar_coluna(todos[local].astype(str))
+        ordem, novo_grupo, inicio_grupo = _ordenar(codigos, datas)
+        datas_o = datas[ordem]
+        valores = metricas[local][:, ordem]
+        validos = np.isfinite(valores)
+        valores[~validos] = 0.0
+        # Somas acumuladas com um zero no início: a soma das linhas [a, b) é C[:, b] - C[:, a]
+        acumulado = []
+        for x in (valores, valores ** 2, validos):
+            c = np.zeros((len(METRICAS), len(ordem) + 1))
+            np.cumsum(x, axis=1, out=c[:, 1:])
+            acumulado.append(c)
+        jogou = acumulado[2][_M["GM"]]
+        # A janela termina no primeiro jogo da equipa com a mesma data (exclusive) e começa até 'janela' jogos
+        # com resultado antes: os jogos pedidos sem resultado (p.ex. de vários dias) não ocupam lugar na janela
+        nova_data = novo_grupo | np.concatenate(([True], datas_o[1:] != datas_o[:-1]))
+        fim = np.maximum.accumulate(np.where(nova_data, np.arange(len(ordem)), 0))
+        inicio = np.maximum(inicio_grupo, np.searchsorted(jogou, jogou[fim] - janela, side="left"))
+
+        soma, soma_q, n = (c[:, fim] - c[:, inicio] for c in acumulado)
+        por_linha = np.empty((len(FEATURES), len(ordem)))
+        por_linha[:, ordem] = _estatisticas(soma, soma_q, n, jogou[fim] - jogou[inicio], min_jogos)
+        estatisticas[local] = por_linha[:, inicio_alvo:]
+    return _montar(alvo, estatisticas)
+
+
+class FeaturesEquipas:
+    """Últimos 'janela' jogos de cada (equipa, local), para calcular as features de um novo dia
+    sem percorrer o histórico; novos resultados entram com aplicar()."""
+
+    def __init__(self, base_dados, janela=JANELA_FEATURES, min_jogos=MIN_JOGOS):
+        self.base_dados = base_dados
+        self.janela = janela
+        self.min_jogos = min_jogos
+        self._equipas = {}
+        self._janelas = {}
+        self._datas = {}
+        metricas = metricas_por_jogo(base_dados)
+        datas = _datas(base_dados)
+        for local in LOCAIS:
+            codigos, mapa = codificar_coluna(base_dados[local].astype(str))
+            self._equipas[local] = dict(mapa)
+            self._janelas[local] = np.full((len(mapa), janela, len(METRICAS)), np.nan)
+            self._datas[local] = np.full((len(mapa), janela), np.iinfo(np.int64).min)
+            # Os jogos mais recentes de cada equipa ocupam as últimas posições da janela
+            ordem, novo_grupo, _ = _ordenar(codigos, datas)
+            fim_grupo = np.append(np.flatnonzero(novo_grupo)[1:], len(ordem))
+            fim_grupo = np.repeat(fim_grupo, np.diff(np.append(np.flatnonzero(novo_grupo), len(ordem))))
+            desde_o_fim = fim_grupo - np.arange(len(ordem)) - 1
+            recentes = desde_o_fim < janela
+            linhas, slots = codigos[ordem][recentes], janela - 1 - desde_o_fim[recentes]
+            self._janelas[local][linhas, slots] = metricas[local][:, ordem[recentes]].T
+            self._datas[local][linhas, slots] = datas[ordem[recentes]]
+
+    def _linha(self, local, team):
+        linha = self._equipas[local].get(team)
+        if linha is None:
+            linha = len(self._equipas[local])
+            self._equipas[local][team] = linha
+            self._janelas[local] = np.concatenate([self._janelas[local], np.full((1, self.janela, len(METRICAS)), np.nan)])
+            self._datas[local] = np.concatenate([self._datas[local], np.full((1, self.janela), np.iinfo(np.int64).min)])
+        return linha
+
+    def aplicar(self, novos_jogos):
+        """Acrescenta os resultados de novos jogos às janelas. Devolve o número de jogos aplicados."""
+        metricas = metricas_por_jogo(novos_jogos)
+        datas = _datas(novos_jogos)
+        for i in np.argsort(datas, kind="stable"):
+            for local in LOCAIS:
+                linha = self._linha(local, str(novos_jogos[local].iloc[i]))
+                self._janelas[local][linha] = np.roll(self._janelas[local][linha], -1, axis=0)
+                self._datas[local][linha] = np.roll(self._datas[local][linha], -1)
+                self._janelas[local][linha, -1] = metricas[local][:, i]
+                self._datas[local][linha, -1] = datas[i]
+        return len(novos_jogos)
+
+    def features(self, jogos):
+        """Features dos jogos indicados a partir das janelas (só jogos com data anterior à de cada jogo).
+
+        Os resultados do próprio dia devem ser aplicados depois de calcular as features desse dia.
+        """
+        datas = _datas(jogos)
+        estatisticas = {}
+        for local in LOCAIS:
+            linhas = np.array([self._equipas[local].get(t, -1) for t in jogos[local].astype(str)], dtype=np.int64)
+            conhecida = linhas >= 0
+            janelas = np.full((len(jogos), self.janela, len(METRICAS)), np.nan)
+            janelas[conhecida] = self._janelas[local][linhas[conhecida]]
+            datas_janela = np.full((len(jogos), self.janela), np.iinfo(np.int64).max)
+            datas_janela[conhecida] = self._datas[local][linhas[conhecida]]
+            jogou = np.isfinite(janelas[:, :, _M["GM"]]) & (datas_janela < datas[:, None])
+            janelas[~jogou] = np.nan
+            validos = np.isfinite(janelas)
+            valores = np.where(validos, janelas, 0.0)
+            estatisticas[local] = _estatisticas(
+                valores.sum(axis=1).T, (valores ** 2).sum(axis=1).T, validos.sum(axis=1).T, jogou.sum(axis=1),
+                self.min_jogos,
+            )
+        return _montar(jogos, estatisticas)
+
+
+_ultimo = None
+_lock = threading.Lock()
+
+
+def obter_features(base_dados):
+    """Janelas de features da base de dados, construídas uma vez por versão (ver obter_indice)."""
+    global _ultimo
+    with _lock:
+        if _ultimo is None or _ultimo.base_dados is not base_dados:
+            _ultimo = FeaturesEquipas(base_dados)
+        return _ultimo
+
+
+def adicionar_features(jogos, base_dados):
+    """Jogos (p.ex. os do Flashscore, só com odds) com as colunas de features que lhes faltam.
+
+    Jogos posteriores a toda a base de dados usam as janelas de obter_features; para dias
+    passados as features são calculadas à data de cada jogo com construir_features, sem os
+    resultados dos próprios jogos (que já estão na base de dados).
+    """
+    if (pd.to_datetime(jogos["Date"]) > base_dados["Date"].max()).all():
+        features = obter_features(base_dados).features(jogos)
+    else:
+        features = construir_features(base_dados, jogos.drop(columns=COLUNAS_GOLOS, errors="ignore"))
+    return pd.concat([jogos, features.drop(columns=[c for c in features.columns if c in jogos.columns])], axis=1)
@@ -0,0 +1,134 @@
+import re
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from indice_equipas import LOCAIS, codificar_coluna
+
+# Limites superiores dos intervalos de 15 minutos (os descontos contam no intervalo do minuto base)
+INTERVALOS = [15, 30, 45, 60, 75, 90]
+ROTULOS_INTERVALOS = ["0-15", "16-30", "31-45", "46-60", "61-75", "76-90"]
+SEM_GOLOS = 127
+
+# Minuto de cada golo: "45+2" conta como 45
+_PADRAO_MINUTO = re.compile(r"(\d+)(?:\s*'?\s*\+\s*\d+)?")
+
+# Estrutura ragged: os minutos do jogo i estão em minutos[offsets[i]:offsets[i + 1]]
+MinutosRagged = namedtuple("MinutosRagged", ["offsets", "minutos"])
+
+
+def parse_minutos(coluna):
+    """Converte uma coluna Goals_Minutes (texto tipo "['12', '45+1']") em offsets int64 e minutos int8."""
+    textos = coluna.astype(object).fillna("").astype(str)
+    contagens = textos.str.count(_PADRAO_MINUTO.pattern).to_numpy(dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(contagens)))
+    # Um único findall sobre todos os textos; o separador não contém dígitos
+    encontrados = _PADRAO_MINUTO.findall("|".join(textos.tolist()))
+    minutos = np.array(encontrados, dtype=np.int64) if encontrados else np.empty(0, dtype=np.int64)
+    return MinutosRagged(offsets, np.clip(minutos, 0, SEM_GOLOS - 1).astype(np.int8))
+
+
+def intervalo(minutos):
+    """Índice do intervalo de 15 minutos de cada minuto (0 = 0-15, ..., 5 = 76-90 e descontos)."""
+    return np.clip((minutos.astype(np.int64) - 1) // 15, 0, len(INTERVALOS) - 1)
+
+
+def _jogo_de_cada_golo(ragged):
+    return np.repeat(np.arange(len(ragged.offsets) - 1), np.diff(ragged.offsets))
+
+
+def primeiro_minuto(ragged):
+    """Minuto do primeiro golo de cada jogo (SEM_GOLOS se não houver)."""
+    contagens = np.diff(ragged.offsets)
+    primeiro = np.full(len(contagens), SEM_GOLOS, dtype=np.int64)
+    com_golos = contagens > 0
+    if com_golos.any():
+        primeiro[com_golos] = np.minimum.reduceat(ragged.minutos.astype(np.int64), ragged.offsets[:-1][com_golos])
+    return primeiro
+
+
+class MinutosGolos:
+    """Minutos dos golos de todos os jogos e estatísticas de tempo dos golos por equipa e local."""
+
+    def __init__(self, base_dados):
+        self.base_dados = base_dados
+        self.golos = {local: parse_minutos(base_dados[f"Goals_Minutes_{local}"]) for local in LOCAIS}
+        self._jogo = {local: _jogo_de_cada_golo(r) for local, r in self.golos.items()}
+        self._primeiro = np.minimum(primeiro_minuto(self.golos["Home"]), primeiro_minuto(self.golos["Away"]))
+        self._equipas = {}
+        self._mapas = {}
+        for local in LOCAIS:
+            self._equipas[local], self._mapas[local] = codificar_coluna(base_dados[local])
+
+    def _por_equipa(self, location, colunas):
+        """DataFrame indexado pelo nome da equipa, só com as equipas que jogaram no local."""
+        mapa = self._mapas[location]
+        df = pd.DataFrame(colunas, index=pd.Index(list(mapa), name=location))
+        return df[self.num_jogos(location) > 0]
+
+    def num_jogos(self, location="Home"):
+        equipas = self._equipas[location]
+        return np.bincount(equipas[equipas >= 0], minlength=len(self._mapas[location]))
+
+    def _somar(self, location, jogo, pesos=None, grupos=1, grupo=0):
+        """Soma por equipa (e grupo) de valores por jogo, normalizada pelo número de jogos da equipa."""
+        equipas = self._equipas[location][jogo]
+        validos = equipas >= 0
+        n_equipas = len(self._mapas[location])
+        indices = equipas[validos] * grupos + (grupo[validos] if grupos > 1 else 0)
+        total = np.bincount(indices, weights=None if pesos is None else pesos[validos], minlength=n_equipas * grupos)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return total.reshape(n_equipas, grupos) / self.num_jogos(location)[:, None]
+
+    def golos_por_intervalo(self, location="Home"):
+        """Média de golos marcados e sofridos por jogo em cada intervalo de 15 minutos."""
+        contrario = "Away" if location == "Home" else "Home"
+        colunas = {}
+        for tipo, lado in (("marcados", location), ("sofridos", contrario)):
+            ragged = self.golos[lado]
+            media = self._somar(location, self._jogo[lado], grupos=len(INTERVALOS), grupo=intervalo(ragged.minutos))
+            colunas.update({f"{tipo}_{r}": media[:, i] for i, r in enumerate(ROTULOS_INTERVALOS)})
+        return self._por_equipa(location, colunas)
+
+    def primeiro_golo(self, location="Home"):
+        """Distribuição do minuto do primeiro golo do jogo (qualquer equipa) e proporção de jogos sem golos."""
+        jogos = np.arange(len(self._primeiro))
+        com_golos = self._primeiro < SEM_GOLOS
+        grupo = np.where(com_golos, intervalo(self._primeiro), len(INTERVALOS))
+        distribuicao = self._somar(location, jogos, grupos=len(INTERVALOS) + 1, grupo=grupo)
+        colunas = {f"primeiro_golo_{r}": distribuicao[:, i] for i, r in enumerate(ROTULOS_INTERVALOS)}
+        colunas["sem_golos"] = distribuicao[:, -1]
+        soma = self._somar(location, jogos[com_golos], pesos=self._primeiro[com_golos].astype(float))[:, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            colunas["minuto_medio"] = soma / (1 - distribuicao[:, -1])
+        return self._por_equipa(location, colunas)
+
+    def prob_golo(self, minuto, location="Home"):
+        """Probabilidade de haver pelo menos um golo até ao minuto (inclusive) e depois dele."""
+        n = len(self._primeiro)
+        antes = np.zeros(n, dtype=bool)
+        depois = np.zeros(n, dtype=bool)
+        for lado in LOCAIS:
+            minutos = self.golos[lado].minutos
+            antes |= np.bincount(self._jogo[lado], weights=minutos <= minuto, minlength=n) > 0
+            depois |= np.bincount(self._jogo[lado], weights=minutos > minuto, minlength=n) > 0
+        jogos = np.arange(n)
+        return self._por_equipa(location, {
+            f"golo_ate_{minuto}": self._somar(location, jogos, pesos=antes.astype(float))[:, 0],
+            f"golo_depois_{minuto}": self._somar(location, jogos, pesos=depois.astype(float))[:, 0],
+        })
+
+
+_ultimo = None
+_lock = threading.Lock()
+
+
+def obter_minutos_golos(base_dados):
+    """Devolve os minutos dos golos da base de dados, analisados uma vez por versão (ver obter_indice)."""
+    global _ultimo
+    with _lock:
+        if _ultimo is None or _ultimo.base_dados is not base_dados:
+            _ultimo = MinutosGolos(base_dados)
+        return _ultimo
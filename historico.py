@@ -0,0 +1,301 @@
+"""Histórico de resultados particionado por (temporada, liga), alimentado pela base de dados.
+
+As páginas só leem fatias do histórico; a ingestão de uma versão nova da base de dados
+é um passo à parte, que pode ser corrido fora do Streamlit (p.ex. num cron):
+    python historico.py
+    python historico.py --pasta /dados/historico
+"""
+import argparse
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+try:
+    import fcntl
+except ImportError:  # Windows: a ingestão só fica protegida dentro do processo
+    fcntl = None
+
+from base_de_dados import (
+    CACHE_DIR, COLUNAS_SELECIONADAS, TIPOS_LEITURA, base_de_dados_em_memoria, carregar_base_de_dados,
+    gravar_snapshot, tipar_base_de_dados, versao_base_de_dados,
+)
+
+# Pasta do histórico particionado (pode ser alterada por variável de ambiente)
+PASTA_HISTORICO = os.environ.get("FLUFFY_PASTA_HISTORICO", os.path.join(CACHE_DIR, "historico"))
+
+# Número de fatias (equipas de um dia) guardadas em memória
+MAX_FATIAS = 4
+
+# Número de versões da base de dados ingeridas que o manifesto recorda
+MAX_VERSOES_BASE = 20
+
+# Um jogo é identificado pela data e pelas equipas; um jogo repetido numa ingestão é ignorado
+COLUNAS_CHAVE = ["Date", "Home", "Away"]
+
+
+def nome_particao(temporada, liga):
+    """Pasta relativa da partição (temporada, liga); os nomes são codificados para serem seguros no disco."""
+    return os.path.join(quote(str(temporada), safe=""), quote(str(liga), safe=""))
+
+
+def _chaves(df):
+    return pd.MultiIndex.from_arrays([pd.to_datetime(df["Date"]), df["Home"].astype(str), df["Away"].astype(str)])
+
+
+class HistoricoParticionado:
+    """Histórico de resultados em ficheiros Parquet por (temporada, liga), só com acréscimos.
+
+    Cada ingestão escreve um ficheiro novo apenas nas partições que recebem jogos novos;
+    os ficheiros existentes nunca são reescritos. O manifesto (manifesto.json) guarda,
+    por partição, os ficheiros, o número de linhas e as datas mínima e máxima, e as últimas
+    versões da base de dados ingeridas ("versoes_base"). As ingestões de vários processos
+    são serializadas por um lock no ficheiro .lock da pasta.
+    """
+
+    def __init__(self, pasta=PASTA_HISTORICO):
+        self.pasta = pasta
+        self._lock = threading.Lock()
+
+    @property
+    def caminho_manifesto(self):
+        return os.path.join(self.pasta, "manifesto.json")
+
+    def manifesto(self):
+        """Conteúdo do manifesto (vazio se o histórico ainda não existir)."""
+        try:
+            with open(self.caminho_manifesto, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"versao": 0, "particoes": {}, "ultima_ingestao": None}
+
+    def _gravar_manifesto(self, manifesto):
+        os.makedirs(self.pasta, exist_ok=True)
+        with open(self.caminho_manifesto + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=1)
+        os.replace(self.caminho_manifesto + ".tmp", self.caminho_manifesto)
+
+    @property
+    def versao(self):
+        """Número de ingestões com jogos novos (muda sempre que o histórico muda)."""
+        return self.manifesto()["versao"]
+
+    def particoes(self, temporadas=None, ligas=None, equipas=None):
+        """Entradas do manifesto das partições pedidas (todas, se não houver filtro).
+
+        Com 'equipas', ficam só as partições onde alguma delas jogou (as partições
+        sem a lista de equipas no manifesto ficam sempre).
+        """
+        temporadas = None if temporadas is None else {str(t) for t in temporadas}
+        ligas = None if ligas is None else {str(l) for l in ligas}
+        equipas = None if equipas is None else {str(e) for e in equipas}
+        return [
+            p for p in self.manifesto()["particoes"].values()
+            if (temporadas is None or p["temporada"] in temporadas) and (ligas is None or p["liga"] in ligas)
+            and (equipas is None or "equipas" not in p or not equipas.isdisjoint(p["equipas"]))
+        ]
+
+    def ficheiros(self, temporadas=None, ligas=None, equipas=None):
+        return [os.path.join(self.pasta, f) for p in self.particoes(temporadas, ligas, equipas) for f in p["ficheiros"]]
+
+    @contextlib.contextmanager
+    def _bloqueio(self):
+        """Lock da ingestão: entre threads (self._lock) e entre processos (flock em <pasta>/.lock)."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(self.pasta, exist_ok=True)
+            with open(os.path.join(self.pasta, ".lock"), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def ingerida(self, versao_base, manifesto=None):
+        """True se a versão 'versao_base' da base de dados já foi ingerida."""
+        return versao_base in (manifesto or self.manifesto()).get("versoes_base", [])
+
+    def ingerir(self, resultados, versao_base=None):
+        """Acrescenta os jogos que ainda não existem no histórico.
+
+        Só são lidas (as chaves) e escritas as partições das temporadas/ligas presentes em
+        'resultados'. Com 'versao_base' (a versão da base de dados de onde vêm os resultados),
+        uma versão já ingerida é ignorada. Devolve {partição: linhas novas}.
+        """
+        novos = tipar_base_de_dados(resultados[[c for c in COLUNAS_SELECIONADAS if c in resultados.columns]])
+        novos = novos[~_chaves(novos).duplicated()]
+        with self._bloqueio():
+            # Relido dentro do lock: outro processo pode ter acabado de ingerir a mesma versão
+            manifesto = self.manifesto()
+            if versao_base is not None and self.ingerida(versao_base, manifesto):
+                return {}
+            adicionados = {}
+            instante = time.time_ns()
+            for (temporada, liga), grupo in novos.groupby(["Season", "League"], observed=True, sort=True):
+                nome = nome_particao(temporada, liga)
+                entrada = manifesto["particoes"].get(nome)
+                if entrada is not None:
+                    existentes = pd.read_parquet(
+                        [os.path.join(self.pasta, f) for f in entrada["ficheiros"]], engine="pyarrow", columns=COLUNAS_CHAVE
+                    )
+                    grupo = grupo[~_chaves(grupo).isin(_chaves(existentes))]
+                if grupo.empty:
+                    continue
+                ficheiro = os.path.join(nome, f"parte-{instante}.parquet")
+                caminho = os.path.join(self.pasta, ficheiro)
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                gravar_snapshot(grupo.sort_values("Date", kind="stable"), caminho + ".tmp")
+                os.replace(caminho + ".tmp", caminho)
+
+                datas = pd.to_datetime(grupo["Date"])
+                if entrada is None:
+                    entrada = {"temporada": str(temporada), "liga": str(liga), "ficheiros": [], "linhas": 0,
+                               "data_min": None, "data_max": None}
+                    manifesto["particoes"][nome] = entrada
+                entrada["ficheiros"].append(ficheiro)
+                entrada["linhas"] += len(grupo)
+                entrada["equipas"] = sorted(
+                    set(entrada.get("equipas", [])) | set(grupo["Home"].astype(str)) | set(grupo["Away"].astype(str))
+                )
+                data_min, data_max = datas.min().date().isoformat(), datas.max().date().isoformat()
+                entrada["data_min"] = min(filter(None, [entrada["data_min"], data_min]))
+                entrada["data_max"] = max(filter(None, [entrada["data_max"], data_max]))
+                adicionados[nome] = len(grupo)
+
+            if adicionados:
+                manifesto["versao"] += 1
+                manifesto["ultima_ingestao"] = {
+                    "em": datetime.now().isoformat(timespec="seconds"), "linhas": sum(adicionados.values()),
+                    "particoes": adicionados,
+                }
+            if versao_base is not None:
+                manifesto["versoes_base"] = (manifesto.get("versoes_base", []) + [versao_base])[-MAX_VERSOES_BASE:]
+            if adicionados or versao_base is not None:
+                self._gravar_manifesto(manifesto)
+            return adicionados
+
+    def ler(self, temporadas=None, ligas=None, colunas=None, equipas=None):
+        """Jogos das partições pedidas, tipados como a base de dados e ordenados pela data.
+
+        Com 'equipas', só são lidas as partições onde elas jogaram e, dentro delas, só as
+        linhas em que são Home ou Away (o filtro é aplicado pelo pyarrow na leitura).
+        """
+        ficheiros = self.ficheiros(temporadas, ligas, equipas)
+        if not ficheiros:
+            return tipar_base_de_dados(pd.DataFrame({c: pd.Series(dtype=TIPOS_LEITURA.get(c, "object"))
+                                                     for c in colunas or COLUNAS_SELECIONADAS}))
+        filtro = None
+        if equipas is not None:
+            equipas = sorted({str(e) for e in equipas})
+            filtro = ds.field("Home").isin(equipas) | ds.field("Away").isin(equipas)
+        base_dados = ds.dataset(ficheiros, format="parquet").to_table(columns=colunas, filter=filtro).to_pandas()
+        return tipar_base_de_dados(base_dados.sort_values("Date", kind="stable") if "Date" in base_dados.columns else base_dados)
+
+
+def importar_base_de_dados(base_dados, pasta=PASTA_HISTORICO):
+    """Cria (ou completa) o histórico particionado a partir da base de dados monolítica."""
+    return HistoricoParticionado(pasta).ingerir(base_dados)
+
+
+historico = HistoricoParticionado()
+_fatias = OrderedDict()
+_lock = threading.Lock()
+
+
+def atualizar_historico(historico=historico):
+    """Passo de ingestão: carrega a base de dados e acrescenta ao histórico os jogos novos.
+
+    É o único caminho que pede a base de dados completa com o histórico já criado; uma versão
+    já ingerida (por este ou por outro processo) não volta a ser escrita. Devolve {partição: linhas novas}.
+    """
+    base_dados = carregar_base_de_dados()
+    return historico.ingerir(base_dados, versao_base_de_dados())
+
+
+def _atualizar(historico):
+    """Garante que o histórico existe e acompanha a base de dados que este processo já tem em memória.
+
+    A versão em memória é comparada com o manifesto antes de carregar o que quer que seja:
+    a base completa só é pedida para criar o histórico, na primeira utilização. Devolve a
+    base de dados completa se o histórico não puder ser escrito nem tiver partições.
+    """
+    manifesto = historico.manifesto()
+    if not manifesto["particoes"]:
+        base_dados = carregar_base_de_dados()
+        try:
+            historico.ingerir(base_dados, versao_base_de_dados())
+        except OSError:
+            return base_dados  # Sem disco disponível é usada a base completa
+        return None
+
+    base_dados, versao_base = base_de_dados_em_memoria()
+    if base_dados is not None and not historico.ingerida(versao_base, manifesto):
+        # Uma versão mais recente já carregada por outra página é ingerida sem novos pedidos
+        try:
+            historico.ingerir(base_dados, versao_base)
+        except OSError:
+            pass  # Continua a ser usado o histórico existente
+    return None
+
+
+def _fatia(historico, filtro, valores):
+    """Fatia do histórico lida com historico.ler(**{filtro: valores}), guardada por versão do histórico.
+
+    Antes de ler, uma versão da base de dados em memória que ainda não esteja no histórico é
+    ingerida, o que muda a versão do manifesto e, com ela, as fatias em memória.
+    """
+    base_dados = _atualizar(historico)
+    if base_dados is not None:
+        return base_dados
+
+    chave = (historico.pasta, historico.versao, filtro, valores)
+    with _lock:
+        if chave in _fatias:
+            _fatias.move_to_end(chave)
+            return _fatias[chave]
+    base_dados = historico.ler(**{filtro: valores})
+    with _lock:
+        _fatias[chave] = base_dados
+        while len(_fatias) > MAX_FATIAS:
+            _fatias.popitem(last=False)
+    return base_dados
+
+
+def carregar_historico_equipas(jogos, historico=historico):
+    """Histórico só das equipas de 'jogos' (Home e Away), lido do histórico particionado.
+
+    Cada fatia é lida uma vez por versão do histórico e partilhada entre sessões (não deve
+    ser alterada).
+    """
+    equipas = frozenset(jogos["Home"].astype(str)) | frozenset(jogos["Away"].astype(str))
+    return _fatia(historico, "equipas", equipas)
+
+
+def carregar_historico_ligas(jogos, historico=historico):
+    """Histórico completo das ligas de 'jogos' (todas as equipas), lido do histórico particionado.
+
+    Como em carregar_historico_equipas, cada fatia é partilhada entre sessões e não deve ser alterada.
+    """
+    return _fatia(historico, "ligas", frozenset(jogos["League"].astype(str)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pasta", default=PASTA_HISTORICO, help="pasta do histórico particionado")
+    args = parser.parse_args()
+    armazem = HistoricoParticionado(args.pasta)
+    adicionados = atualizar_historico(armazem)
+    print(f"{sum(adicionados.values())} jogos novos em {len(adicionados)} partições; versão {armazem.versao} em {args.pasta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+LOCAIS = ("Home", "Away")
+
+
+def codificar_coluna(coluna):
+    """Devolve (códigos inteiros, dicionário nome -> código) para uma coluna de equipas/temporadas."""
+    if isinstance(coluna.dtype, pd.CategoricalDtype):
+        codigos = coluna.cat.codes.to_numpy()
+        valores = coluna.cat.categories
+    else:
+        codigos, valores = pd.factorize(coluna)
+    return codigos, {valor: i for i, valor in enumerate(valores)}
+
+
+class IndiceEquipas:
+    """Índice (equipa, Home/Away) -> posições das linhas ordenadas da data mais recente para a mais antiga.
+
+    É construído uma vez por versão da base de dados; cada consulta custa O(k),
+    onde k é o número de jogos da equipa nesse local.
+    """
+
+    def __init__(self, base_dados):
+        self.base_dados = base_dados
+        datas = pd.to_datetime(base_dados["Date"]).to_numpy("datetime64[ns]").astype("int64")
+        self._posicoes = {}
+        self._inicios = {}
+        self._codigos_equipa = {}
+        for local in LOCAIS:
+            codigos, mapa = codificar_coluna(base_dados[local])
+            # Ordena por equipa e, dentro de cada equipa, pela data decrescente (ordenação estável)
+            ordem = np.lexsort((-datas, codigos))
+            contagens = np.bincount(codigos[codigos >= 0], minlength=len(mapa))
+            inicio_validos = np.count_nonzero(codigos < 0)
+            self._posicoes[local] = ordem
+            self._inicios[local] = inicio_validos + np.concatenate(([0], np.cumsum(contagens)))
+            self._codigos_equipa[local] = mapa
+
+    def posicoes(self, team, location="Home", n=None):
+        """Posições (iloc) dos jogos da equipa no local indicado, do mais recente para o mais antigo."""
+        codigo = self._codigos_equipa[location].get(team)
+        if codigo is None:
+            return np.empty(0, dtype=np.int64)
+        inicio, fim = self._inicios[location][codigo], self._inicios[location][codigo + 1]
+        if n is not None:
+            fim = min(fim, inicio + n)
+        return self._posicoes[location][inicio:fim]
+
+    def segmentos(self, location="Home"):
+        """Todas as equipas de uma vez: (posições, código da equipa, ordem do jogo dentro da equipa, mapa nome -> código).
+
+        A ordem é 0 para o jogo mais recente de cada equipa, 1 para o seguinte, etc.
+        """
+        inicios = self._inicios[location]
+        posicoes = self._posicoes[location][inicios[0]:]
+        tamanhos = np.diff(inicios)
+        equipa = np.repeat(np.arange(len(tamanhos)), tamanhos)
+        ordem = np.arange(len(posicoes)) - (inicios[:-1] - inicios[0])[equipa]
+        return posicoes, equipa, ordem, self._codigos_equipa[location]
+
+    def jogos(self, team, location="Home", n=None):
+        """Jogos da equipa no local indicado, do mais recente para o mais antigo (últimos n, se indicado)."""
+        return self.base_dados.iloc[self.posicoes(team, location, n)]
+
+
+_ultimo = None
+_lock = threading.Lock()
+
+
+def obter_indice(base_dados):
+    """Devolve o índice da base de dados, reconstruindo-o apenas quando a base de dados muda.
+
+    carregar_base_de_dados() devolve o mesmo objeto enquanto a versão não muda,
+    por isso a identidade do DataFrame identifica a versão.
+    """
+    global _ultimo
+    with _lock:
+        if _ultimo is None or _ultimo.base_dados is not base_dados:
+            _ultimo = IndiceEquipas(base_dados)
+        return _ultimo
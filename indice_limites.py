@@ -0,0 +1,183 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from estrategias import avaliar_regra, colunas_referenciadas, impressao_estrategia, ler_colunas
+
+# Bitmaps (regra, limite) e somas acumuladas guardados por índice
+MAX_BITMAPS = 256
+MAX_ACUMULADOS = 16
+
+# Número de índices (estratégia, conjunto de jogos) guardados em memória
+MAX_INDICES = 8
+
+
+if hasattr(np, "bitwise_count"):
+    def _popcount(bitmap):
+        return int(np.bitwise_count(bitmap).sum())
+else:
+    # numpy < 2 não tem bitwise_count: conta os bits depois de os desempacotar
+    def _popcount(bitmap):
+        return int(np.unpackbits(bitmap).sum())
+
+
+class IndiceLimites:
+    """Colunas de uma estratégia ordenadas uma vez, para contar jogos por limite sem reavaliar a tabela.
+
+    Cada expressão com limite numérico (coluna, ou coluna - menos) é ordenada uma vez; os jogos
+    que satisfazem "expressão OPERADOR limite" são um intervalo dessa ordem, encontrado com
+    searchsorted. Cada (regra, limite) dá um bitmap e a contagem é a interseção dos bitmaps.
+    Quando só um limite muda (um slider a ser arrastado), a contagem sai de uma soma acumulada
+    das restantes regras, na ordem da regra que muda: duas procuras binárias por recontagem.
+    As regras entre duas colunas não têm limite e ficam num bitmap fixo.
+    """
+
+    def __init__(self, jogos, estrategia):
+        self.estrategia = estrategia
+        self.n = len(jogos)
+        regras = estrategia.regras
+        valores = ler_colunas(jogos, colunas_referenciadas([estrategia]))
+        self.ajustaveis = [i for i, regra in enumerate(regras) if not isinstance(regra.valor, str)]
+
+        fixa = np.ones(self.n, dtype=bool)
+        for i, regra in enumerate(regras):
+            if i not in self.ajustaveis:
+                fixa &= avaliar_regra(regra, valores)
+        self._fixa = np.packbits(fixa)
+
+        # Ordem e valores ordenados (sem NaN, que nunca satisfazem uma regra) por expressão
+        self._ordem, self._ordenados = {}, {}
+        for i in self.ajustaveis:
+            expressao = (regras[i].coluna, regras[i].menos)
+            if expressao in self._ordem:
+                continue
+            v = valores[regras[i].coluna]
+            if regras[i].menos is not None:
+                v = v - valores[regras[i].menos]
+            ordem = np.argsort(v, kind="stable")
+            validos = int(np.count_nonzero(~np.isnan(v)))
+            self._ordem[expressao] = ordem[:validos]
+            self._ordenados[expressao] = v[ordem[:validos]]
+
+        self._bitmaps = OrderedDict()
+        self._acumulados = OrderedDict()
+        self._anteriores = None
+        self._lock = threading.Lock()
+
+    def _expressao(self, i):
+        regra = self.estrategia.regras[i]
+        return regra.coluna, regra.menos
+
+    def limites(self, limites=None):
+        """Limite de cada regra ajustável: os indicados ({índice: valor}) e, nas restantes, os da estratégia."""
+        limites = limites or {}
+        return {i: float(limites.get(i, self.estrategia.regras[i].valor)) for i in self.ajustaveis}
+
+    def intervalo(self, i, limite):
+        """Posições [a, b) da ordem da regra i cujos jogos satisfazem a regra com este limite."""
+        ordenados = self._ordenados[self._expressao(i)]
+        operador = self.estrategia.regras[i].operador
+        if operador == ">":
+            return int(np.searchsorted(ordenados, limite, side="right")), len(ordenados)
+        if operador == ">=":
+            return int(np.searchsorted(ordenados, limite, side="left")), len(ordenados)
+        if operador == "<":
+            return 0, int(np.searchsorted(ordenados, limite, side="left"))
+        if operador == "<=":
+            return 0, int(np.searchsorted(ordenados, limite, side="right"))
+        return int(np.searchsorted(ordenados, limite, side="left")), int(np.searchsorted(ordenados, limite, side="right"))
+
+    def contar_regra(self, i, limite):
+        """Jogos que satisfazem só a regra i com este limite."""
+        a, b = self.intervalo(i, limite)
+        return b - a
+
+    def _bitmap(self, i, limite):
+        chave = (i, limite)
+        bitmap = self._bitmaps.get(chave)
+        if bitmap is None:
+            a, b = self.intervalo(i, limite)
+            bits = np.zeros(self.n, dtype=bool)
+            bits[self._ordem[self._expressao(i)][a:b]] = True
+            bitmap = self._bitmaps[chave] = np.packbits(bits)
+            while len(self._bitmaps) > MAX_BITMAPS:
+                self._bitmaps.popitem(last=False)
+        else:
+            self._bitmaps.move_to_end(chave)
+        return bitmap
+
+    def _intersecao(self, limites, exceto=None):
+        bitmap = self._fixa.copy()
+        for j, limite in limites.items():
+            if j != exceto:
+                bitmap &= self._bitmap(j, limite)
+        return bitmap
+
+    def _acumulado(self, i, limites):
+        """Soma acumulada das restantes regras, na ordem da regra i (chave: limites das restantes)."""
+        chave = (i, tuple(limite for j, limite in limites.items() if j != i))
+        acumulado = self._acumulados.get(chave)
+        if acumulado is None:
+            restantes = np.unpackbits(self._intersecao(limites, exceto=i), count=self.n).astype(bool)
+            acumulado = np.zeros(len(self._ordem[self._expressao(i)]) + 1, dtype=np.int32)
+            np.cumsum(restantes[self._ordem[self._expressao(i)]], out=acumulado[1:])
+            self._acumulados[chave] = acumulado
+            while len(self._acumulados) > MAX_ACUMULADOS:
+                self._acumulados.popitem(last=False)
+        else:
+            self._acumulados.move_to_end(chave)
+        return acumulado
+
+    def contar(self, limites=None):
+        """Jogos que satisfazem todas as regras com os limites indicados ({índice da regra: valor})."""
+        limites = self.limites(limites)
+        with self._lock:
+            anteriores, self._anteriores = self._anteriores, limites
+            mudou = [i for i in limites if anteriores is not None and limites[i] != anteriores[i]]
+            if len(mudou) == 1:
+                # O mesmo limite a mudar em recontagens seguidas: só procuras binárias
+                i = mudou[0]
+                a, b = self.intervalo(i, limites[i])
+                acumulado = self._acumulado(i, limites)
+                return int(acumulado[b] - acumulado[a])
+            return _popcount(self._intersecao(limites))
+
+    def mascara(self, limites=None):
+        """Máscara booleana dos jogos que satisfazem todas as regras com os limites indicados."""
+        with self._lock:
+            return np.unpackbits(self._intersecao(self.limites(limites)), count=self.n).astype(bool)
+
+    def amplitude(self, i):
+        """Menor e maior valor finito da expressão da regra i; None se não houver valores.
+
+        Os infinitos (p.ex. um CV com média 0) contam nas regras, mas não entram na amplitude do slider.
+        """
+        ordenados = self._ordenados[self._expressao(i)]
+        ordenados = ordenados[np.isfinite(ordenados)]
+        return (float(ordenados[0]), float(ordenados[-1])) if len(ordenados) else None
+
+
+_indices = OrderedDict()
+_lock = threading.Lock()
+
+
+def obter_indice_limites(estrategia, chave, carregar):
+    """Índice da estratégia sobre os jogos de carregar(), construído uma vez por chave e por definição da estratégia.
+
+    'chave' identifica o conjunto de jogos (p.ex. a impressão digital do ficheiro do dia, ou um
+    intervalo de dias fechados); carregar() só é chamado quando o índice ainda não existe. O
+    índice é partilhado entre sessões.
+    """
+    chave = (chave, impressao_estrategia(estrategia))
+    with _lock:
+        indice = _indices.get(chave)
+        if indice is not None:
+            _indices.move_to_end(chave)
+            return indice
+    indice = IndiceLimites(carregar(), estrategia)
+    with _lock:
+        _indices[chave] = indice
+        while len(_indices) > MAX_INDICES:
+            _indices.popitem(last=False)
+    return indice
@@ -0,0 +1,148 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# Ativa a medição das etapas em cada rerun (desligada por omissão)
+ATIVO = os.environ.get("FLUFFY_INSTRUMENTACAO", "") not in ("", "0")
+
+# Ficheiro JSON-lines onde cada rerun medido acrescenta uma linha
+FICHEIRO_TRACES = os.environ.get(
+    "FLUFFY_FICHEIRO_TRACES",
+    os.path.join(
+        os.environ.get("FLUFFY_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")),
+        "traces.jsonl",
+    ),
+)
+
+_local = threading.local()
+_lock_ficheiro = threading.Lock()
+_NULO = contextlib.nullcontext()
+# Linhas extra do painel: nome -> função que devolve o texto (ver registar_estatisticas)
+_estatisticas = {}
+
+
+def _trace_atual():
+    return getattr(_local, "trace", None)
+
+
+@contextlib.contextmanager
+def _medir(nome, trace):
+    # Os elementos desenhados durante a etapa contam nela e nas etapas que a contêm
+    aberta = {"elementos": 0}
+    trace["_abertas"].append(aberta)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        fim = time.perf_counter()
+        trace["_abertas"].remove(aberta)
+        trace["etapas"].append({
+            "nome": nome, "inicio_s": round(inicio - trace["_inicio"], 6), "duracao_s": round(fim - inicio, 6),
+            "elementos": aberta["elementos"],
+        })
+
+
+def etapa(nome):
+    """Context manager que mede uma etapa do rerun atual. Sem instrumentação ativa não faz nada."""
+    if not ATIVO:
+        return _NULO
+    trace = _trace_atual()
+    if trace is None:
+        return _NULO
+    return _medir(nome, trace)
+
+
+def medido(nome):
+    """Decorador equivalente a 'with etapa(nome)' à volta da função."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with etapa(nome):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def contar_elementos(n=1):
+    """Regista n elementos desenhados na página (chamado pelos wrappers de tabelas e pela afinação).
+
+    Contam no total do rerun e em cada etapa aberta. Sem instrumentação ativa não faz nada.
+    """
+    trace = _trace_atual() if ATIVO else None
+    if trace is None:
+        return
+    trace["elementos"] += n
+    for aberta in trace["_abertas"]:
+        aberta["elementos"] += n
+
+
+def resumo(trace):
+    """Tempo total, número de ocorrências e elementos desenhados por etapa, ordenado pelo tempo."""
+    por_etapa = {}
+    for e in trace["etapas"]:
+        total, vezes, elementos = por_etapa.get(e["nome"], (0.0, 0, 0))
+        por_etapa[e["nome"]] = (total + e["duracao_s"], vezes + 1, elementos + e.get("elementos", 0))
+    return sorted(((nome, *valores) for nome, valores in por_etapa.items()), key=lambda x: -x[1])
+
+
+def gravar_trace(trace, caminho=None):
+    """Acrescenta o trace ao ficheiro JSON-lines."""
+    caminho = caminho or FICHEIRO_TRACES
+    linha = json.dumps({k: v for k, v in trace.items() if not k.startswith("_")}, ensure_ascii=False)
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with _lock_ficheiro, open(caminho, "a", encoding="utf-8") as f:
+            f.write(linha + "\n")
+    except OSError:
+        pass  # Sem disco disponível o painel continua a funcionar
+
+
+def registar_estatisticas(nome, funcao):
+    """Acrescenta ao painel uma linha "nome: funcao()" (p.ex. as estatísticas de uma cache)."""
+    _estatisticas[nome] = funcao
+
+
+def mostrar_painel(trace):
+    """Painel de debug na barra lateral com o tempo por etapa do último rerun."""
+    import streamlit as st
+
+    with st.sidebar.expander("Desempenho (último rerun)"):
+        st.write(f"Total: {trace['total_s'] * 1e3:.0f} ms, {trace['elementos']} elementos")
+        st.table([
+            {"Etapa": nome, "Tempo (ms)": round(total * 1e3, 1), "Vezes": vezes, "Elementos": elementos}
+            for nome, total, vezes, elementos in resumo(trace)
+        ])
+        for nome, funcao in list(_estatisticas.items()):
+            st.write(f"{nome}: {funcao()}")
+
+
+@contextlib.contextmanager
+def rerun_instrumentado(pagina):
+    """Mede um rerun da página: etapas, elementos desenhados e tempo total da página.
+
+    No fim grava uma linha em FICHEIRO_TRACES e mostra o painel na barra lateral.
+    """
+    if not ATIVO:
+        yield
+        return
+    import streamlit as st
+
+    trace = {
+        "inicio": datetime.now().isoformat(timespec="milliseconds"), "pagina": pagina,
+        "sessao": st.session_state.setdefault("_sessao_instrumentacao", uuid.uuid4().hex),
+        "total_s": 0.0, "elementos": 0, "etapas": [], "_inicio": time.perf_counter(), "_abertas": [],
+    }
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = None
+        trace["total_s"] = round(time.perf_counter() - trace["_inicio"], 6)
+        gravar_trace(trace)
+    # Só depois de um rerun completo (não durante st.rerun/st.stop ou exceções)
+    mostrar_painel(trace)
@@ -0,0 +1,234 @@
+import hashlib
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pandas as pd
+
+from base_de_dados import CACHE_DIR
+from esquemas import COLUNAS_FLASHSCORE, ErroEsquema, ler_csv
+from instrumentacao import etapa, medido
+
+# Pastas dos ficheiros diários (podem ser alteradas por variável de ambiente)
+URL_JOGOS_DO_DIA = os.environ.get(
+    "FLUFFY_URL_JOGOS_DO_DIA", "https://raw.githubusercontent.com/RedLegacy227/df_jogos_do_dia/refs/heads/main/"
+)
+URL_JOGOS_FLASHSCORE = os.environ.get(
+    "FLUFFY_URL_JOGOS_FLASHSCORE", "https://raw.githubusercontent.com/RedLegacy227/jogos_do_dia/refs/heads/main/"
+)
+
+# Ficheiros diários disponíveis: os jogos com estatísticas (df_jogos_do_dia) e só com odds (Flashscore)
+# O esquema (ver esquemas.ESQUEMAS) define as colunas lidas e os seus tipos
+Fonte = namedtuple("Fonte", ["base_url", "padrao", "esquema"])
+FONTES = {
+    "df_jogos_do_dia": Fonte(URL_JOGOS_DO_DIA, "df_jogos_do_dia_{}.csv", "df_jogos_do_dia"),
+    "jogos_flashscore": Fonte(URL_JOGOS_FLASHSCORE, "Jogos_Flashscore_{}.csv", "jogos_flashscore"),
+}
+
+# Número máximo de pedidos HTTP em simultâneo no carregamento de vários dias
+MAX_PEDIDOS_PARALELOS = 8
+
+
+def drop_reset_index(df):
+    """Remove valores nulos e redefine o índice."""
+    df = df.dropna()
+    df = df.reset_index(drop=True)
+    df.index += 1
+    return df
+
+
+def nome_ficheiro(dia, fonte="df_jogos_do_dia"):
+    """Nome do ficheiro dos jogos de um dia."""
+    return FONTES[fonte].padrao.format(dia.strftime('%Y-%m-%d'))
+
+
+@medido("http")
+def _descarregar(url, timeout):
+    """Conteúdo do URL, ou None se o ficheiro não existir (404)."""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resposta:
+            return resposta.read()
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+
+
+def carregar_jogos(dia, fonte="df_jogos_do_dia", base_url=None, cache_dir=CACHE_DIR, timeout=30):
+    """Carrega os jogos de um dia. Devolve None se o ficheiro do dia não existir.
+
+    Os dias anteriores a hoje já não mudam e ficam guardados em disco depois do primeiro download.
+    A impressão digital do conteúdo do ficheiro fica em jogos.attrs["impressao"].
+    """
+    base_url = base_url or FONTES[fonte].base_url
+    caminho = os.path.join(cache_dir, "jogos_do_dia", nome_ficheiro(dia, fonte))
+    fechado = dia < date.today()
+    if fechado and os.path.exists(caminho):
+        with open(caminho, "rb") as f:
+            corpo = f.read()
+    else:
+        corpo = _descarregar(base_url + nome_ficheiro(dia, fonte), timeout)
+        if corpo is None:
+            return None
+        if fechado:
+            try:
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                with open(caminho + ".tmp", "wb") as f:
+                    f.write(corpo)
+                os.replace(caminho + ".tmp", caminho)
+            except OSError:
+                pass  # Sem disco disponível o download continua a ser usado
+    with etapa("parse_csv"):
+        jogos_do_dia = ler_csv(corpo, FONTES[fonte].esquema)
+    jogos_do_dia = drop_reset_index(jogos_do_dia)
+    jogos_do_dia.attrs["impressao"] = hashlib.sha1(corpo).hexdigest()[:16]
+    return jogos_do_dia
+
+
+def impressao_jogos(jogos):
+    """Impressão digital dos jogos para chaves de cache (None se não vierem de um ficheiro diário).
+
+    O pandas copia os attrs para os filtros e fatias de um DataFrame, por isso a impressão do
+    ficheiro (attrs["impressao"]) vai acompanhada do número de linhas e de um hash do índice.
+    """
+    impressao = jogos.attrs.get("impressao")
+    if impressao is None:
+        return None
+    indice = pd.util.hash_pandas_object(jogos.index, index=False).to_numpy()
+    return impressao, len(jogos), hashlib.sha1(indice.tobytes()).hexdigest()[:16]
+
+
+def carregar_intervalo(inicio, fim, fonte="df_jogos_do_dia", base_url=None, cache_dir=CACHE_DIR,
+                       max_paralelo=MAX_PEDIDOS_PARALELOS, timeout=30):
+    """Carrega os jogos de todos os dias entre inicio e fim (inclusive) em paralelo.
+
+    Devolve um único DataFrame indexado por (Dia, linha). Os dias sem ficheiro são
+    ignorados e ficam listados em resultado.attrs["dias_em_falta"].
+    """
+    dias = [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_paralelo, len(dias)))) as executor:
+        frames = list(executor.map(lambda dia: carregar_jogos(dia, fonte, base_url, cache_dir, timeout), dias))
+
+    encontrados = {dia: df for dia, df in zip(dias, frames) if df is not None}
+    if encontrados:
+        resultado = pd.concat(encontrados, names=["Dia", None])
+    else:
+        resultado = pd.DataFrame()
+    resultado.attrs["dias_em_falta"] = [dia for dia, df in zip(dias, frames) if df is None]
+    return resultado
+
+
+class ArmazemDiario:
+    """Jogos por (fonte, dia) partilhados entre todas as páginas e sessões, com limite de memória LRU.
+
+    Cada entrada conta com o tamanho real do DataFrame (memory_usage deep). Os dias de hoje
+    em diante expiram ao fim de ttl_dia_atual segundos, porque o ficheiro ainda pode mudar.
+    """
+
+    def __init__(self, limite_bytes, ttl_dia_atual=600, carregar=carregar_jogos):
+        self.limite_bytes = limite_bytes
+        self.ttl_dia_atual = ttl_dia_atual
+        self._carregar = carregar
+        self._entradas = OrderedDict()
+        self._em_curso = {}
+        self._lock = threading.Lock()
+        self.bytes_usados = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirados": 0}
+
+    def _valida(self, chave, entrada):
+        _, dia = chave
+        return dia < date.today() or time.time() - entrada["carregado_em"] < self.ttl_dia_atual
+
+    def _remover(self, chave):
+        entrada = self._entradas.pop(chave)
+        self.bytes_usados -= entrada["bytes"]
+
+    def obter(self, dia, fonte="df_jogos_do_dia"):
+        """Jogos do dia (DataFrame partilhado, não deve ser alterado).
+
+        Se não houver ficheiro para o dia devolve um DataFrame vazio com attrs["sem_ficheiro"].
+        """
+        chave = (fonte, dia)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                if self._valida(chave, entrada):
+                    self._entradas.move_to_end(chave)
+                    self.stats["hits"] += 1
+                    return entrada["df"]
+                self._remover(chave)
+                self.stats["expirados"] += 1
+            # Um único download por chave, mesmo com várias sessões a pedir o mesmo dia
+            lock_chave = self._em_curso.setdefault(chave, threading.Lock())
+
+        with lock_chave:
+            with self._lock:
+                entrada = self._entradas.get(chave)
+                if entrada is not None:
+                    self.stats["hits"] += 1
+                    return entrada["df"]
+            try:
+                df = self._carregar(dia, fonte)
+            except Exception:
+                with self._lock:
+                    self._em_curso.pop(chave, None)
+                raise
+            with self._lock:
+                self._em_curso.pop(chave, None)
+                self.stats["misses"] += 1
+                if df is None:
+                    # Sem ficheiro: não fica guardado, pode aparecer mais tarde
+                    df = pd.DataFrame()
+                    df.attrs["sem_ficheiro"] = True
+                    return df
+                self._guardar(chave, df)
+            return df
+
+    def _guardar(self, chave, df):
+        tamanho = int(df.memory_usage(deep=True).sum())
+        self._entradas[chave] = {"df": df, "bytes": tamanho, "carregado_em": time.time()}
+        self.bytes_usados += tamanho
+        # Remove as entradas menos usadas até caber no limite (a mais recente fica sempre)
+        while self.bytes_usados > self.limite_bytes and len(self._entradas) > 1:
+            self._remover(next(iter(self._entradas)))
+            self.stats["evictions"] += 1
+
+    def estatisticas(self):
+        """Contadores, número de entradas e memória usada."""
+        with self._lock:
+            return dict(self.stats, entradas=len(self._entradas), bytes=self.bytes_usados, limite_bytes=self.limite_bytes)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.bytes_usados = 0
+
+
+LIMITE_MEMORIA_MB = int(os.environ.get("FLUFFY_LIMITE_MEMORIA_MB", "256"))
+
+armazem = ArmazemDiario(LIMITE_MEMORIA_MB * 2**20)
+
+
+def obter_jogos(dia, fonte="df_jogos_do_dia"):
+    """Jogos do dia a partir do armazém partilhado por todas as páginas."""
+    return armazem.obter(dia, fonte)
+
+
+def jogos_da_pagina(dia, fonte="df_jogos_do_dia"):
+    """Jogos do dia para uma página; sem ficheiro para o dia, ou com um formato inesperado, a página para com uma mensagem."""
+    import streamlit as st
+
+    try:
+        jogos_do_dia = obter_jogos(dia, fonte)
+    except ErroEsquema as e:
+        st.error(f"Ficheiro dos jogos do dia com formato inesperado: {e}")
+        st.stop()
+    if jogos_do_dia.attrs.get("sem_ficheiro"):
+        st.warning(f"Não há ficheiro de jogos para {dia:%d/%m/%Y}.")
+        st.stop()
+    return jogos_do_dia
@@ -0,0 +1,125 @@
+"""Estratégias do dashboard em lote, sem Streamlit, para um intervalo de datas.
+
+Uso:
+    python lote.py 2024-10-01 2024-10-31 --saida selecoes.parquet
+    python lote.py 2024-10-01 2024-10-07 --estrategias "Lay 0 x 1" "Lay 1 x 0" --saida selecoes.csv --processos 4
+    python lote.py 2024-10-01 2024-10-31 --fonte jogos_flashscore --features --saida selecoes.parquet
+
+Cada processo carrega um bloco de dias (com downloads em paralelo) e avalia as estratégias
+de estrategias.ESTRATEGIAS. A saída tem uma linha por (Dia, Estrategia, jogo); o formato
+(CSV ou Parquet) é escolhido pela extensão do ficheiro. Com --features, as colunas de estatísticas
+que faltam nos ficheiros (p.ex. nos do Flashscore, só com odds) são calculadas a partir da base de dados.
+São aproximações das colunas publicadas: as seleções de estratégias que as usam ficam com
+Features_Aproximadas = True e é mostrado um aviso.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from base_de_dados import CACHE_DIR, carregar_base_de_dados
+from estrategias import aplicar_estrategias, colunas_referenciadas, por_nome
+from features import adicionar_features
+from jogos_do_dia import carregar_intervalo
+
+# Primeiras colunas de cada seleção, antes das colunas do jogo
+COLUNAS_SAIDA = ["Dia", "Estrategia", "Features_Aproximadas"]
+
+
+def selecoes_do_intervalo(inicio, fim, nomes_estrategias=None, fonte="df_jogos_do_dia", cache_dir=CACHE_DIR,
+                          features=False):
+    """Jogos selecionados por cada estratégia em cada dia do intervalo. Devolve (DataFrame, dias em falta).
+
+    Com 'features', as colunas de estatísticas em falta são calculadas (ver features.adicionar_features);
+    a coluna Features_Aproximadas indica as seleções de estratégias que usam alguma delas.
+    """
+    estrategias = por_nome(nomes_estrategias)
+    jogos = carregar_intervalo(inicio, fim, fonte=fonte, cache_dir=cache_dir)
+    calculadas = set()
+    if features and not jogos.empty:
+        em_falta = jogos.attrs.get("dias_em_falta", [])
+        originais = set(jogos.columns)
+        jogos = adicionar_features(jogos, carregar_base_de_dados())
+        jogos.attrs["dias_em_falta"] = em_falta
+        calculadas = set(jogos.columns) - originais
+    aproximadas = {e.nome: not calculadas.isdisjoint(colunas_referenciadas([e])) for e in estrategias}
+    frames = []
+    if not jogos.empty:
+        for dia, jogos_dia in jogos.groupby(level="Dia", sort=True):
+            for nome, selecionados in aplicar_estrategias(jogos_dia.droplevel("Dia"), estrategias).items():
+                if not selecionados.empty:
+                    selecionados.insert(0, "Features_Aproximadas", aproximadas[nome])
+                    selecionados.insert(0, "Estrategia", nome)
+                    selecionados.insert(0, "Dia", dia)
+                    frames.append(selecionados)
+    resultado = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUNAS_SAIDA)
+    return resultado, jogos.attrs.get("dias_em_falta", [])
+
+
+def _blocos(inicio, fim, n_blocos):
+    """Divide o intervalo em até n_blocos intervalos contíguos de dias."""
+    dias = (fim - inicio).days + 1
+    limites = np.linspace(0, dias, min(n_blocos, dias) + 1).round().astype(int)
+    return [(inicio + timedelta(days=int(a)), inicio + timedelta(days=int(b) - 1)) for a, b in zip(limites, limites[1:]) if b > a]
+
+
+def executar(inicio, fim, nomes_estrategias=None, fonte="df_jogos_do_dia", processos=None, cache_dir=CACHE_DIR,
+             features=False):
+    """Avalia as estratégias no intervalo com um pool de processos (um bloco de dias por processo)."""
+    por_nome(nomes_estrategias)  # Nomes inválidos falham antes de arrancar os processos
+    blocos = _blocos(inicio, fim, processos or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=len(blocos)) as executor:
+        futuros = [
+            executor.submit(selecoes_do_intervalo, a, b, nomes_estrategias, fonte, cache_dir, features) for a, b in blocos
+        ]
+        partes = [f.result() for f in futuros]
+    frames = [df for df, _ in partes if not df.empty]
+    resultado = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUNAS_SAIDA)
+    return resultado, sorted(dia for _, em_falta in partes for dia in em_falta)
+
+
+def gravar(selecoes, caminho):
+    """Grava as seleções em CSV ou Parquet, conforme a extensão do ficheiro."""
+    if caminho.endswith(".parquet"):
+        selecoes.to_parquet(caminho, engine="pyarrow", index=False)
+    elif caminho.endswith(".csv"):
+        selecoes.to_csv(caminho, index=False)
+    else:
+        raise ValueError(f"Extensão não suportada (use .csv ou .parquet): {caminho}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inicio", type=date.fromisoformat, help="primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("fim", type=date.fromisoformat, help="último dia (AAAA-MM-DD), inclusive")
+    parser.add_argument("--saida", required=True, help="ficheiro .csv ou .parquet")
+    parser.add_argument("--estrategias", nargs="+", help="nomes das estratégias (por omissão, todas)")
+    parser.add_argument("--fonte", default="df_jogos_do_dia", help="ficheiros diários a usar")
+    parser.add_argument("--features", action="store_true", help="calcula as colunas de estatísticas em falta")
+    parser.add_argument("--processos", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    if args.fim < args.inicio:
+        parser.error("o último dia é anterior ao primeiro")
+
+    try:
+        selecoes, em_falta = executar(args.inicio, args.fim, args.estrategias, args.fonte, args.processos,
+                                     features=args.features)
+        gravar(selecoes, args.saida)
+    except ValueError as e:
+        parser.error(str(e))
+    por_estrategia = selecoes.groupby("Estrategia").size().to_dict() if not selecoes.empty else {}
+    print(f"{len(selecoes)} seleções em {args.saida}: {por_estrategia}")
+    if not selecoes.empty and selecoes["Features_Aproximadas"].any():
+        nomes = sorted(selecoes.loc[selecoes["Features_Aproximadas"], "Estrategia"].unique())
+        print(f"Aviso: seleções de {', '.join(nomes)} usam estatísticas aproximadas calculadas pelo --features "
+              "(coluna Features_Aproximadas)", file=sys.stderr)
+    if em_falta:
+        print(f"Dias sem ficheiro ({len(em_falta)}): {', '.join(d.isoformat() for d in em_falta)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from btts import show_btts
 from lay_correct_score import show_lay_correct_score
 from analise_jogo_a_jogo import show_analise_jogo_a_jogo
 from analise_correct_score import show_analise_correct_score
+from instrumentacao import rerun_instrumentado
 
 ### Criacao do Aplicativo ###
 
@@ -19,19 +20,20 @@ pages = ["Back", "Lay", "Overs / Unders no HT", "Overs / Unders no FT", "BTTS",
 
 pick = st.sidebar.radio('', pages)
 
-if pick == "Back":
-    show_back()
-elif pick == "Lay":
-    show_lay()
-elif pick == "Overs / Unders no HT":
-    show_overs_unders_ht()
-elif pick == "Overs / Unders no FT":
-    show_overs_unders_ft()
-elif pick == "BTTS":
-    show_btts()
-elif pick == "Lay Correct Score":
-    show_lay_correct_score()
-elif pick == "Análise Jogo a Jogo":
-    show_analise_jogo_a_jogo()
-elif pick == "Análise Correct Score":
-    show_analise_correct_score()
+with rerun_instrumentado(pick):
+    if pick == "Back":
+        show_back()
+    elif pick == "Lay":
+        show_lay()
+    elif pick == "Overs / Unders no HT":
+        show_overs_unders_ht()
+    elif pick == "Overs / Unders no FT":
+        show_overs_unders_ft()
+    elif pick == "BTTS":
+        show_btts()
+    elif pick == "Lay Correct Score":
+        show_lay_correct_score()
+    elif pick == "Análise Jogo a Jogo":
+        show_analise_jogo_a_jogo()
+    elif pick == "Análise Correct Score":
+        show_analise_correct_score()
@@ -0,0 +1,307 @@
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.special import gammaln
+
+from base_de_dados import CACHE_DIR
+from historico import carregar_historico_ligas
+from instrumentacao import medido
+
+# Matriz de probabilidades dos placares 0–6 x 0–6 (a massa acima de 6 golos fica de fora)
+MAX_GOLOS_MODELO = 7
+
+# Peso de cada jogo: metade a cada MEIA_VIDA_DIAS; jogos com mais de JANELA_DIAS não entram no ajuste
+MEIA_VIDA_DIAS = 180
+JANELA_DIAS = 3 * 365
+
+# Penalização L2 dos ataques e defesas (em jogos equivalentes) e limites da correção dos placares baixos
+PENALIZACAO = 2.0
+LIMITES_RHO = (-0.2, 0.2)
+
+CAMINHO_MODELO = os.path.join(CACHE_DIR, "modelo_placares.json")
+
+COLUNAS_MODELO = ["League", "Date", "Home", "Away", "FT_Goals_H", "FT_Goals_A"]
+
+# Parâmetros de uma liga: golos esperados = exp(media [+ casa] + ataque da equipa + defesa do adversário)
+ParametrosLiga = namedtuple("ParametrosLiga", ["media", "casa", "rho", "equipas", "ataque", "defesa", "impressao"])
+
+# Jogos de um ajuste: índices da liga e das chaves (liga, equipa) da casa e de fora, golos e pesos
+_Dados = namedtuple("_Dados", ["liga", "casa", "fora", "golos_casa", "golos_fora", "peso", "baixos", "n_ligas", "n_chaves"])
+
+
+def _impressoes(jogos, ligas):
+    """Impressão digital dos jogos de cada liga (número de jogos e soma dos hashes das linhas)."""
+    hashes = pd.util.hash_pandas_object(jogos[COLUNAS_MODELO], index=False).to_numpy()
+    ordem = np.argsort(ligas, kind="stable")
+    ordenadas = ligas[ordem]
+    inicios = np.flatnonzero(np.r_[True, np.diff(ordenadas) != 0])
+    somas = np.add.reduceat(hashes[ordem], inicios) if len(ordem) else np.empty(0, dtype=np.uint64)
+    contagens = np.diff(np.r_[inicios, len(ordem)])
+    return {int(ordenadas[i]): f"{c}:{s:016x}" for i, c, s in zip(inicios, contagens, somas)}
+
+
+def _baixos(golos_casa, golos_fora):
+    """Posições dos jogos 0x0, 0x1, 1x0 e 1x1 (os placares com a correção de Dixon-Coles)."""
+    return [np.flatnonzero((golos_casa == h) & (golos_fora == a)) for h, a in ((0, 0), (0, 1), (1, 0), (1, 1))]
+
+
+def _taus(lam, mu, rho, h, a):
+    """Correção tau de Dixon-Coles para o placar (h, a), com h, a em {0, 1}."""
+    if (h, a) == (0, 0):
+        return 1 - lam * mu * rho
+    if (h, a) == (0, 1):
+        return 1 + lam * rho
+    if (h, a) == (1, 0):
+        return 1 + mu * rho
+    return 1 - rho
+
+
+def _objetivo(x, dados):
+    """Log-verosimilhança negativa ponderada de Dixon-Coles (por unidade de peso) e o seu gradiente."""
+    n_ligas, n_chaves = dados.n_ligas, dados.n_chaves
+    media, casa, rho = x[:n_ligas], x[n_ligas:2 * n_ligas], x[2 * n_ligas:3 * n_ligas]
+    ataque, defesa = x[3 * n_ligas:3 * n_ligas + n_chaves], x[3 * n_ligas + n_chaves:]
+    liga = dados.liga
+
+    log_lam = media[liga] + casa[liga] + ataque[dados.casa] + defesa[dados.fora]
+    log_mu = media[liga] + ataque[dados.fora] + defesa[dados.casa]
+    lam, mu = np.exp(log_lam), np.exp(log_mu)
+    peso = dados.peso
+    total = peso @ (dados.golos_casa * log_lam - lam + dados.golos_fora * log_mu - mu)
+    g_lam = peso * (dados.golos_casa - lam)
+    g_mu = peso * (dados.golos_fora - mu)
+    g_rho = np.zeros(len(liga))
+
+    # Correção dos placares baixos: só os jogos 0x0, 0x1, 1x0 e 1x1
+    for (h, a), pos in zip(((0, 0), (0, 1), (1, 0), (1, 1)), dados.baixos):
+        if not len(pos):
+            continue
+        l, m, r, w = lam[pos], mu[pos], rho[liga[pos]], peso[pos]
+        tau = np.maximum(_taus(l, m, r, h, a), 1e-10)
+        total += w @ np.log(tau)
+        if (h, a) == (0, 0):
+            g_lam[pos] -= w * l * m * r / tau
+            g_mu[pos] -= w * l * m * r / tau
+            g_rho[pos] = -w * l * m / tau
+        elif (h, a) == (0, 1):
+            g_lam[pos] += w * l * r / tau
+            g_rho[pos] = w * l / tau
+        elif (h, a) == (1, 0):
+            g_mu[pos] += w * m * r / tau
+            g_rho[pos] = w * m / tau
+        else:
+            g_rho[pos] = -w / tau
+
+    penalizacao = 0.5 * PENALIZACAO * (ataque @ ataque + defesa @ defesa)
+    gradiente = -np.concatenate([
+        np.bincount(liga, g_lam + g_mu, n_ligas),
+        np.bincount(liga, g_lam, n_ligas),
+        np.bincount(liga, g_rho, n_ligas),
+        np.bincount(dados.casa, g_lam, n_chaves) + np.bincount(dados.fora, g_mu, n_chaves),
+        np.bincount(dados.fora, g_lam, n_chaves) + np.bincount(dados.casa, g_mu, n_chaves),
+    ])
+    gradiente[3 * n_ligas:] += PENALIZACAO * np.concatenate([ataque, defesa])
+    escala = peso.sum()
+    return (penalizacao - total) / escala, gradiente / escala
+
+
+def _pmf(taxas):
+    """Probabilidades de Poisson de 0 a MAX_GOLOS_MODELO - 1 golos para cada taxa: array (n, MAX_GOLOS_MODELO)."""
+    golos = np.arange(MAX_GOLOS_MODELO)
+    with np.errstate(divide="ignore"):
+        return np.exp(golos * np.log(taxas)[:, None] - taxas[:, None] - gammaln(golos + 1))
+
+
+class ModeloPlacares:
+    """Modelo de Dixon-Coles por liga: ataque e defesa de cada equipa, vantagem de casa e correção dos placares baixos.
+
+    As ligas não partilham parâmetros, por isso cada uma é reajustada só quando os seus jogos
+    mudam; as ligas a ajustar são ajustadas juntas numa única otimização vetorizada, a partir
+    dos parâmetros anteriores (das mesmas equipas) quando existem.
+    """
+
+    def __init__(self, ligas=None):
+        self.ligas = dict(ligas or {})
+        self.stats = {"ajustes": 0, "ligas_ajustadas": 0, "ligas_reutilizadas": 0, "iteracoes": 0, "tempo_s": 0.0}
+
+    def _dados(self, jogos, ligas, nomes_ligas):
+        """Jogos dentro da janela de cada liga, com pesos, e os parâmetros iniciais (anteriores, se existirem)."""
+        datas = pd.to_datetime(jogos["Date"]).to_numpy()
+        ultima = pd.Series(datas).groupby(ligas).transform("max").to_numpy()
+        idade = (ultima - datas) / np.timedelta64(1, "D")
+        dentro = idade <= JANELA_DIAS
+        jogos, ligas, idade = jogos[dentro], ligas[dentro], idade[dentro]
+
+        equipas, nomes_equipas = pd.factorize(pd.concat([jogos["Home"].astype(str), jogos["Away"].astype(str)]))
+        n_equipas = max(len(nomes_equipas), 1)
+        chaves, unicas = pd.factorize(np.tile(ligas, 2).astype(np.int64) * n_equipas + equipas)
+        golos_casa = jogos["FT_Goals_H"].to_numpy(dtype=float)
+        golos_fora = jogos["FT_Goals_A"].to_numpy(dtype=float)
+        dados = _Dados(
+            ligas, chaves[:len(jogos)], chaves[len(jogos):], golos_casa, golos_fora,
+            0.5 ** (idade / MEIA_VIDA_DIAS), _baixos(golos_casa, golos_fora), len(nomes_ligas), len(unicas),
+        )
+
+        # Parâmetros iniciais: os anteriores de cada liga e equipa; as novas começam na média
+        liga_chave, equipa_chave = unicas // n_equipas, unicas % n_equipas
+        x0 = np.zeros(3 * dados.n_ligas + 2 * dados.n_chaves)
+        media_golos = np.bincount(ligas, golos_casa + golos_fora, dados.n_ligas) / np.maximum(2 * np.bincount(ligas, minlength=dados.n_ligas), 1)
+        x0[:dados.n_ligas] = np.log(np.maximum(media_golos, 0.1))
+        x0[dados.n_ligas:2 * dados.n_ligas] = 0.25
+        for l, nome in enumerate(nomes_ligas):
+            anterior = self.ligas.get(nome)
+            if anterior is None:
+                continue
+            x0[[l, dados.n_ligas + l, 2 * dados.n_ligas + l]] = anterior.media, anterior.casa, anterior.rho
+            posicoes = {e: i for i, e in enumerate(anterior.equipas)}
+            for k in np.flatnonzero(liga_chave == l):
+                i = posicoes.get(nomes_equipas[equipa_chave[k]])
+                if i is not None:
+                    x0[3 * dados.n_ligas + k] = anterior.ataque[i]
+                    x0[3 * dados.n_ligas + dados.n_chaves + k] = anterior.defesa[i]
+        return dados, x0, liga_chave, [nomes_equipas[e] for e in equipa_chave]
+
+    @medido("modelo_placares")
+    def ajustar(self, base_dados):
+        """Ajusta as ligas cujos jogos mudaram desde o último ajuste. Devolve o número de ligas ajustadas."""
+        jogos = base_dados[COLUNAS_MODELO].dropna()
+        codigos, nomes = pd.factorize(jogos["League"].astype(str))
+        impressoes = _impressoes(jogos, codigos)
+        mudadas = [
+            l for l, nome in enumerate(nomes)
+            if nome not in self.ligas or self.ligas[nome].impressao != impressoes[l]
+        ]
+        self.stats["ligas_reutilizadas"] += len(nomes) - len(mudadas)
+        if not mudadas:
+            return 0
+
+        inicio = time.perf_counter()
+        selecionados = np.isin(codigos, mudadas)
+        novos_codigos = np.searchsorted(mudadas, codigos[selecionados])
+        nomes_ligas = [nomes[l] for l in mudadas]
+        dados, x0, liga_chave, equipa_chave = self._dados(jogos[selecionados], novos_codigos, nomes_ligas)
+        n_ligas, n_chaves = dados.n_ligas, dados.n_chaves
+        limites = [(None, None)] * (2 * n_ligas) + [LIMITES_RHO] * n_ligas + [(None, None)] * (2 * n_chaves)
+        x0[2 * n_ligas:3 * n_ligas] = np.clip(x0[2 * n_ligas:3 * n_ligas], *LIMITES_RHO)
+        resultado = minimize(_objetivo, x0, args=(dados,), jac=True, method="L-BFGS-B", bounds=limites,
+                             options={"maxiter": 2000})
+        x = resultado.x
+
+        for l, nome in enumerate(nomes_ligas):
+            chaves = np.flatnonzero(liga_chave == l)
+            self.ligas[nome] = ParametrosLiga(
+                float(x[l]), float(x[n_ligas + l]), float(x[2 * n_ligas + l]),
+                [equipa_chave[k] for k in chaves],
+                x[3 * n_ligas + chaves], x[3 * n_ligas + n_chaves + chaves], impressoes[mudadas[l]],
+            )
+        self.stats["ajustes"] += 1
+        self.stats["ligas_ajustadas"] += len(mudadas)
+        self.stats["iteracoes"] += int(resultado.nit)
+        self.stats["tempo_s"] += time.perf_counter() - inicio
+        return len(mudadas)
+
+    def golos_esperados(self, jogos):
+        """Golos esperados da casa e de fora (lambda, mu) e rho de cada jogo; NaN nas ligas sem modelo.
+
+        Equipas sem jogos na liga ficam com ataque e defesa médios (zero).
+        """
+        n = len(jogos)
+        log_lam, log_mu, rho = np.full(n, np.nan), np.full(n, np.nan), np.full(n, np.nan)
+        ligas = jogos["League"].astype(str).to_numpy()
+        casa, fora = jogos["Home"].astype(str).to_numpy(), jogos["Away"].astype(str).to_numpy()
+        for nome in np.unique(ligas):
+            parametros = self.ligas.get(nome)
+            if parametros is None:
+                continue
+            linhas = np.flatnonzero(ligas == nome)
+            posicoes = {e: i for i, e in enumerate(parametros.equipas)}
+            ataque = np.append(parametros.ataque, 0.0)
+            defesa = np.append(parametros.defesa, 0.0)
+            desconhecida = len(parametros.equipas)
+            i_casa = np.array([posicoes.get(e, desconhecida) for e in casa[linhas]], dtype=np.int64)
+            i_fora = np.array([posicoes.get(e, desconhecida) for e in fora[linhas]], dtype=np.int64)
+            log_lam[linhas] = parametros.media + parametros.casa + ataque[i_casa] + defesa[i_fora]
+            log_mu[linhas] = parametros.media + ataque[i_fora] + defesa[i_casa]
+            rho[linhas] = parametros.rho
+        return np.exp(log_lam), np.exp(log_mu), rho
+
+    def matrizes(self, jogos):
+        """Probabilidades dos placares 0–6 x 0–6 de cada jogo: array (n, 7, 7) [jogo, golos casa, golos fora].
+
+        Calculadas de uma vez para todos os jogos; NaN nos jogos de ligas sem modelo.
+        """
+        lam, mu, rho = self.golos_esperados(jogos)
+        matrizes = _pmf(lam)[:, :, None] * _pmf(mu)[:, None, :]
+        for h in (0, 1):
+            for a in (0, 1):
+                matrizes[:, h, a] *= _taus(lam, mu, rho, h, a)
+        return matrizes
+
+    def gravar(self, caminho):
+        """Grava os parâmetros de todas as ligas em JSON, de forma atómica."""
+        conteudo = {
+            nome: {"media": p.media, "casa": p.casa, "rho": p.rho, "impressao": p.impressao, "equipas": p.equipas,
+                   "ataque": p.ataque.tolist(), "defesa": p.defesa.tolist()}
+            for nome, p in self.ligas.items()
+        }
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(conteudo, f, ensure_ascii=False)
+        os.replace(caminho + ".tmp", caminho)
+
+    @classmethod
+    def ler(cls, caminho):
+        """Modelo com os parâmetros gravados (vazio se o ficheiro não existir ou estiver corrompido)."""
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                conteudo = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        return cls({
+            nome: ParametrosLiga(p["media"], p["casa"], p["rho"], p["equipas"], np.array(p["ataque"]),
+                                 np.array(p["defesa"]), p["impressao"])
+            for nome, p in conteudo.items()
+        })
+
+
+def tabela_placares(matrizes, jogos, placares=None):
+    """Probabilidades (0–1) dos placares pedidos ("HxA"; todos, por omissão), uma coluna por placar."""
+    if placares is None:
+        placares = [f"{h}x{a}" for h in range(MAX_GOLOS_MODELO) for a in range(MAX_GOLOS_MODELO)]
+    golos = np.array([[int(g) for g in p.split("x")] for p in placares]).reshape(-1, 2)
+    return pd.DataFrame(matrizes[:, golos[:, 0], golos[:, 1]], index=jogos.index, columns=placares)
+
+
+_estado = {}
+_lock = threading.Lock()
+
+
+def obter_modelo(base_dados, caminho=CAMINHO_MODELO):
+    """Modelo ajustado à base de dados, partilhado entre sessões.
+
+    Os parâmetros ficam gravados em disco; numa nova versão do histórico só as ligas com
+    jogos novos são reajustadas, a partir dos parâmetros anteriores.
+    """
+    with _lock:
+        if _estado.get("base_dados") is base_dados:
+            return _estado["modelo"]
+        modelo = _estado.get("modelo") or ModeloPlacares.ler(caminho)
+        if modelo.ajustar(base_dados):
+            try:
+                modelo.gravar(caminho)
+            except OSError:
+                pass  # Sem disco disponível o modelo em memória continua a funcionar
+        _estado.update(base_dados=base_dados, modelo=modelo)
+        return modelo
+
+
+@medido("matrizes_placares")
+def matrizes_do_dia(jogos_do_dia):
+    """Matrizes de placares (n, 7, 7) dos jogos do dia, com o modelo ajustado ao histórico das suas ligas."""
+    return obter_modelo(carregar_historico_ligas(jogos_do_dia)).matrizes(jogos_do_dia)
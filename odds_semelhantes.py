@@ -0,0 +1,127 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from agregados import MERCADOS, codificar_jogos
+from instrumentacao import medido
+from placares import MAX_GOLOS, contar_por_grupo
+
+# Vetor de odds que descreve cada jogo (comparado em probabilidades implícitas, 1 / odd)
+COLUNAS_ODDS_SEMELHANTES = [
+    'FT_Odd_H', 'FT_Odd_D', 'FT_Odd_A', 'FT_Odd_Over15', 'FT_Odd_Under15', 'FT_Odd_Over25', 'FT_Odd_Under25',
+    'Odd_BTTS_Yes', 'Odd_BTTS_No', 'HT_Odd_Over05',
+]
+# Sem estas a comparação não faz sentido; as restantes usam-se quando existem nos dois lados
+COLUNAS_ODDS_OBRIGATORIAS = COLUNAS_ODDS_SEMELHANTES[:3]
+K_VIZINHOS = 50
+
+# resumo: DataFrame com o índice dos jogos consultados; posicoes/distancias: arrays (n_jogos, k),
+# com posição -1 para jogos sem odds completas; placares: array (n_jogos, MAX_GOLOS, MAX_GOLOS)
+Vizinhos = namedtuple("Vizinhos", ["resumo", "posicoes", "distancias", "placares"])
+
+
+def probabilidades_implicitas(df, colunas=COLUNAS_ODDS_SEMELHANTES):
+    """Matriz (n, len(colunas)) com 1 / odd e máscara das linhas com odds todas válidas."""
+    odds = df.reindex(columns=colunas).to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        probabilidades = 1.0 / odds
+    validos = (np.isfinite(probabilidades) & (odds > 1.0)).all(axis=1)
+    return probabilidades, validos
+
+
+class OddsSemelhantes:
+    """KD-tree sobre as odds dos jogos da base de dados, com os resultados de cada jogo.
+
+    Com 'dia' só entram os jogos anteriores a esse dia, para que a análise de um dia passado
+    não veja os seus próprios resultados nem os que vieram depois.
+    """
+
+    def __init__(self, base_dados, dia=None):
+        self.base_dados = base_dados
+        self.dia = dia
+        self._anteriores = None
+        if dia is not None:
+            self._anteriores = (base_dados["Date"] < pd.Timestamp(dia)).to_numpy()
+        # Uma árvore por conjunto de colunas de odds (normalmente só uma)
+        self._arvores = {}
+
+    def colunas(self, jogos):
+        """Colunas de odds presentes na base de dados e nos jogos (vazio sem as de resultado final)."""
+        colunas = tuple(c for c in COLUNAS_ODDS_SEMELHANTES if c in self.base_dados.columns and c in jogos.columns)
+        return colunas if set(COLUNAS_ODDS_OBRIGATORIAS) <= set(colunas) else ()
+
+    def _arvore(self, colunas):
+        if colunas not in self._arvores:
+            probabilidades, validos = probabilidades_implicitas(self.base_dados, list(colunas))
+            if self._anteriores is not None:
+                validos &= self._anteriores
+            posicoes = np.flatnonzero(validos)
+            _, codigos, mercados = codificar_jogos(self.base_dados.iloc[posicoes])
+            arvore = cKDTree(probabilidades[validos]) if len(posicoes) else None
+            self._arvores[colunas] = (posicoes, arvore, codigos, mercados.astype(bool))
+        return self._arvores[colunas]
+
+    @medido("odds_semelhantes")
+    def consultar(self, jogos, k=K_VIZINHOS):
+        """Os k jogos passados mais próximos de cada jogo e a distribuição dos seus resultados, numa só consulta.
+
+        Compara-se nas colunas de odds que existem dos dois lados (ver colunas).
+        """
+        colunas = self.colunas(jogos)
+        n = len(jogos)
+        if colunas:
+            probabilidades, validos = probabilidades_implicitas(jogos, list(colunas))
+            posicoes_base, arvore, codigos_base, mercados_base = self._arvore(colunas)
+        else:
+            validos = np.zeros(n, dtype=bool)
+            posicoes_base = np.empty(0, dtype=np.int64)
+        k = min(k, len(posicoes_base))
+        validos &= k > 0
+        posicoes = np.full((n, k), -1, dtype=np.int64)
+        distancias = np.full((n, k), np.nan)
+        placares = np.zeros((n, MAX_GOLOS, MAX_GOLOS), dtype=np.int64)
+        acertos = np.full((n, len(MERCADOS)), np.nan)
+
+        linhas = np.flatnonzero(validos)
+        if len(linhas):
+            d, vizinhos = arvore.query(probabilidades[linhas], k=k, workers=-1)
+            vizinhos = vizinhos.reshape(len(linhas), k)
+            distancias[linhas] = d.reshape(len(linhas), k)
+            posicoes[linhas] = posicoes_base[vizinhos]
+            acertos[linhas] = mercados_base[vizinhos].mean(axis=1)
+            placares[linhas] = contar_por_grupo(
+                np.repeat(np.arange(len(linhas)), k), codigos_base[vizinhos].ravel(), len(linhas)
+            )
+
+        planos = placares.reshape(n, MAX_GOLOS * MAX_GOLOS)
+        contagem_max = planos.max(axis=1)
+        mais_comum = planos.argmax(axis=1)
+        resumo = pd.DataFrame({"Vizinhos": np.where(validos, k, 0)}, index=jogos.index)
+        resumo["Distancia_Media"] = np.nan
+        if len(linhas):
+            resumo.loc[validos, "Distancia_Media"] = distancias[linhas].mean(axis=1).round(4)
+        for i, mercado in enumerate(MERCADOS):
+            resumo[f"Pct_{mercado}"] = (acertos[:, i] * 100).round(1)
+        resumo["Placar_Mais_Comum"] = [f"{c // MAX_GOLOS}x{c % MAX_GOLOS}" if v else "" for c, v in zip(mais_comum, validos)]
+        resumo["Pct_Placar_Mais_Comum"] = np.where(validos, (contagem_max / max(k, 1) * 100).round(1), np.nan)
+        return Vizinhos(resumo, posicoes, distancias, placares)
+
+    def jogos(self, posicoes):
+        """Jogos da base de dados para uma linha de posições devolvida por consultar (ignora -1)."""
+        return self.base_dados.iloc[posicoes[posicoes >= 0]]
+
+
+_ultimo = None
+_lock = threading.Lock()
+
+
+def obter_odds_semelhantes(base_dados, dia=None):
+    """Devolve o índice de odds da base de dados até ao dia, reconstruindo-o quando a versão ou o dia mudam."""
+    global _ultimo
+    with _lock:
+        if _ultimo is None or _ultimo.base_dados is not base_dados or _ultimo.dia != dia:
+            _ultimo = OddsSemelhantes(base_dados, dia)
+        return _ultimo
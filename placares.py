@@ -0,0 +1,44 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Golos por equipa representados na matriz de placares (valores acima ficam no último índice)
+MAX_GOLOS = 16
+
+# Janelas usadas na Análise Correct Score: número de jogos mais recentes (None = base de dados completa)
+JANELAS = {"total": None, "3_temporadas": 114, "2_temporadas": 76}
+JANELA_TEMPORADA = "temporada_atual"
+
+_casa, _fora = np.meshgrid(np.arange(MAX_GOLOS), np.arange(MAX_GOLOS), indexing="ij")
+GOLEADA_CASA = (_casa - _fora) >= 4
+GOLEADA_FORA = (_fora - _casa) >= 4
+EMPATE_OUTRO = (_casa == _fora) & (_casa >= 4)
+
+Contagem = namedtuple(
+    "Contagem", ["num_jogos", "matriz", "goleada_casa", "goleada_fora", "empate_outro"]
+)
+
+
+def codificar_placares(ft_goals_h, ft_goals_a):
+    """Codifica cada placar (golos casa, golos fora) num único inteiro pequeno."""
+    casa = np.minimum(np.asarray(ft_goals_h, dtype=np.int64), MAX_GOLOS - 1)
+    fora = np.minimum(np.asarray(ft_goals_a, dtype=np.int64), MAX_GOLOS - 1)
+    return casa * MAX_GOLOS + fora
+
+
+def contar_por_grupo(grupos, codigos, n_grupos):
+    """Histograma de placares por grupo: array (n_grupos, MAX_GOLOS, MAX_GOLOS)."""
+    celulas = MAX_GOLOS * MAX_GOLOS
+    contagens = np.bincount(grupos * celulas + codigos, minlength=n_grupos * celulas)
+    return contagens.reshape(n_grupos, MAX_GOLOS, MAX_GOLOS)
+
+
+def resumir(matriz):
+    """Converte uma matriz de placares (MAX_GOLOS x MAX_GOLOS) numa Contagem."""
+    return Contagem(
+        num_jogos=int(matriz.sum()),
+        matriz=matriz,
+        goleada_casa=int(matriz[GOLEADA_CASA].sum()),
+        goleada_fora=int(matriz[GOLEADA_FORA].sum()),
+        empate_outro=int(matriz[EMPATE_OUTRO].sum()),
+    )
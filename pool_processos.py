@@ -0,0 +1,29 @@
+"""Dados partilhados pelas tarefas de um pool de processos, enviados uma só vez a cada processo."""
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+_dados = {}
+
+
+def _iniciar_processo(dados):
+    _dados.update(dados)
+
+
+def dados_processo():
+    """Dados do processo atual (ver executor_com_dados e dados_locais)."""
+    return _dados
+
+
+def executor_com_dados(processos, dados):
+    """Pool de processos em que cada processo recebe 'dados' ao arrancar, em vez de em cada tarefa."""
+    return ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo, initargs=(dados,))
+
+
+@contextmanager
+def dados_locais(dados):
+    """Os mesmos dados no próprio processo, sem pool; à saída são apagados para não ficarem vivos."""
+    _iniciar_processo(dados)
+    try:
+        yield
+    finally:
+        _dados.clear()
@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from agregados import CELULAS, obter_agregados
+from instrumentacao import medido
+from placares import EMPATE_OUTRO, GOLEADA_CASA, GOLEADA_FORA, JANELA_TEMPORADA, JANELAS, MAX_GOLOS
+
+# Níveis de risco pelo número de ocorrências do placar: até 0, até 3, até 7, até 10 e acima
+NIVEIS_RISCO = ["Limpinho", "Favorável", "Cuidado", "Muito Cuidado", "Não Entrar"]
+LIMITES_RISCO = [0, 3, 7, 10]
+
+# Placares analisados na Análise Correct Score, seguidos das goleadas e do "outro empate"
+PLACARES_ALVO = [
+    "0x0", "1x0", "0x1", "1x1", "2x0", "2x1", "2x2",
+    "0x2", "1x2", "3x0", "3x1", "3x2", "3x3",
+    "0x3", "1x3", "2x3",
+]
+RESULTADOS_ESPECIAIS = {"Goleada Home": GOLEADA_CASA, "Goleada Away": GOLEADA_FORA, "Outro Empate": EMPATE_OUTRO}
+
+JANELAS_QUADRO = list(JANELAS) + [JANELA_TEMPORADA]
+
+# Número de dias com o quadro guardado em memória
+MAX_QUADROS = 8
+
+
+def nivel_risco(ocorrencias):
+    """Índice em NIVEIS_RISCO para cada número de ocorrências (escalar ou array)."""
+    return np.searchsorted(LIMITES_RISCO, ocorrencias, side="left")
+
+
+def temporadas_atuais(dia):
+    """Nomes possíveis da temporada do dia: "2024/2025" (ligas de inverno) ou "2024" (ligas de verão)."""
+    ano = pd.to_datetime(dia).year
+    return [f"{ano}/{ano + 1}", str(ano)]
+
+
+def _ocorrencias(agregados, equipas, location, janela, temporadas):
+    """Jogos e ocorrências de cada resultado alvo para as equipas indicadas: (num_jogos, array n x resultados)."""
+    mapa = agregados.equipas(location)
+    linhas = np.array([mapa.get(e, -1) for e in equipas], dtype=np.int64)
+    vetores = agregados.vetores(location, janela, temporadas)
+    matrizes = np.zeros((len(equipas), MAX_GOLOS, MAX_GOLOS), dtype=np.int64)
+    conhecidas = (linhas >= 0) & (linhas < len(vetores))
+    matrizes[conhecidas] = vetores[linhas[conhecidas], :CELULAS].reshape(-1, MAX_GOLOS, MAX_GOLOS)
+
+    casa, fora = np.array([[int(g) for g in p.split("x")] for p in PLACARES_ALVO]).T
+    colunas = [matrizes[:, casa, fora]]
+    colunas += [(matrizes * mascara).sum(axis=(1, 2))[:, None] for mascara in RESULTADOS_ESPECIAIS.values()]
+    return matrizes.sum(axis=(1, 2)), np.hstack(colunas)
+
+
+def construir_quadro(base_dados, jogos_do_dia, dia):
+    """Risco de cada resultado alvo, em cada jogo do dia e em cada janela, numa só tabela.
+
+    Para cada (jogo, janela, resultado) conta quantas vezes o resultado aconteceu nos jogos
+    em casa da equipa da casa e nos jogos fora da visitante; o Risco do jogo é o pior dos dois.
+    """
+    agregados = obter_agregados(base_dados)
+    resultados = PLACARES_ALVO + list(RESULTADOS_ESPECIAIS)
+    home = jogos_do_dia["Home"].astype(str).to_numpy()
+    away = jogos_do_dia["Away"].astype(str).to_numpy()
+    n_jogos, n_resultados = len(jogos_do_dia), len(resultados)
+
+    blocos = []
+    for janela in JANELAS_QUADRO:
+        temporadas = temporadas_atuais(dia) if janela == JANELA_TEMPORADA else ()
+        jogos_home, ocorrencias_home = _ocorrencias(agregados, home, "Home", janela, temporadas)
+        jogos_away, ocorrencias_away = _ocorrencias(agregados, away, "Away", janela, temporadas)
+        nivel_home, nivel_away = nivel_risco(ocorrencias_home), nivel_risco(ocorrencias_away)
+        nivel = np.maximum(nivel_home, nivel_away).ravel()
+        blocos.append(pd.DataFrame({
+            "Home": np.repeat(home, n_resultados), "Away": np.repeat(away, n_resultados),
+            "Janela": janela, "Resultado": np.tile(resultados, n_jogos),
+            "Jogos_Home": np.repeat(jogos_home, n_resultados), "Ocorrencias_Home": ocorrencias_home.ravel(),
+            "Risco_Home": np.take(NIVEIS_RISCO, nivel_home.ravel()),
+            "Jogos_Away": np.repeat(jogos_away, n_resultados), "Ocorrencias_Away": ocorrencias_away.ravel(),
+            "Risco_Away": np.take(NIVEIS_RISCO, nivel_away.ravel()),
+            "Nivel_Risco": nivel, "Risco": np.take(NIVEIS_RISCO, nivel),
+        }))
+    quadro = pd.concat(blocos, ignore_index=True)
+    for coluna in ("Risco_Home", "Risco_Away", "Risco"):
+        quadro[coluna] = pd.Categorical(quadro[coluna], categories=NIVEIS_RISCO, ordered=True)
+    quadro["Janela"] = pd.Categorical(quadro["Janela"], categories=JANELAS_QUADRO, ordered=True)
+    quadro["Resultado"] = pd.Categorical(quadro["Resultado"], categories=resultados, ordered=True)
+    return quadro
+
+
+_quadros = OrderedDict()
+_lock = threading.Lock()
+
+
+@medido("quadro_risco")
+def obter_quadro(base_dados, jogos_do_dia, dia):
+    """Quadro de risco do dia, calculado uma vez por dia e por versão da base de dados e dos jogos."""
+    with _lock:
+        entrada = _quadros.get(dia)
+        if entrada is not None and entrada[0] is base_dados and entrada[1] is jogos_do_dia:
+            _quadros.move_to_end(dia)
+            return entrada[2]
+        quadro = construir_quadro(base_dados, jogos_do_dia, dia)
+        _quadros[dia] = (base_dados, jogos_do_dia, quadro)
+        while len(_quadros) > MAX_QUADROS:
+            _quadros.popitem(last=False)
+        return quadro
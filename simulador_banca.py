@@ -0,0 +1,249 @@
+"""Simulação de Monte Carlo da banca para as estratégias de lay (e back).
+
+Uso:
+    python simulador_banca.py 2024-01-01 2024-10-31 --estrategia "Lay Home" --stake kelly --fracao 0.25
+    python simulador_banca.py 2024-01-01 2024-10-31 --estrategia "Lay 0 x 1" --stake fixa --fracao 0.02 \\
+        --caminhos 2000000 --apostas 500 --processos 4
+
+Cada caminho é uma sequência de apostas sorteadas (com reposição) das apostas históricas da
+estratégia no intervalo: o par (odd, resultado) de cada aposta mantém a taxa de acerto e a
+distribuição das odds. Os caminhos são gerados em blocos de arrays e resumidos em histogramas
+de tamanho fixo, por isso a memória não cresce com o número de caminhos.
+"""
+import argparse
+import os
+from collections import namedtuple
+from datetime import date
+
+import numpy as np
+
+from pool_processos import dados_locais, dados_processo, executor_com_dados
+
+# Modos de stake (montante arriscado em cada aposta: a responsabilidade no lay, a stake no back):
+# 'fixa' arrisca 'fracao' da banca inicial; 'proporcional' arrisca 'fracao' da banca atual;
+# 'kelly' arrisca 'fracao' do critério de Kelly da aposta, sobre a banca atual
+MODOS_STAKE = ("fixa", "proporcional", "kelly")
+
+# Um caminho está arruinado quando a banca desce a esta fração da inicial (e deixa de apostar)
+LIMIAR_RUINA = 0.1
+
+# Caminhos x apostas de cada bloco: limita a memória de cada processo (~8 bytes por elemento e array)
+ELEMENTOS_POR_BLOCO = 2_000_000
+
+QUANTIS = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+# Histogramas do resumo: drawdown em [0, 1], ROI em [-1, maior ganho], banca final em log10
+# (as bancas fora de 10^-4 a 10^4 contam nos extremos; a média usa os valores exatos)
+BINS_DRAWDOWN = 10_000
+BINS_ROI = 20_000
+BINS_BANCA = 16_000
+LIMITES_LOG_BANCA = (-4.0, 4.0)
+
+# Resultados de cada caminho de um bloco (banca inicial = 1)
+Bloco = namedtuple("Bloco", ["banca_final", "max_drawdown", "roi", "arruinado"])
+
+
+def fracoes_kelly(ganho, ganhou):
+    """Fração de Kelly de cada aposta: p - (1 - p) / ganho, com p a taxa de acerto histórica (mínimo 0)."""
+    p = float(np.mean(ganhou)) if len(ganhou) else 0.0
+    return np.clip(p - (1 - p) / ganho, 0.0, 1.0)
+
+
+def _simular_bloco(resultado, fracao, n_caminhos, n_apostas, fixa, limiar_ruina, semente):
+    """Simula n_caminhos sequências de n_apostas; 'resultado' é o lucro por unidade arriscada de cada aposta histórica."""
+    rng = np.random.default_rng(semente)
+    sorteio = rng.integers(0, len(resultado), size=(n_caminhos, n_apostas), dtype=np.int32)
+    r = resultado[sorteio]
+    if fixa:
+        stake = np.full(r.shape, fracao[0])
+        banca = 1 + np.cumsum(stake * r, axis=1)
+    else:
+        f = fracao[sorteio]
+        with np.errstate(divide="ignore"):
+            banca = np.exp(np.cumsum(np.log1p(f * r), axis=1))
+        stake = np.empty_like(banca)
+        stake[:, 0] = f[:, 0]
+        np.multiply(f[:, 1:], banca[:, :-1], out=stake[:, 1:])
+    del r, sorteio
+
+    # Depois da ruína o caminho para: a banca fica congelada e não há mais stakes
+    arruinado_em = np.cumsum(banca <= limiar_ruina, axis=1, dtype=np.int32) > 0
+    arruinado = arruinado_em[:, -1].copy()
+    if arruinado.any():
+        primeira = np.argmax(arruinado_em[arruinado], axis=1)
+        linhas = np.flatnonzero(arruinado)
+        banca[linhas] = np.where(arruinado_em[linhas], banca[linhas, primeira][:, None], banca[linhas])
+        stake[linhas, 1:] = np.where(arruinado_em[linhas, :-1], 0.0, stake[linhas, 1:])
+    np.maximum(banca, 0.0, out=banca)
+
+    pico = np.maximum.accumulate(np.maximum(banca, 1.0), axis=1)
+    max_drawdown = ((pico - banca) / pico).max(axis=1)
+    banca_final = banca[:, -1]
+    arriscado = stake.sum(axis=1)
+    # Sem stakes (Kelly nulo em todas as apostas sorteadas) o ROI é 0
+    roi = np.divide(banca_final - 1, arriscado, out=np.zeros(len(banca_final)), where=arriscado > 0)
+    return Bloco(banca_final, max_drawdown, roi, arruinado)
+
+
+def _simular_bloco_processo(argumentos):
+    n_caminhos, semente = argumentos
+    dados = dados_processo()
+    return _simular_bloco(dados["resultado"], dados["fracao"], n_caminhos, dados["n_apostas"], dados["fixa"],
+                          dados["limiar_ruina"], semente)
+
+
+def simular_blocos(ganho, ganhou, n_caminhos, n_apostas, modo_stake="proporcional", fracao=0.02,
+                   limiar_ruina=LIMIAR_RUINA, seed=0, processos=1, caminhos_por_bloco=None):
+    """Gera os caminhos da banca bloco a bloco (um Bloco de cada vez, pela ordem dos blocos).
+
+    'ganho' e 'ganhou' são as apostas históricas (ver backtest.apostas). Cada bloco tem a sua
+    semente, derivada de 'seed', por isso os resultados são os mesmos com qualquer número de
+    processos. Com processos > 1, só há 2 blocos por processo em curso de cada vez.
+    """
+    if modo_stake not in MODOS_STAKE:
+        raise ValueError(f"Modo de stake desconhecido: {modo_stake!r}. Disponíveis: {list(MODOS_STAKE)}")
+    if len(ganho) == 0:
+        raise ValueError("Não há apostas históricas para simular")
+    ganho = np.asarray(ganho, dtype=float)
+    ganhou = np.asarray(ganhou, dtype=bool)
+    dados = {
+        "resultado": np.where(ganhou, ganho, -1.0),
+        "fracao": fracao * (fracoes_kelly(ganho, ganhou) if modo_stake == "kelly" else np.ones(len(ganho))),
+        "n_apostas": n_apostas, "fixa": modo_stake == "fixa", "limiar_ruina": limiar_ruina,
+    }
+    caminhos_por_bloco = caminhos_por_bloco or max(1, ELEMENTOS_POR_BLOCO // n_apostas)
+    tamanhos = [min(caminhos_por_bloco, n_caminhos - i) for i in range(0, n_caminhos, caminhos_por_bloco)]
+    blocos = list(zip(tamanhos, np.random.SeedSequence(seed).spawn(len(tamanhos))))
+
+    if processos == 1:
+        with dados_locais(dados):
+            for bloco in blocos:
+                yield _simular_bloco_processo(bloco)
+        return
+    with executor_com_dados(processos, dados) as executor:
+        em_curso = [executor.submit(_simular_bloco_processo, bloco) for bloco in blocos[:2 * processos]]
+        for seguinte in blocos[2 * processos:] + [None] * len(em_curso):
+            resultado = em_curso.pop(0).result()
+            if seguinte is not None:
+                em_curso.append(executor.submit(_simular_bloco_processo, seguinte))
+            yield resultado
+
+
+def _quantis(contagens, limites, quantis):
+    """Quantis de um histograma (interpolação linear dentro de cada bin)."""
+    acumulado = np.cumsum(contagens)
+    if not acumulado[-1]:
+        return {q: np.nan for q in quantis}
+    resultado = {}
+    for q in quantis:
+        alvo = q * acumulado[-1]
+        i = int(np.searchsorted(acumulado, alvo, side="left"))
+        antes = acumulado[i - 1] if i else 0
+        resultado[q] = float(limites[i] + (limites[i + 1] - limites[i]) * (alvo - antes) / max(contagens[i], 1))
+    return resultado
+
+
+class ResumoSimulacao:
+    """Resumo dos caminhos acumulado bloco a bloco: ruína, médias e histogramas para os quantis."""
+
+    def __init__(self, roi_maximo):
+        self.caminhos = 0
+        self.arruinados = 0
+        self.com_lucro = 0
+        self.soma_roi = 0.0
+        self.soma_banca = 0.0
+        self.limites_drawdown = np.linspace(0.0, 1.0, BINS_DRAWDOWN + 1)
+        self.limites_roi = np.linspace(-1.0, roi_maximo, BINS_ROI + 1)
+        self.limites_banca = np.linspace(*LIMITES_LOG_BANCA, BINS_BANCA + 1)
+        self.drawdown = np.zeros(BINS_DRAWDOWN, dtype=np.int64)
+        self.roi = np.zeros(BINS_ROI, dtype=np.int64)
+        self.banca = np.zeros(BINS_BANCA, dtype=np.int64)
+
+    @staticmethod
+    def _contar(histograma, limites, valores):
+        bins = np.clip(np.searchsorted(limites, valores, side="right") - 1, 0, len(histograma) - 1)
+        histograma += np.bincount(bins, minlength=len(histograma))
+
+    def acrescentar(self, bloco):
+        self.caminhos += len(bloco.banca_final)
+        self.arruinados += int(bloco.arruinado.sum())
+        self.com_lucro += int((bloco.banca_final > 1).sum())
+        self.soma_roi += float(bloco.roi.sum())
+        self.soma_banca += float(bloco.banca_final.sum())
+        self._contar(self.drawdown, self.limites_drawdown, bloco.max_drawdown)
+        self._contar(self.roi, self.limites_roi, bloco.roi)
+        with np.errstate(divide="ignore"):
+            self._contar(self.banca, self.limites_banca, np.log10(bloco.banca_final))
+
+    def resultado(self, quantis=QUANTIS):
+        """Probabilidade de ruína e de lucro, médias e quantis do drawdown máximo, do ROI e da banca final."""
+        caminhos = max(self.caminhos, 1)
+        return {
+            "caminhos": self.caminhos,
+            "prob_ruina": self.arruinados / caminhos,
+            "prob_lucro": self.com_lucro / caminhos,
+            "roi_medio": self.soma_roi / caminhos,
+            "banca_final_media": self.soma_banca / caminhos,
+            "drawdown": _quantis(self.drawdown, self.limites_drawdown, quantis),
+            "roi": _quantis(self.roi, self.limites_roi, quantis),
+            "banca_final": {q: 10 ** v for q, v in _quantis(self.banca, self.limites_banca, quantis).items()},
+        }
+
+
+def simular(ganho, ganhou, n_caminhos, n_apostas, modo_stake="proporcional", fracao=0.02,
+            limiar_ruina=LIMIAR_RUINA, seed=0, processos=1, quantis=QUANTIS):
+    """Simula os caminhos e devolve o resumo (ver ResumoSimulacao.resultado), sem guardar os caminhos."""
+    resumo = ResumoSimulacao(roi_maximo=float(np.max(ganho)))
+    for bloco in simular_blocos(ganho, ganhou, n_caminhos, n_apostas, modo_stake, fracao, limiar_ruina, seed, processos):
+        resumo.acrescentar(bloco)
+    return resumo.resultado(quantis)
+
+
+def apostas_do_intervalo(inicio, fim, nome_estrategia, comissao=0.0):
+    """Apostas históricas (ganho, ganhou) de uma estratégia nos ficheiros diários do intervalo."""
+    from backtest import apostas, juntar_resultados
+    from base_de_dados import carregar_base_de_dados
+    from jogos_do_dia import carregar_intervalo
+    from estrategias import por_nome
+
+    estrategia = por_nome([nome_estrategia])[0]
+    jogos = carregar_intervalo(inicio, fim)
+    if jogos.empty:
+        raise ValueError(f"Não há ficheiros de jogos entre {inicio} e {fim}")
+    return apostas(juntar_resultados(jogos, carregar_base_de_dados()), estrategia, comissao=comissao)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inicio", type=date.fromisoformat, help="primeiro dia do histórico (AAAA-MM-DD)")
+    parser.add_argument("fim", type=date.fromisoformat, help="último dia do histórico (AAAA-MM-DD), inclusive")
+    parser.add_argument("--estrategia", required=True, help='nome da estratégia (p.ex. "Lay Home")')
+    parser.add_argument("--stake", choices=MODOS_STAKE, default="proporcional")
+    parser.add_argument("--fracao", type=float, default=0.02, help="fração da banca (ou do Kelly) arriscada")
+    parser.add_argument("--comissao", type=float, default=0.0)
+    parser.add_argument("--caminhos", type=int, default=1_000_000)
+    parser.add_argument("--apostas", type=int, default=500, help="apostas por caminho")
+    parser.add_argument("--ruina", type=float, default=LIMIAR_RUINA, help="fração da banca inicial que conta como ruína")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processos", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    if args.fim < args.inicio:
+        parser.error("o último dia é anterior ao primeiro")
+
+    try:
+        ganho, ganhou = apostas_do_intervalo(args.inicio, args.fim, args.estrategia, args.comissao)
+        resumo = simular(ganho, ganhou, args.caminhos, args.apostas, args.stake, args.fracao, args.ruina,
+                         args.seed, args.processos)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"{args.estrategia}: {len(ganho)} apostas históricas, taxa de acerto {np.mean(ganhou):.1%}")
+    print(f"{resumo['caminhos']} caminhos de {args.apostas} apostas, stake {args.stake} {args.fracao}")
+    print(f"Ruína (banca <= {args.ruina:.0%}): {resumo['prob_ruina']:.2%}  Com lucro: {resumo['prob_lucro']:.1%}  "
+          f"ROI médio: {resumo['roi_medio']:.2%}  Banca final média: {resumo['banca_final_media']:.3f}")
+    print(f"{'quantil':>8}{'drawdown':>10}{'ROI':>10}{'banca':>10}")
+    for q in QUANTIS:
+        print(f"{q:>8.0%}{resumo['drawdown'][q]:>10.1%}{resumo['roi'][q]:>10.2%}{resumo['banca_final'][q]:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
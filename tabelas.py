@@ -0,0 +1,122 @@
+import json
+
+import pyarrow as pa
+import streamlit as st
+from st_aggrid import AgGrid, GridOptionsBuilder
+
+from instrumentacao import contar_elementos, medido
+
+# Colunas mostradas por omissão; as restantes só são enviadas ao browser quando escolhidas
+COLUNAS_PADRAO = [
+    'League', 'Season', 'Date', 'Time', 'Home', 'Away', 'FT_Odd_H', 'FT_Odd_D', 'FT_Odd_A',
+    'FT_Odd_Over25', 'FT_Odd_Under25', 'Odd_BTTS_Yes', 'Odd_BTTS_No',
+    'HT_Goals_H', 'HT_Goals_A', 'FT_Goals_H', 'FT_Goals_A',
+]
+TAMANHO_PAGINA = 25
+
+# Bytes serializados no último render de cada tabela (chave da tabela -> bytes)
+payloads = {}
+
+
+def colunas_padrao(df, colunas=None):
+    """Colunas do subconjunto por omissão que existem no DataFrame (todas, se nenhuma existir)."""
+    colunas = COLUNAS_PADRAO if colunas is None else colunas
+    escolhidas = [c for c in colunas if c in df.columns]
+    return escolhidas or list(df.columns)
+
+
+def num_paginas(df, tamanho_pagina=TAMANHO_PAGINA):
+    return max(1, -(-len(df) // tamanho_pagina))
+
+
+def paginar(df, pagina, tamanho_pagina=TAMANHO_PAGINA, colunas=None):
+    """Linhas da página (a começar em 1) e apenas as colunas pedidas."""
+    pagina = min(max(int(pagina), 1), num_paginas(df, tamanho_pagina))
+    inicio = (pagina - 1) * tamanho_pagina
+    visivel = df.iloc[inicio:inicio + tamanho_pagina]
+    return visivel[colunas] if colunas is not None else visivel.copy()
+
+
+def opcoes_grelha(df):
+    """Opções da AgGrid com ajuste de colunas, altura automática e alinhamento central."""
+    gb = GridOptionsBuilder.from_dataframe(df)
+    gb.configure_default_column(
+        resizable=True, autoSizeColumns=True, wrapText=True,
+        cellStyle={'textAlign': 'center'}
+    )
+    gb.configure_grid_options(domLayout='autoHeight')
+    return gb.build()
+
+
+def tamanho_payload(df, grid_options=None):
+    """Bytes enviados ao browser: os dados em Arrow e as opções da grelha em JSON."""
+    try:
+        tabela = pa.Table.from_pandas(df)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        tabela = pa.Table.from_pandas(df.astype(str))  # Colunas com tipos mistos seguem como texto
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabela.schema) as writer:
+        writer.write_table(tabela)
+    tamanho = sink.getvalue().size
+    if grid_options is not None:
+        tamanho += len(json.dumps(grid_options, default=str).encode())
+    return tamanho
+
+
+@medido("render_tabela")
+def mostrar_tabela(df, chave, colunas=None, tamanho_pagina=TAMANHO_PAGINA, aggrid=True):
+    """Mostra o DataFrame paginado no servidor e só com as colunas escolhidas.
+
+    Por omissão aparecem as colunas de COLUNAS_PADRAO (ou as indicadas em 'colunas');
+    as outras são escolhidas num seletor e só então serializadas.
+    """
+    todas = list(df.columns)
+    padrao = colunas_padrao(df, colunas)
+    selecionadas = padrao
+    if len(padrao) < len(todas):
+        contar_elementos(2)
+        with st.expander(f"Colunas ({len(padrao)} de {len(todas)})"):
+            selecionadas = st.multiselect("Colunas visíveis", todas, default=padrao, key=f"{chave}_colunas") or padrao
+
+    pagina = 1
+    paginas = num_paginas(df, tamanho_pagina)
+    if paginas > 1:
+        contar_elementos()
+        pagina = st.number_input(
+            f"Página (de {paginas}, {len(df)} linhas)", min_value=1, max_value=paginas, value=1, step=1,
+            key=f"{chave}_pagina",
+        )
+    visivel = paginar(df, pagina, tamanho_pagina, selecionadas)
+    contar_elementos()
+
+    if aggrid:
+        grid_options = opcoes_grelha(visivel)
+        payloads[chave] = tamanho_payload(visivel, grid_options)
+        AgGrid(visivel, gridOptions=grid_options, enable_enterprise_modules=False, key=f"{chave}_grelha")
+    else:
+        payloads[chave] = tamanho_payload(visivel)
+        st.dataframe(visivel)
+
+
+def titulo(texto):
+    """st.title, contado nos elementos do rerun."""
+    contar_elementos()
+    st.title(texto)
+
+
+def cabecalho(texto):
+    """st.header, contado nos elementos do rerun."""
+    contar_elementos()
+    st.header(texto)
+
+
+def subcabecalho(texto):
+    """st.subheader, contado nos elementos do rerun."""
+    contar_elementos()
+    st.subheader(texto)
+
+
+def markdown(texto, unsafe_allow_html=False):
+    """st.markdown, contado nos elementos do rerun."""
+    contar_elementos()
+    st.markdown(texto, unsafe_allow_html=unsafe_allow_html)
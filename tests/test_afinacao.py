@@ -0,0 +1,36 @@
+from streamlit.testing.v1 import AppTest
+
+import afinacao
+import jogos_do_dia
+from base_de_dados import COLUNAS_SELECIONADAS, tipar_base_de_dados
+from dados_sinteticos import gerar_base_sintetica
+
+
+def _pagina():
+    from datetime import date
+
+    from afinacao import mostrar_afinacao
+    from dados_sinteticos import gerar_jogos_sinteticos
+    from estrategias import LAY_HOME
+
+    mostrar_afinacao(LAY_HOME, date.today(), gerar_jogos_sinteticos(50))
+
+
+def test_historico_usa_a_base_de_dados_com_features(monkeypatch):
+    base_dados = tipar_base_de_dados(gerar_base_sintetica(8000, n_colunas_extra=0)[COLUNAS_SELECIONADAS])
+    monkeypatch.setattr(afinacao, "carregar_base_de_dados", lambda: base_dados)
+    monkeypatch.setattr(afinacao, "versao_base_de_dados", lambda: "teste")
+
+    def sem_ficheiros(*args, **kwargs):
+        raise AssertionError("o histórico não deve descarregar ficheiros diários")
+    monkeypatch.setattr(jogos_do_dia, "carregar_intervalo", sem_ficheiros)
+
+    pagina = AppTest.from_function(_pagina).run()
+    pagina.radio[0].set_value("Histórico").run()
+
+    assert not pagina.exception
+    inicio, fim = pagina.date_input[0].value
+    assert fim == base_dados["Date"].max().date()
+    datas = base_dados["Date"].dt.date
+    n_jogos = int(((datas >= inicio) & (datas <= fim)).sum())
+    assert pagina.metric[-1].value.endswith(f"de {n_jogos}")
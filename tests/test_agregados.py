@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+import agregados
+from agregados import AgregadosEquipas, obter_agregados
+from base_de_dados import tipar_base_de_dados
+from dados_sinteticos import gerar_base_sintetica, verificar_agregados
+
+
+def _base(n_linhas=4000):
+    return tipar_base_de_dados(gerar_base_sintetica(n_linhas, n_ligas=4, n_colunas_extra=0, n_temporadas=3))
+
+
+def _temporadas(base_dados):
+    return sorted(base_dados["Season"].astype(str).unique())[-2:]
+
+
+def test_jogos_novos_no_meio_da_historia_sao_aplicados_como_delta():
+    agregados._estados.clear()
+    base_dados = _base()
+    rng = np.random.default_rng(0)
+    novos = np.zeros(len(base_dados), dtype=bool)
+    novos[rng.choice(len(base_dados), 150, replace=False)] = True
+    # Como historico.ler: ambas as versões ordenadas pela data, com os jogos novos pelo meio
+    antiga = base_dados[~novos].sort_values("Date", kind="stable")
+    completa = base_dados.sort_values("Date", kind="stable")
+
+    anteriores = obter_agregados(antiga)
+    atualizados = obter_agregados(completa)
+
+    assert atualizados is not anteriores
+    assert atualizados.n_linhas == len(completa)
+    verificar_agregados(atualizados, AgregadosEquipas(completa), _temporadas(completa))
+
+
+def test_delta_nao_altera_os_agregados_anteriores():
+    agregados._estados.clear()
+    completa = _base().sort_values("Date", kind="stable")
+    antiga = completa.iloc[:-200]
+    equipa = str(completa["Home"].iloc[-1])
+
+    # Outra sessão continua com os agregados da base antiga enquanto chega a nova
+    anteriores = obter_agregados(antiga)
+    contagem = anteriores.mercados(equipa, "Home")
+    matrizes = anteriores.matrizes("Home", "total").copy()
+    obter_agregados(completa)
+
+    assert anteriores.n_linhas == len(antiga)
+    assert anteriores.mercados(equipa, "Home") == contagem
+    assert np.array_equal(anteriores.matrizes("Home", "total"), matrizes)
+    verificar_agregados(anteriores, AgregadosEquipas(antiga), _temporadas(antiga))
+    assert obter_agregados(antiga) is anteriores
+
+
+def test_base_que_perde_jogos_e_recalculada():
+    agregados._estados.clear()
+    base_dados = _base()
+    anteriores = obter_agregados(base_dados)
+    reduzida = base_dados.iloc[100:]
+
+    recalculados = obter_agregados(reduzida)
+
+    assert recalculados is not anteriores
+    verificar_agregados(recalculados, AgregadosEquipas(reduzida), _temporadas(reduzida))
+    # A base anterior continua em memória e é devolvida sem recálculo
+    assert obter_agregados(base_dados) is anteriores
+
+
+def test_fatias_de_equipas_diferentes_nao_se_misturam():
+    agregados._estados.clear()
+    base_dados = _base()
+    equipas = base_dados["Home"].astype(str).unique()
+    fatias = [
+        base_dados[base_dados["Home"].astype(str).isin(grupo) | base_dados["Away"].astype(str).isin(grupo)]
+        for grupo in (equipas[:5], equipas[5:10])
+    ]
+    for fatia in fatias + [pd.concat(fatias).drop_duplicates().sort_values("Date", kind="stable")]:
+        verificar_agregados(obter_agregados(fatia), AgregadosEquipas(fatia), _temporadas(fatia))
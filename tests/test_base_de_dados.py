@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+import sys
+import threading
+import types
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import base_de_dados
+from base_de_dados import (
+    COLUNAS_SELECIONADAS, cache_stats, carregar_base_de_dados, gravar_partilhado, limpar_cache, mapear_partilhado,
+    tipar_base_de_dados,
+)
+from dados_sinteticos import gerar_base_sintetica
+
+URL = "http://servidor.invalido/base_de_dados.csv"
+
+
+def test_revalidacao_lenta_nao_bloqueia_outras_sessoes(monkeypatch, tmp_path):
+    corpo = gerar_base_sintetica(500, n_colunas_extra=0).to_csv(index=False).encode()
+    dentro, libertar = threading.Event(), threading.Event()
+
+    def pedido(url, entrada, timeout):
+        if entrada is None:
+            return 200, corpo, '"v1"', None
+        # Revalidação lenta: fica à espera até o teste a libertar
+        dentro.set()
+        libertar.wait(10)
+        return 304, None, None, None
+
+    monkeypatch.setattr(base_de_dados, "_pedido_condicional", pedido)
+    limpar_cache()
+    primeira = carregar_base_de_dados(URL, cache_dir=str(tmp_path), intervalo=0)
+
+    lenta = threading.Thread(target=carregar_base_de_dados, args=(URL, str(tmp_path), 0))
+    lenta.start()
+    assert dentro.wait(10)
+    # Enquanto a revalidação está em curso, outra sessão recebe logo a cópia em memória
+    assert carregar_base_de_dados(URL, cache_dir=str(tmp_path), intervalo=0) is primeira
+    assert cache_stats["concorrentes"] == 1
+    libertar.set()
+    lenta.join(10)
+    assert not lenta.is_alive()
+    assert cache_stats["revalidacoes"] == 1
+    limpar_cache()
+
+
+def _pss_mb(pid):
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        return next(int(linha.split()[1]) for linha in f if linha.startswith("Pss:")) / 1024
+
+
+def _tocar(base_dados):
+    """Lê todos os bytes de todas as colunas sem criar cópias."""
+    for coluna in base_dados.columns:
+        serie = base_dados[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            serie.array.codes.sum()
+        elif pd.api.types.is_string_dtype(serie.dtype):
+            # __arrow_array__ devolve o large_string mapeado; pa.array(...) convertê-lo-ia para string (cópia)
+            for pedaco in serie.array.__arrow_array__().chunks:
+                for buffer in filter(None, pedaco.buffers()):
+                    np.frombuffer(buffer, dtype=np.uint8).sum()
+        else:
+            serie.to_numpy().view(np.uint8).sum()
+
+
+def _sessao(caminho, fila, carregar, sair):
+    _tocar(mapear_partilhado(caminho).head(100))
+    fila.put(os.getpid())
+    carregar.wait()
+    # A referência mantém o ficheiro mapeado até à medição
+    base_dados = mapear_partilhado(caminho)
+    _tocar(base_dados)
+    fila.put(os.getpid())
+    sair.wait()
+
+
+def _pss_das_sessoes(caminho, n_sessoes):
+    """PSS acrescentado pelos dados em n_sessoes processos que mapeiam o mesmo ficheiro, em MB."""
+    contexto = multiprocessing.get_context("spawn")
+    fila, carregar, sair = contexto.Queue(), contexto.Event(), contexto.Event()
+    processos = [contexto.Process(target=_sessao, args=(caminho, fila, carregar, sair)) for _ in range(n_sessoes)]
+    for processo in processos:
+        processo.start()
+    try:
+        pids = [fila.get(timeout=120) for _ in processos]
+        antes = sum(_pss_mb(pid) for pid in pids)
+        carregar.set()
+        for _ in processos:
+            fila.get(timeout=120)
+        return sum(_pss_mb(pid) for pid in pids) - antes
+    finally:
+        sair.set()
+        for processo in processos:
+            processo.join()
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="precisa de /proc/<pid>/smaps_rollup")
+def test_ficheiro_partilhado_nao_multiplica_a_memoria_pelas_sessoes(tmp_path, monkeypatch):
+    # O AppTest de outros testes deixa o seu script como __main__, que os processos novos voltariam a correr
+    monkeypatch.setitem(sys.modules, "__main__", types.ModuleType("__main__"))
+    caminho = str(tmp_path / "base.arrow")
+    base_dados = tipar_base_de_dados(gerar_base_sintetica(200_000, n_colunas_extra=0)[COLUNAS_SELECIONADAS])
+    gravar_partilhado(base_dados, caminho)
+    tamanho_mb = os.path.getsize(caminho) / 2**20
+
+    uma, quatro = _pss_das_sessoes(caminho, 1), _pss_das_sessoes(caminho, 4)
+
+    # Com uma cópia por sessão, quatro sessões somariam cerca de mais 3x o ficheiro
+    assert uma > 0.5 * tamanho_mb
+    assert quatro - uma < 0.1 * tamanho_mb
@@ -0,0 +1,40 @@
+from datetime import date
+
+from cache_estrategias import CacheEstrategias
+from dados_sinteticos import gerar_jogos_sinteticos
+from estrategias import ESTRATEGIAS, aplicar_estrategias
+
+DIA = date(2024, 10, 1)
+
+
+def _jogos():
+    jogos = gerar_jogos_sinteticos(400)
+    jogos.attrs["impressao"] = "v1"
+    return jogos
+
+
+def test_subconjunto_dos_jogos_nao_reutiliza_as_tabelas_do_dia():
+    cache = CacheEstrategias()
+    jogos = _jogos()
+    cache.obter(DIA, jogos, ESTRATEGIAS)
+    # Os filtros e fatias herdam attrs["impressao"] do ficheiro
+    subconjunto = jogos[jogos["League"] == jogos["League"].iloc[0]]
+    assert subconjunto.attrs["impressao"] == "v1"
+
+    misses = cache.estatisticas()["misses"]
+    resultados = cache.obter(DIA, subconjunto, ESTRATEGIAS)
+
+    assert cache.estatisticas()["misses"] - misses == len(ESTRATEGIAS)
+    esperados = aplicar_estrategias(subconjunto, ESTRATEGIAS)
+    assert all(resultados[nome].equals(esperados[nome]) for nome in esperados)
+
+
+def test_mesmos_jogos_sao_servidos_da_cache():
+    cache = CacheEstrategias()
+    jogos = _jogos()
+    primeiros = cache.obter(DIA, jogos, ESTRATEGIAS)
+
+    segundos = cache.obter(DIA, jogos.copy(), ESTRATEGIAS)
+
+    assert cache.estatisticas()["hits"] == len(ESTRATEGIAS)
+    assert all(segundos[nome] is primeiros[nome] for nome in primeiros)
@@ -0,0 +1,30 @@
+from streamlit.testing.v1 import AppTest
+
+import jogos_do_dia
+from esquemas import COLUNAS_JOGOS_DO_DIA, ESQUEMAS
+from estrategias import ESTRATEGIAS, colunas_referenciadas
+
+
+def test_colunas_das_estrategias_estao_declaradas_no_esquema_diario():
+    usadas = set(colunas_referenciadas(ESTRATEGIAS))
+    for estrategia in ESTRATEGIAS:
+        usadas.update(estrategia.colunas)
+    assert usadas <= set(COLUNAS_JOGOS_DO_DIA)
+    assert list(ESQUEMAS["df_jogos_do_dia"].obrigatorias) == COLUNAS_JOGOS_DO_DIA
+
+
+def _pagina_back():
+    from back import show_back
+
+    show_back()
+
+
+def test_dia_sem_ficheiro_e_indicado_na_pagina(monkeypatch):
+    jogos_do_dia.armazem.limpar()
+    monkeypatch.setattr(jogos_do_dia.armazem, "_carregar", lambda dia, fonte: None)
+
+    pagina = AppTest.from_function(_pagina_back).run()
+
+    assert not pagina.exception
+    assert "Não há ficheiro de jogos" in pagina.warning[0].value
+    assert not pagina.dataframe
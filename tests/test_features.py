@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from base_de_dados import tipar_base_de_dados
+from dados_sinteticos import gerar_base_sintetica
+from features import adicionar_features, construir_features
+
+
+def _base(n_linhas=4000):
+    return tipar_base_de_dados(gerar_base_sintetica(n_linhas, n_ligas=4, n_colunas_extra=0, n_temporadas=2))
+
+
+def test_features_de_dias_passados_nao_contam_os_proprios_resultados():
+    base_dados = _base()
+    completo = construir_features(base_dados)
+    datas = base_dados["Date"].sort_values().unique()
+    # Jogos de vários dias a meio da história, com os resultados (como nos ficheiros diários)
+    jogos = base_dados[base_dados["Date"].isin(datas[len(datas) // 2:len(datas) // 2 + 5])]
+    colunas_features = [c for c in completo.columns if c in jogos.columns]
+    jogos = jogos.drop(columns=colunas_features)
+
+    com_features = adicionar_features(jogos, base_dados)
+
+    np.testing.assert_allclose(
+        com_features[completo.columns].to_numpy(dtype=float), completo.loc[jogos.index].to_numpy(dtype=float),
+        rtol=1e-6, equal_nan=True,
+    )
+
+
+def test_features_de_um_dia_novo_usam_as_janelas():
+    base_dados = _base()
+    ultima = base_dados["Date"].max()
+    novos = base_dados[base_dados["Date"] == ultima].copy()
+    anteriores = base_dados[base_dados["Date"] < ultima]
+    novos["Date"] = ultima + pd.Timedelta(days=1)
+
+    com_features = adicionar_features(novos, anteriores)
+    esperado = construir_features(anteriores, novos)
+
+    np.testing.assert_allclose(
+        com_features[esperado.columns].to_numpy(dtype=float), esperado.to_numpy(dtype=float), rtol=1e-6, equal_nan=True,
+    )
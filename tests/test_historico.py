@@ -0,0 +1,69 @@
+import historico
+from base_de_dados import tipar_base_de_dados
+from dados_sinteticos import gerar_base_sintetica
+from historico import HistoricoParticionado, carregar_historico_ligas
+
+
+def _versoes():
+    base_dados = tipar_base_de_dados(gerar_base_sintetica(3000, n_ligas=3, n_colunas_extra=0, n_temporadas=2))
+    ultimo_dia = base_dados["Date"].max()
+    return base_dados[base_dados["Date"] < ultimo_dia], base_dados
+
+
+def _jogos_distintos(base_dados):
+    return int((~historico._chaves(base_dados).duplicated()).sum())
+
+
+def _servir(monkeypatch, base_dados, versao, em_memoria=False):
+    monkeypatch.setattr(historico, "carregar_base_de_dados", lambda: base_dados)
+    monkeypatch.setattr(historico, "versao_base_de_dados", lambda: versao)
+    monkeypatch.setattr(historico, "base_de_dados_em_memoria", lambda: (base_dados, versao) if em_memoria else (None, None))
+
+
+def _sem_carregar(monkeypatch):
+    def carregar():
+        raise AssertionError("a base de dados completa não deve ser carregada")
+    monkeypatch.setattr(historico, "carregar_base_de_dados", carregar)
+
+
+def test_nova_versao_em_memoria_e_ingerida_antes_de_ler(tmp_path, monkeypatch):
+    historico._fatias.clear()
+    armazem = HistoricoParticionado(str(tmp_path))
+    antiga, nova = _versoes()
+    jogos = nova[["League", "Home", "Away"]].drop_duplicates("League")
+
+    _servir(monkeypatch, antiga, "v1")
+    primeira = carregar_historico_ligas(jogos, armazem)
+    assert len(primeira) == _jogos_distintos(antiga)
+    # Com o histórico criado, as fatias não carregam a base de dados
+    _sem_carregar(monkeypatch)
+    assert carregar_historico_ligas(jogos, armazem) is primeira
+    versao = armazem.versao
+
+    _servir(monkeypatch, nova, "v2", em_memoria=True)
+    _sem_carregar(monkeypatch)
+    segunda = carregar_historico_ligas(jogos, armazem)
+    assert armazem.versao == versao + 1
+    assert armazem.ingerida("v2")
+    assert len(segunda) == _jogos_distintos(nova)
+    # A mesma versão não volta a ser ingerida
+    assert carregar_historico_ligas(jogos, armazem) is segunda
+    assert armazem.versao == versao + 1
+
+
+def test_passo_de_ingestao_so_escreve_versoes_novas(tmp_path, monkeypatch):
+    historico._fatias.clear()
+    armazem = HistoricoParticionado(str(tmp_path))
+    antiga, nova = _versoes()
+
+    _servir(monkeypatch, antiga, "v1")
+    assert sum(historico.atualizar_historico(armazem).values()) == _jogos_distintos(antiga)
+    assert historico.atualizar_historico(armazem) == {}
+    # Uma versão mais antiga ainda em memória noutro processo não é reingerida
+    _servir(monkeypatch, nova, "v2")
+    historico.atualizar_historico(armazem)
+    _servir(monkeypatch, antiga, "v1", em_memoria=True)
+    versao = armazem.versao
+    carregar_historico_ligas(antiga.drop_duplicates("League"), armazem)
+    assert armazem.versao == versao
+    assert armazem.manifesto()["versoes_base"] == ["v1", "v2"]
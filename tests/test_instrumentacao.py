@@ -0,0 +1,32 @@
+import json
+
+from streamlit.testing.v1 import AppTest
+
+import instrumentacao
+
+
+def _pagina():
+    import pandas as pd
+
+    from instrumentacao import etapa, rerun_instrumentado
+    from tabelas import cabecalho, mostrar_tabela
+
+    with rerun_instrumentado("teste"):
+        cabecalho("Jogos")
+        with etapa("tabela"):
+            mostrar_tabela(pd.DataFrame({"Home": range(60)}), "jogos", aggrid=False)
+
+
+def test_elementos_contados_por_etapa_no_trace(tmp_path, monkeypatch):
+    caminho = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(instrumentacao, "ATIVO", True)
+    monkeypatch.setattr(instrumentacao, "FICHEIRO_TRACES", str(caminho))
+
+    pagina = AppTest.from_function(_pagina).run()
+
+    assert not pagina.exception
+    trace = json.loads(caminho.read_text().splitlines()[-1])
+    etapas = {e["nome"]: e["elementos"] for e in trace["etapas"]}
+    # Paginador e tabela dentro das etapas (a de fora inclui a de dentro); o cabeçalho só no total
+    assert etapas == {"render_tabela": 2, "tabela": 2}
+    assert trace["elementos"] == 3
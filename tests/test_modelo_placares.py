@@ -0,0 +1,37 @@
+import pandas as pd
+
+import historico
+import modelo_placares
+from base_de_dados import tipar_base_de_dados
+from dados_sinteticos import gerar_base_sintetica
+from modelo_placares import ModeloPlacares, matrizes_do_dia
+
+
+def test_nova_ingestao_reajusta_a_quente_so_as_ligas_com_jogos_novos(tmp_path, monkeypatch):
+    base_dados = tipar_base_de_dados(gerar_base_sintetica(3000, n_ligas=3, n_colunas_extra=0, n_temporadas=2))
+    # Dia novo só com jogos da primeira liga
+    novos = base_dados[base_dados["League"] == base_dados["League"].iloc[0]].tail(5).copy()
+    novos["Date"] = base_dados["Date"].max() + pd.Timedelta(days=1)
+    atualizada = pd.concat([base_dados, novos], ignore_index=True)
+    jogos = atualizada.drop_duplicates("League")
+
+    historico._fatias.clear()
+    monkeypatch.setattr(historico.historico, "pasta", str(tmp_path / "historico"))
+    monkeypatch.setattr(modelo_placares.obter_modelo, "__defaults__", (str(tmp_path / "modelo.json"),))
+    monkeypatch.setattr(modelo_placares, "_estado", {"modelo": ModeloPlacares()})
+    versao = {"df": base_dados, "versao": "v1"}
+    monkeypatch.setattr(historico, "carregar_base_de_dados", lambda: versao["df"])
+    monkeypatch.setattr(historico, "versao_base_de_dados", lambda: versao["versao"])
+    monkeypatch.setattr(historico, "base_de_dados_em_memoria", lambda: (None, None))
+
+    matrizes_do_dia(jogos)
+    stats = modelo_placares._estado["modelo"].stats
+    assert stats["ligas_ajustadas"] == 3
+
+    versao.update(df=atualizada, versao="v2")
+    historico.atualizar_historico()
+    matrizes = matrizes_do_dia(jogos)
+    assert stats["ajustes"] == 2
+    assert stats["ligas_ajustadas"] == 4
+    assert stats["ligas_reutilizadas"] == 2
+    assert matrizes.shape == (len(jogos), modelo_placares.MAX_GOLOS_MODELO, modelo_placares.MAX_GOLOS_MODELO)
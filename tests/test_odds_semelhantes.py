@@ -0,0 +1,41 @@
+import numpy as np
+
+from base_de_dados import tipar_base_de_dados
+from dados_sinteticos import gerar_base_sintetica, gerar_jogos_sinteticos
+from esquemas import COLUNAS_SELECIONADAS
+from odds_semelhantes import COLUNAS_ODDS_OBRIGATORIAS, OddsSemelhantes
+
+
+def _base(n_linhas=3000):
+    return tipar_base_de_dados(gerar_base_sintetica(n_linhas)[COLUNAS_SELECIONADAS])
+
+
+def test_jogos_sem_odds_opcionais_usam_as_colunas_existentes():
+    base_dados = _base()
+    jogos = gerar_jogos_sinteticos(20, seed=1).drop(columns=["Odd_BTTS_Yes", "Odd_BTTS_No", "HT_Odd_Over05"], errors="ignore")
+    indice = OddsSemelhantes(base_dados)
+
+    vizinhos = indice.consultar(jogos, k=10)
+
+    assert set(COLUNAS_ODDS_OBRIGATORIAS) <= set(indice.colunas(jogos))
+    assert (vizinhos.resumo["Vizinhos"] == 10).all()
+    assert (vizinhos.posicoes >= 0).all()
+
+
+def test_sem_odds_de_resultado_final_nao_ha_vizinhos():
+    vizinhos = OddsSemelhantes(_base()).consultar(gerar_jogos_sinteticos(5, seed=1).drop(columns=["FT_Odd_D"]))
+
+    assert (vizinhos.resumo["Vizinhos"] == 0).all()
+    assert (vizinhos.posicoes == -1).all()
+
+
+def test_dia_limita_os_vizinhos_a_jogos_anteriores():
+    base_dados = _base()
+    dia = base_dados["Date"].sort_values().iloc[len(base_dados) // 2]
+    indice = OddsSemelhantes(base_dados, dia)
+
+    vizinhos = indice.consultar(gerar_jogos_sinteticos(20, seed=1), k=10)
+
+    assert (vizinhos.posicoes >= 0).all()
+    datas = base_dados["Date"].to_numpy()[vizinhos.posicoes.ravel()]
+    assert (datas < np.datetime64(dia)).all()
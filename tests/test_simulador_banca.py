@@ -0,0 +1,29 @@
+import numpy as np
+
+from pool_processos import dados_processo
+from simulador_banca import simular, simular_blocos
+
+
+def _apostas(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    odd = rng.uniform(1.5, 4.0, n)
+    ganhou = rng.random(n) < 1 / odd + 0.03
+    return 1 / (odd - 1), ganhou
+
+
+def test_mesmo_resultado_com_um_ou_mais_processos():
+    ganho, ganhou = _apostas()
+    um = simular(ganho, ganhou, 4000, 100, seed=3, processos=1)
+    dois = simular(ganho, ganhou, 4000, 100, seed=3, processos=2)
+    assert um.keys() == dois.keys()
+    for chave in um:
+        np.testing.assert_array_equal(np.asarray(um[chave]), np.asarray(dois[chave]))
+
+
+def test_dados_do_processo_sao_apagados_no_fim_da_simulacao_local():
+    ganho, ganhou = _apostas()
+    blocos = simular_blocos(ganho, ganhou, 1000, 50, processos=1, caminhos_por_bloco=300)
+    next(blocos)
+    assert dados_processo()
+    list(blocos)
+    assert not dados_processo()